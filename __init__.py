@@ -21,57 +21,114 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 ###############################################################################
+# 注册时只加载菜单回调的轻量桩函数；统计、导出、编码等模块在第一次点击菜单时才导入，
+# 避免拖慢 qrenderdoc 启动（启动时会依次加载所有扩展）。
 import os
-import subprocess
-import qrenderdoc as qrd
-from .texture_exporter import TextureExporter
-from .drawcall_statistics import window_callback
-from .utils import TextureSaver, get_filename_without_extension
-
-from .test.test import TestClass
-
 import sys
 
+import qrenderdoc as qrd
+
 sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
 
 
-# 全局实例
-texture_exporter: TextureExporter = None
+# 全局实例，第一次导出当前 DrawCall 纹理时创建
+texture_exporter = None
 
 
-def texture_callback(ctx: qrd.CaptureContext, data):
+def _get_texture_exporter(ctx: qrd.CaptureContext):
     global texture_exporter
+    if texture_exporter is None:
+        from .texture_exporter import TextureExporter
+        texture_exporter = TextureExporter(ctx)
+    return texture_exporter
+
 
+def texture_callback(ctx: qrd.CaptureContext, data):
     if ctx is None:
         print("[TextureExporter] Error: captureCtx is None")
         return
 
-    if texture_exporter.get_open_directory() is None:
+    exporter = _get_texture_exporter(ctx)
+    if exporter.get_open_directory() is None:
         return
 
-    ctx.Replay().AsyncInvoke("", texture_exporter.save_current_draw_textures)
+    ctx.Replay().AsyncInvoke("", exporter.save_current_draw_textures)
 
 
-def all_texture_callback(ctx: qrd.CaptureContext, data):
+def all_texture_callback(ctx: qrd.CaptureContext, data, dedup: bool = False, selection=None,
+                         archive: bool = False, format_policy=None):
+    """
+    :param selection:     utils.SubresourceSelection，None 表示默认子资源
+    :param archive:       导出为单个 .zip 归档
+    :param format_policy: export_format.ExportFormatPolicy，None 表示以往的 TGA / 单精度 EXR
+    """
+    import subprocess
+    from .export_progress_window import ExportProgressWindow
+    from .utils import TextureSaver, export_archive_path, get_filename_without_extension
+
     open_dir = ctx.Extensions().OpenDirectoryName(
         "选择导出目录", os.path.expanduser("~/Pictures")
     )
     if not open_dir:
         return
 
+    # 进度窗口在 UI 线程创建，导出在 Replay 线程推进进度，点击取消后在下一个子资源前停止
+    progress_window = ExportProgressWindow(ctx, "Export All Texture")
+    progress = progress_window.progress
+
     def do_export(controller):
         name = get_filename_without_extension(ctx.GetCaptureFilename())
-        count = TextureSaver.export_all_textures(ctx, controller, open_dir, name)
-        export_path = os.path.join(open_dir, name)
+        try:
+            count = TextureSaver.export_all_textures(ctx, controller, open_dir, name,
+                                                     dedup=dedup, hardlink=dedup, selection=selection,
+                                                     progress=progress, archive=archive,
+                                                     format_policy=format_policy)
+        finally:
+            progress_window.close()
+        export_path = export_archive_path(open_dir, name) if archive else os.path.join(open_dir, name)
+        if progress.cancelled:
+            print(f"[TextureExporter] 导出已取消 — 已导出 {count} 张纹理 -> {export_path}")
+            return
         # 不在 Replay 线程调用 MessageDialog（会死锁），改用 print 输出日志
         print(f"[TextureExporter] 导出完成 — 共 {count} 张纹理 -> {export_path}")
-        # 打开导出目录（非阻塞）
-        subprocess.Popen(f'explorer "{os.path.normpath(export_path)}"')
+        # 打开导出目录，归档导出时在资源管理器中选中归档文件（非阻塞）
+        if archive:
+            subprocess.Popen(f'explorer /select,"{os.path.normpath(export_path)}"')
+        else:
+            subprocess.Popen(f'explorer "{os.path.normpath(export_path)}"')
 
     ctx.Replay().AsyncInvoke("", do_export)
 
 
+def all_texture_dedup_callback(ctx: qrd.CaptureContext, data):
+    all_texture_callback(ctx, data, dedup=True)
+
+
+def all_texture_archive_callback(ctx: qrd.CaptureContext, data):
+    """导出为单个 .zip 归档，并按内容去重：相同内容的纹理在归档中只存一份，其余只记录在清单中"""
+    all_texture_callback(ctx, data, dedup=True, archive=True)
+
+
+def all_texture_compressed_callback(ctx: qrd.CaptureContext, data):
+    from .export_format import ExportFormatPolicy
+    # PNG（大纹理使用更快的压缩级别）/ BC 原样 DDS / 半精度 EXR，文件更小，浮点纹理精度降为半精度
+    all_texture_callback(ctx, data, format_policy=ExportFormatPolicy())
+
+
+def all_texture_subresources_callback(ctx: qrd.CaptureContext, data):
+    from .utils import SubresourceSelection
+    # 完整 mip 链 + 全部切片 + 全部 MSAA 采样，用于纹理流送预算分析
+    selection = SubresourceSelection(all_mips=True, all_slices=True, all_depth=True, all_samples=True)
+    all_texture_callback(ctx, data, selection=selection)
+
+
+def statistics_window_callback(ctx: qrd.CaptureContext, data):
+    from .drawcall_statistics import window_callback
+    window_callback(ctx, data)
+
+
 def test_callback(ctx: qrd.CaptureContext, data):
+    from .test.test import TestClass
     test = TestClass(ctx)
     test.test_example()
 
@@ -84,9 +141,44 @@ def reload_plugin_callback(ctx: qrd.CaptureContext, data):
         print("插件重载完成 LcL-RenderdocTextureExporter")
 
 
+class CaptureCacheInvalidator(qrd.CaptureViewer):
+    """
+    capture 关闭时丢弃按 capture 缓存的纹理使用表与绑定快照。
+    注册扩展时即添加，不依赖统计窗口是否打开；缓存所在模块未导入时没有缓存，也不触发导入。
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    def OnCaptureLoaded(self):
+        pass
+
+    def OnCaptureClosed(self):
+        utils = sys.modules.get(__name__ + ".utils")
+        if utils is not None:
+            utils.TextureUsageTable.invalidate()
+        binding_cache = sys.modules.get(__name__ + ".binding_cache")
+        if binding_cache is not None:
+            binding_cache.BindingCache.invalidate()
+
+    def OnSelectedEventChanged(self, event):
+        pass
+
+    def OnEventChanged(self, event):
+        pass
+
+
+# register 时创建，unregister 时移除
+_cache_invalidator = None
+_register_ctx = None
+
+
 def register(version: str, ctx: qrd.CaptureContext):
-    global texture_exporter
-    texture_exporter = TextureExporter(ctx)
+    global _cache_invalidator, _register_ctx
+    # capture 关闭时丢弃各导出功能共享的缓存
+    _register_ctx = ctx
+    _cache_invalidator = CaptureCacheInvalidator()
+    ctx.AddCaptureViewer(_cache_invalidator)
 
     # 注册重载插件到事件菜单栏
     ctx.Extensions().RegisterPanelMenu(
@@ -104,12 +196,33 @@ def register(version: str, ctx: qrd.CaptureContext):
     ctx.Extensions().RegisterPanelMenu(
         qrd.PanelMenu.TextureViewer, ["Export All Texture"], all_texture_callback
     )
+    ctx.Extensions().RegisterPanelMenu(
+        qrd.PanelMenu.TextureViewer, ["Export All Texture (PNG / DDS / Half EXR)"], all_texture_compressed_callback
+    )
+    ctx.Extensions().RegisterPanelMenu(
+        qrd.PanelMenu.TextureViewer, ["Export All Texture (Dedup)"], all_texture_dedup_callback
+    )
+    ctx.Extensions().RegisterPanelMenu(
+        qrd.PanelMenu.TextureViewer, ["Export All Texture (All Mips && Slices)"], all_texture_subresources_callback
+    )
+    ctx.Extensions().RegisterPanelMenu(
+        qrd.PanelMenu.TextureViewer, ["Export All Texture (Zip Archive, Dedup)"], all_texture_archive_callback
+    )
 
     # 注册窗口菜单项
     ctx.Extensions().RegisterWindowMenu(
-        qrd.WindowMenu.Window, ["DrawCall Statistics"], window_callback
+        qrd.WindowMenu.Window, ["DrawCall Statistics"], statistics_window_callback
     )
 
 
 def unregister():
-    print("Unregistering LcL Texture Exporter extension")
\ No newline at end of file
+    global _cache_invalidator, _register_ctx
+    print("Unregistering LcL Texture Exporter extension")
+    if _cache_invalidator is not None:
+        _register_ctx.RemoveCaptureViewer(_cache_invalidator)
+        _cache_invalidator = None
+        _register_ctx = None
+    # 统计窗口模块只有打开过窗口才会被导入
+    statistics = sys.modules.get(__name__ + ".drawcall_statistics")
+    if statistics is not None:
+        statistics.unregister()
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+命令行批量导出：不依赖 qrenderdoc，直接用 renderdoc 模块的 OpenCaptureFile/OpenCapture 回放，
+对目录中的每个 .rdc 执行 Export All Texture 与 DrawCall 统计，多个 capture 之间用进程池并行。
+
+    python batch_export.py <capture 或目录>... -o <导出目录> [-j 进程数] [--dedup] [--full] [--archive]
+                            [--tga] [--png-level 0-9]
+
+renderdoc 模块（renderdoc.pyd / renderdoc.so 及其动态库）需要在 PYTHONPATH 中，
+或通过环境变量 RENDERDOC_PYTHON_PATH 指定所在目录。
+"""
+import os
+import sys
+
+PACKAGE_NAME = "lcl_texture_exporter"
+
+if not __package__:
+    # 作为脚本运行时，把插件目录注册为合成包，使相对导入可用且不执行依赖 qrenderdoc 的 __init__.py。
+    # 放在模块顶层，进程池以 spawn 方式重新导入本脚本时同样生效。
+    import types
+
+    if PACKAGE_NAME not in sys.modules:
+        _package = types.ModuleType(PACKAGE_NAME)
+        _package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+        sys.modules[PACKAGE_NAME] = _package
+    if os.environ.get("RENDERDOC_PYTHON_PATH"):
+        sys.path.insert(0, os.environ["RENDERDOC_PYTHON_PATH"])
+    __package__ = PACKAGE_NAME
+
+import argparse
+import json
+import multiprocessing
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+import renderdoc as rd
+
+from . import profiling
+from .export_format import ExportFormatPolicy
+from .utils import ControllerDataStats, TextureSaver, TextureUsageTable, get_filename_without_extension
+
+
+class HeadlessCaptureContext:
+    """
+    无界面环境下 qrenderdoc.CaptureContext 的替代品，只提供导出与统计用到的查询接口。
+    纹理与资源描述在打开 capture 时一次性从 controller 取出并建立索引。
+    """
+
+    def __init__(self, controller, capture_path: str):
+        self._capture_path = capture_path
+        self._textures = {tex.resourceId: tex for tex in controller.GetTextures()}
+        self._resources = {res.resourceId: res for res in controller.GetResources()}
+
+    def GetCaptureFilename(self) -> str:
+        return self._capture_path
+
+    def GetTexture(self, resource_id) -> Optional[rd.TextureDescription]:
+        return self._textures.get(resource_id)
+
+    def GetResource(self, resource_id) -> Optional[rd.ResourceDescription]:
+        return self._resources.get(resource_id)
+
+
+_replay_initialised = False
+
+
+def _result_ok(result) -> bool:
+    # 新版本返回 ResultDetails，旧版本返回 ReplayStatus 枚举
+    if hasattr(result, "OK"):
+        return result.OK()
+    return result == rd.ReplayStatus.Succeeded
+
+
+def open_replay_capture(capture_path: str):
+    """
+    用本地回放打开 capture。
+    :return: (ReplayController, close 回调)
+    """
+    global _replay_initialised
+    if not _replay_initialised:
+        rd.InitialiseReplay(rd.GlobalEnvironment(), [])
+        _replay_initialised = True
+
+    cap = rd.OpenCaptureFile()
+    result = cap.OpenFile(capture_path, "", None)
+    if not _result_ok(result):
+        cap.Shutdown()
+        raise RuntimeError(f"无法打开 capture: {result}")
+    if not cap.LocalReplaySupport():
+        cap.Shutdown()
+        raise RuntimeError("该 capture 不支持本地回放")
+    result, controller = cap.OpenCapture(rd.ReplayOptions(), None)
+    if not _result_ok(result):
+        cap.Shutdown()
+        raise RuntimeError(f"无法回放 capture: {result}")
+
+    def close():
+        controller.Shutdown()
+        cap.Shutdown()
+
+    return controller, close
+
+
+def stats_report(stats: ControllerDataStats, top_n: int = 10) -> dict:
+    """整帧范围的统计摘要，字段与统计窗口显示的内容一致"""
+    action_ids = sorted(stats.actionid_action_map.keys())
+    if not action_ids:
+        return {"actions": 0}
+    start, end = action_ids[0], action_ids[-1]
+    return {
+        "actions": len(action_ids),
+        "passes": len(stats.pass_index),
+        "meshNum": stats.get_meshnum_in_range_by_actionid(start, end),
+        "inputTextures": len(stats.get_inputs_in_range_by_actionid(start, end)),
+        "outputTextures": len(stats.get_outputs_in_range_by_actionid(start, end)),
+        "inputTextureBytes": stats.count_texture_memory_in_range_by_actionid(start, end)[0],
+        "outputTextureBytes": stats.count_texture_memory_in_range_by_actionid(start, end, isOutput=True)[0],
+        "topActions": [
+            {"actionId": action_id, "meshNum": meshnum}
+            for meshnum, action_id in stats.get_top_n_actions_by_meshnum(top_n, start, end)
+        ],
+        "inputResolutions": [
+            {"width": w, "height": h, "count": count}
+            for (w, h), count in stats.count_texture_resolutions_in_range_by_actionid(start, end)
+        ],
+    }
+
+
+def format_policy(options: dict) -> ExportFormatPolicy:
+    """按命令行选项构造导出格式策略"""
+    if options.get("tga"):
+        return ExportFormatPolicy.legacy()
+    level = options.get("png_level")
+    if level is None:
+        return ExportFormatPolicy()
+    return ExportFormatPolicy(png_level=level, large_png_level=level)
+
+
+def process_capture(capture_path: str, out_dir: str, options: dict,
+                    open_capture: Callable = open_replay_capture) -> dict:
+    """
+    处理单个 capture：导出纹理并写出统计报告 <name>/stats.json。
+    :param options: {"export": bool, "stats": bool, "dedup": bool, "incremental": bool, "archive": bool,
+                     "tga": bool, "png_level": int, "profile": bool, "cprofile": bool}
+    :return: 该 capture 的结果摘要，出错时包含 error 字段而不抛出
+    """
+    name = get_filename_without_extension(capture_path)
+    result = {"capture": capture_path, "name": name}
+    begin = time.perf_counter()
+    close = None
+    if options.get("profile"):
+        # 进程池 worker 不继承父进程的模块状态，每个 capture 开始时按选项设置；报告写到该 capture 的导出目录
+        profiling.enable(os.path.join(out_dir, name), use_cprofile=options.get("cprofile", False))
+    try:
+        controller, close = open_capture(capture_path)
+        ctx = HeadlessCaptureContext(controller, capture_path)
+        if options.get("stats", True):
+            stats = ControllerDataStats(controller, ctx)
+            report = stats_report(stats)
+            os.makedirs(os.path.join(out_dir, name), exist_ok=True)
+            with open(os.path.join(out_dir, name, "stats.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=1)
+            result["stats"] = {k: v for k, v in report.items() if not isinstance(v, list)}
+        if options.get("export", True):
+            result["textures"] = TextureSaver.export_all_textures(
+                ctx, controller, out_dir, name,
+                dedup=options.get("dedup", False),
+                hardlink=options.get("dedup", False),
+                incremental=options.get("incremental", True),
+                archive=options.get("archive", False),
+                format_policy=format_policy(options),
+            )
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        TextureUsageTable.invalidate()
+        if close is not None:
+            close()
+    result["seconds"] = round(time.perf_counter() - begin, 3)
+    return result
+
+
+# 进程池 worker 的全局状态，由 _init_worker 设置
+_worker_open_capture: Callable = open_replay_capture
+
+
+def _init_worker(open_capture: Callable):
+    global _worker_open_capture
+    _worker_open_capture = open_capture
+
+
+def _process_in_worker(args) -> dict:
+    capture_path, out_dir, options = args
+    return process_capture(capture_path, out_dir, options, _worker_open_capture)
+
+
+def find_captures(inputs: List[str]) -> List[str]:
+    """展开输入中的目录，递归收集 .rdc 文件"""
+    captures = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                captures.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(".rdc"))
+        elif os.path.isfile(path):
+            captures.append(path)
+    return captures
+
+
+def run_batch(captures: List[str], out_dir: str, jobs: int = 0, options: Optional[Dict] = None,
+              open_capture: Callable = open_replay_capture) -> List[dict]:
+    """
+    批量处理多个 capture。
+    :param jobs:         进程数，0 表示 CPU 核数，1 表示在当前进程内串行处理
+    :param open_capture: 打开 capture 的函数 (path) -> (controller, close)，必须可被 pickle（模块级函数），
+                         测试时可替换为伪造的回放控制器
+    :return: 每个 capture 的结果摘要，顺序与输入一致
+    """
+    options = options or {}
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(captures)) or 1
+    tasks = [(path, out_dir, options) for path in captures]
+    if jobs == 1:
+        return [process_capture(path, out_dir, options, open_capture) for path in captures]
+
+    # 回放库不保证 fork 安全，统一使用 spawn；每个 capture 的回放开销远大于进程启动
+    mp_ctx = multiprocessing.get_context("spawn")
+    with mp_ctx.Pool(jobs, initializer=_init_worker, initargs=(open_capture,), maxtasksperchild=8) as pool:
+        return pool.map(_process_in_worker, tasks, chunksize=1)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="批量导出 RenderDoc capture 的纹理与 DrawCall 统计")
+    parser.add_argument("inputs", nargs="+", help=".rdc 文件或包含 .rdc 的目录")
+    parser.add_argument("-o", "--output", required=True, help="导出根目录，每个 capture 一个子目录")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="并行进程数，默认等于 CPU 核数")
+    parser.add_argument("--dedup", action="store_true", help="按内容去重纹理并创建硬链接")
+    parser.add_argument("--full", action="store_true", help="忽略上次导出清单，全部重写")
+    parser.add_argument("--archive", action="store_true", help="每个 capture 的纹理写入一个 <name>.zip 归档")
+    parser.add_argument("--tga", action="store_true", help="使用以往的未压缩 TGA / 单精度 EXR 输出")
+    parser.add_argument("--png-level", type=int, choices=range(10), metavar="0-9",
+                        help="PNG 压缩级别，默认小纹理 6、大纹理 1")
+    parser.add_argument("--no-export", action="store_true", help="只生成统计报告")
+    parser.add_argument("--no-stats", action="store_true", help="只导出纹理")
+    parser.add_argument("--profile", action="store_true",
+                        help="为每个 capture 的统计与导出写出 lcl_profile_*.json 耗时报告")
+    parser.add_argument("--cprofile", action="store_true", help="同 --profile，并额外输出 cProfile 数据")
+    args = parser.parse_args(argv)
+
+    captures = find_captures(args.inputs)
+    if not captures:
+        print("未找到 .rdc 文件")
+        return 1
+    options = {
+        "export": not args.no_export,
+        "stats": not args.no_stats,
+        "dedup": args.dedup,
+        "incremental": not args.full,
+        "archive": args.archive,
+        "tga": args.tga,
+        "png_level": args.png_level,
+        "profile": args.profile or args.cprofile,
+        "cprofile": args.cprofile,
+    }
+    begin = time.perf_counter()
+    results = run_batch(captures, args.output, args.jobs, options)
+    elapsed = time.perf_counter() - begin
+
+    os.makedirs(args.output, exist_ok=True)
+    with open(os.path.join(args.output, "batch_report.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+
+    failed = [r for r in results if "error" in r]
+    for r in failed:
+        print(f"[BatchExport] 失败: {r['capture']} — {r['error']}")
+    print(f"[BatchExport] 完成 {len(results) - len(failed)}/{len(results)} 个 capture，用时 {elapsed:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import renderdoc as rd
+
+from . import profiling, stats_cache
+
+# 默认最多缓存的事件快照数；一个快照只有几个资源 ID 与名称引用，数千个事件也只占几 MB
+DEFAULT_MAX_EVENTS = 8192
+# 默认最多缓存的 shader 反射名称表数
+DEFAULT_MAX_SHADERS = 1024
+
+# 所有可绑定资源的 shader 阶段；较旧的 RenderDoc 没有 Task / Mesh
+ALL_STAGES = tuple(
+    getattr(rd.ShaderStage, name)
+    for name in ("Vertex", "Hull", "Domain", "Geometry", "Pixel", "Compute", "Task", "Mesh")
+    if hasattr(rd.ShaderStage, name)
+)
+# Dispatch 只用到 Compute；DrawCall（含 Mesh Dispatch）只用到图形管线各阶段
+COMPUTE_STAGES = (rd.ShaderStage.Compute,)
+GRAPHICS_STAGES = tuple(stage for stage in ALL_STAGES if int(stage) != int(rd.ShaderStage.Compute))
+
+
+def stages_for_action(flags) -> tuple:
+    """
+    按 Action 类型选择绑定有效的 shader 阶段。
+    管线状态会保留上一次绑定的另一类 shader（Draw 时仍报告之前的 compute shader，Dispatch 时仍报告之前的 VS / PS），
+    不能只凭 GetShader 是否为空判断阶段是否参与该事件。
+    :param flags: rd.ActionFlags
+    :return: 非 DrawCall / Dispatch 的 Action 返回空元组
+    """
+    flags = int(flags)
+    if flags & int(getattr(rd.ActionFlags, "MeshDispatch", 0)) or flags & int(rd.ActionFlags.Drawcall):
+        return GRAPHICS_STAGES
+    if flags & int(rd.ActionFlags.Dispatch):
+        return COMPUTE_STAGES
+    return ()
+
+
+def _slots(names: tuple, resources: tuple):
+    for slot_idx, resource_id in enumerate(resources):
+        yield slot_idx, names[slot_idx] if slot_idx < len(names) else None, resource_id
+
+
+class ShaderNames:
+    """一个 shader 反射得到的资源变量名，枚举顺序与 GetReadOnlyResources / GetReadWriteResources 一致"""
+    __slots__ = ("readOnly", "readWrite")
+
+    def __init__(self, read_only: tuple = (), read_write: tuple = ()):
+        self.readOnly = read_only
+        self.readWrite = read_write
+
+
+class ShaderReflectionTable:
+    """
+    (shader ResourceId, 阶段, 入口点) -> ShaderNames 的 LRU 表，覆盖所有阶段的只读与读写资源。
+    Vulkan / D3D12 上一个 SPIR-V / DXIL 模块可以同时用于多个阶段或多个入口点，各自的资源列表不同，
+    因此不能只按 shader ResourceId 缓存。
+    上千个 DrawCall 通常只用到少数几个 shader，每个 shader 入口只调用一次 GetShaderReflection。
+    """
+
+    def __init__(self, max_shaders: int = DEFAULT_MAX_SHADERS):
+        self.max_shaders = max_shaders
+        self._names: "OrderedDict[tuple, ShaderNames]" = OrderedDict()
+        self.lookups = 0    # 实际调用 GetShaderReflection 的次数
+
+    def __len__(self):
+        return len(self._names)
+
+    def clear(self):
+        self._names.clear()
+
+    def names(self, state: rd.PipeState, stage, shader: int) -> ShaderNames:
+        """
+        :param state:  shader 绑定在 stage 上的管线状态，未缓存时从中取反射
+        :param shader: int(state.GetShader(stage))
+        """
+        # 较旧的 RenderDoc 没有 GetShaderEntryPoint，此时一个模块只对应一个入口
+        entry_point = state.GetShaderEntryPoint(stage) if hasattr(state, "GetShaderEntryPoint") else ""
+        key = (shader, int(stage), entry_point)
+        names = self._names.get(key)
+        if names is not None:
+            self._names.move_to_end(key)
+            return names
+        self.lookups += 1
+        with profiling.timer("replay.GetShaderReflection"):
+            refl: rd.ShaderReflection = state.GetShaderReflection(stage)
+        if refl is None:
+            names = ShaderNames()
+        else:
+            names = ShaderNames(tuple(res.name for res in refl.readOnlyResources),
+                                tuple(res.name for res in refl.readWriteResources))
+        self._names[key] = names
+        while len(self._names) > self.max_shaders:
+            self._names.popitem(last=False)
+        return names
+
+
+class StageBindings:
+    """
+    一个 shader 阶段在某个事件绑定的资源，names / resources 为只读资源，
+    rwNames / rwResources 为读写资源（UAV / storage image），变量名与资源按 slot 顺序一一对应
+    """
+    __slots__ = ("stage", "shader", "names", "resources", "rwNames", "rwResources")
+
+    def __init__(self, stage, shader: int, names: ShaderNames, resources: tuple, rw_resources: tuple = ()):
+        self.stage = stage
+        self.shader = shader                # int(shader ResourceId)
+        self.names = names.readOnly         # 反射得到的变量名，反射缺失时为空元组
+        self.resources = resources          # rd.ResourceId
+        self.rwNames = names.readWrite
+        self.rwResources = rw_resources
+
+    def __iter__(self):
+        """按 slot 顺序产生只读资源的 (slot_idx, 变量名或 None, ResourceId)"""
+        return _slots(self.names, self.resources)
+
+    def read_write(self):
+        """按 slot 顺序产生读写资源的 (slot_idx, 变量名或 None, ResourceId)"""
+        return _slots(self.rwNames, self.rwResources)
+
+
+class BindingSnapshot:
+    """某个事件的绑定快照，只包含查询过且绑定了 shader 的阶段"""
+    __slots__ = ("eventId", "stages", "queried")
+
+    def __init__(self, event_id: int, stages: Dict[int, StageBindings], queried: frozenset = frozenset()):
+        self.eventId = event_id
+        self.stages = stages
+        self.queried = queried      # 查询过的阶段 int(stage)，包括没有绑定 shader 的阶段
+
+    def get(self, stage) -> Optional[StageBindings]:
+        return self.stages.get(int(stage))
+
+
+class BindingCache:
+    """
+    事件绑定快照的 LRU 缓存：eventId -> 各阶段绑定的资源 ID 与变量名。
+    未命中时才 SetFrameEvent + GetPipelineState + GetReadOnlyResources / GetReadWriteResources 驱动回放，
+    反射得到的变量名按 shader ResourceId 缓存在 ShaderReflectionTable，使用同一 shader 的事件只取一次反射。
+    两个表都按条目数限制大小，超出时淘汰最久未使用的条目。
+    同一 capture 内由各导出功能共享，按 capture 文件标识区分，capture 关闭时丢弃（见 get / invalidate）。
+    """
+
+    _cached_key = None
+    _cached_cache: Optional["BindingCache"] = None
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS, max_shaders: int = DEFAULT_MAX_SHADERS,
+                 stages: Iterable = ALL_STAGES):
+        """
+        :param max_events:  最多缓存的事件快照数
+        :param max_shaders: 最多缓存的 shader 反射名称表数
+        :param stages:      快照包含的 shader 阶段，默认所有阶段
+        """
+        self.max_events = max_events
+        self.stages = tuple(stages)
+        self._events: "OrderedDict[int, BindingSnapshot]" = OrderedDict()
+        self.reflections = ShaderReflectionTable(max_shaders)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get(cls, capture_ctx, controller) -> "BindingCache":
+        """获取当前 capture 的绑定缓存，首次调用时创建"""
+        key = stats_cache.capture_identity(capture_ctx.GetCaptureFilename())
+        if cls._cached_cache is None or cls._cached_key != key:
+            cls._cached_cache = cls()
+            cls._cached_key = key
+        return cls._cached_cache
+
+    @classmethod
+    def invalidate(cls):
+        """capture 关闭时丢弃缓存（由扩展注册的 CaptureViewer 调用）"""
+        cls._cached_key = None
+        cls._cached_cache = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def __contains__(self, event_id) -> bool:
+        return int(event_id) in self._events
+
+    def clear(self):
+        self._events.clear()
+        self.reflections.clear()
+
+    def snapshot(self, controller, event_id: int, seek: bool = True, stages: Optional[Iterable] = None) -> BindingSnapshot:
+        """
+        获取 event_id 的绑定快照；必须在 Replay 线程调用。
+        :param seek:   未命中时是否先 SetFrameEvent 到该事件；回放已经停在该事件时传 False。
+                       多个事件应按 eventId 升序查询，未命中时回放只向前推进
+        :param stages: 快照包含的阶段，通常为 stages_for_action(action.flags)；None 时为构造时指定的阶段。
+                       缓存的快照未查询过其中某个阶段时视为未命中
+        """
+        event_id = int(event_id)
+        stages = self.stages if stages is None else tuple(stages)
+        queried = frozenset(int(stage) for stage in stages)
+        snapshot = self._events.get(event_id)
+        if snapshot is not None and queried <= snapshot.queried:
+            self._events.move_to_end(event_id)
+            self.hits += 1
+            profiling.count("bindings.hits")
+            return snapshot
+
+        self.misses += 1
+        profiling.count("bindings.misses")
+        if seek:
+            with profiling.timer("replay.SetFrameEvent"):
+                controller.SetFrameEvent(event_id, False)
+        with profiling.timer("replay.GetPipelineState"):
+            state: rd.PipeState = controller.GetPipelineState()
+        bound = {}
+        for stage in stages:
+            bindings = self._stage_bindings(state, stage)
+            if bindings is not None:
+                bound[int(stage)] = bindings
+        snapshot = BindingSnapshot(event_id, bound, queried)
+
+        self._events[event_id] = snapshot
+        while len(self._events) > self.max_events:
+            self._events.popitem(last=False)
+        return snapshot
+
+    def _stage_bindings(self, state: rd.PipeState, stage) -> Optional[StageBindings]:
+        with profiling.timer("replay.GetShader"):
+            shader = state.GetShader(stage)
+        if shader == rd.ResourceId.Null():
+            return None
+        with profiling.timer("replay.GetReadOnlyResources"):
+            used_descriptor_list: List[rd.UsedDescriptor] = state.GetReadOnlyResources(stage)
+        with profiling.timer("replay.GetReadWriteResources"):
+            rw_descriptor_list: List[rd.UsedDescriptor] = state.GetReadWriteResources(stage)
+        resources = tuple(used_descriptor.descriptor.resource for used_descriptor in used_descriptor_list)
+        rw_resources = tuple(used_descriptor.descriptor.resource for used_descriptor in rw_descriptor_list)
+        names = self.reflections.names(state, stage, int(shader))
+        return StageBindings(stage, int(shader), names, resources, rw_resources)
@@ -1,10 +1,76 @@
 import qrenderdoc as qrd
 import renderdoc as rd
 import os
-from typing import Optional
+import threading
+from typing import Callable, Optional
 import renderdoc
-from .utils import ControllerDataStats,TextureSaver, get_filename_without_extension
+from . import profiling
+from .utils import ControllerDataStats, format_bytes, get_filename_without_extension
 ActionRange = (0, 10000) 
+
+# 输入停止变化多久后才开始统计（秒），连续输入 ActionID 时只统计最后一次
+RANGE_DEBOUNCE_SECONDS = 0.25
+# 没有加载 capture（已关闭、新 capture 尚未统计完成）时的提示
+NO_CAPTURE_MESSAGE = "未加载 capture，无法统计 / 导出"
+
+
+class StatisticsCancelled(Exception):
+    """统计被更新的范围取代"""
+
+
+def format_range_statistics(stats: ControllerDataStats, start, end,
+                            is_cancelled: Optional[Callable[[], bool]] = None) -> str:
+    """
+    生成范围统计文本，不访问任何 UI 对象，可在后台线程调用。
+    :param is_cancelled: 每段统计之间检查一次，返回 True 时抛出 StatisticsCancelled
+    """
+    def check():
+        if is_cancelled is not None and is_cancelled():
+            raise StatisticsCancelled()
+
+    with profiling.timer("range.meshnum_textures"):
+        mesh_num = stats.get_meshnum_in_range_by_actionid(start, end)
+        texture_num = len(stats.get_inputs_in_range_by_actionid(start, end))
+    msg = f"总面数: {mesh_num}     纹理数: {texture_num}     Drawcall数: {end-start+1}\n"
+    check()
+
+    # 添加面数统计信息
+    with profiling.timer("range.top_n"):
+        mesh_actions = stats.get_top_n_actions_by_meshnum(10, start, end)
+    if mesh_actions:
+        msg += f"\n排行前{10}的Action列表:\n"
+        for meshnum, action_id in mesh_actions:
+            msg += f"   ActionID: {action_id}, 面数: {meshnum}\n"
+    check()
+
+    # 添加纹理分辨率统计
+    with profiling.timer("range.resolutions"):
+        texture_resolutions = stats.count_texture_resolutions_in_range_by_actionid(start, end)
+    msg += "\n纹理分辨率统计:\n"
+    for res, count in texture_resolutions:
+        msg += f"   {res}: {count}张\n"
+    check()
+
+    # 添加纹理内存统计
+    with profiling.timer("range.memory"):
+        input_bytes, input_formats = stats.count_texture_memory_in_range_by_actionid(start, end)
+        output_bytes, _ = stats.count_texture_memory_in_range_by_actionid(start, end, isOutput=True)
+    msg += f"\n纹理内存: 输入 {format_bytes(input_bytes)}     渲染目标 {format_bytes(output_bytes)}\n"
+    for format_name, count, size in input_formats:
+        msg += f"   {format_name}: {count}张, {format_bytes(size)}\n"
+    check()
+
+    # 添加 Pass 统计（按输出目标切分）
+    with profiling.timer("range.passes"):
+        passes = stats.get_passes_in_range_by_actionid(start, end)
+    if passes:
+        msg += f"\nPass数: {len(passes)}，面数最多的Pass:\n"
+        for render_pass in sorted(passes, key=lambda p: p.meshNum, reverse=True)[:10]:
+            targets = ", ".join(str(int(tex.resourceId)) for tex in render_pass.targets) or "-"
+            msg += (f"   Pass#{render_pass.index} ActionID {render_pass.startActionId}-{render_pass.endActionId}"
+                    f" RT[{targets}]: 面数 {render_pass.meshNum:.0f}, Drawcall {render_pass.drawcalls},"
+                    f" 纹理 {render_pass.inputTextures}张 {format_bytes(render_pass.inputBytes)}\n")
+    return msg
     
     
 class DrawcallStatisticsWindow(qrd.CaptureViewer):
@@ -16,6 +82,11 @@ class DrawcallStatisticsWindow(qrd.CaptureViewer):
 
         self.ctx = ctx
         self.version = version
+        self.stats: Optional[ControllerDataStats] = None
+        # 范围统计的防抖计时器与代数，见 on_range_changed
+        self._range_lock = threading.Lock()
+        self._range_generation = 0
+        self._range_timer: Optional[threading.Timer] = None
         self.topWindow = self.mqt.CreateToplevelWidget(
             "Breadcrumbs", lambda c, w, d: window_closed()
         )
@@ -44,8 +115,12 @@ class DrawcallStatisticsWindow(qrd.CaptureViewer):
 
 
         self.show_texture_button = self.mqt.CreateButton(self.on_export_images_clicked)
-        self.mqt.SetWidgetText(self.show_texture_button, "Export All Texture")
+        self.mqt.SetWidgetText(self.show_texture_button, "Export Range Textures (Per Draw)")
         self.mqt.AddWidget(self.vert, self.show_texture_button)
+
+        self.snapshot_button = self.mqt.CreateButton(self.on_export_snapshots_clicked)
+        self.mqt.SetWidgetText(self.snapshot_button, "Export Render Target Snapshots")
+        self.mqt.AddWidget(self.vert, self.snapshot_button)
         
         ctx.AddCaptureViewer(self)
         
@@ -68,50 +143,109 @@ class DrawcallStatisticsWindow(qrd.CaptureViewer):
         self.stats = ControllerDataStats(controller,self.ctx)
 
     def on_range_changed(self, *args, **kwargs):
+        """
+        输入变化时只重置防抖计时器，统计在后台线程完成后再回到 UI 线程显示。
+        每次变化递增代数，旧代数的计时器与进行中的统计都会被放弃。
+        """
+        if self.stats is None:
+            self._cancel_range_statistics()
+            self.mqt.SetWidgetText(self.breadcrumbs, NO_CAPTURE_MESSAGE)
+            return
         start, end = self.get_action_range()
-        self.update_range_statistics(start, end)
+        with self._range_lock:
+            self._range_generation += 1
+            generation = self._range_generation
+            if self._range_timer is not None:
+                self._range_timer.cancel()
+            self._range_timer = threading.Timer(RANGE_DEBOUNCE_SECONDS, self._compute_range_statistics,
+                                                (generation, start, end))
+            self._range_timer.daemon = True
+            self._range_timer.start()
+
+    def _cancel_range_statistics(self):
+        with self._range_lock:
+            self._range_generation += 1
+            if self._range_timer is not None:
+                self._range_timer.cancel()
+                self._range_timer = None
+
+    def _compute_range_statistics(self, generation, start, end):
+        """防抖计时器线程中执行"""
+        stats = self.stats
+        if stats is None:
+            self.mqt.InvokeOntoUIThread(lambda: self._show_range_statistics(generation, NO_CAPTURE_MESSAGE))
+            return
+        is_stale = lambda: generation != self._range_generation
+        try:
+            # 计时器线程不开启 profiling.run，避免与 Replay 线程上正在进行的导出争用同一份报告
+            with profiling.timer("range.statistics"):
+                msg = format_range_statistics(stats, start, end, is_stale)
+        except StatisticsCancelled:
+            return
+        if not is_stale():
+            self.mqt.InvokeOntoUIThread(lambda: self._show_range_statistics(generation, msg))
 
-    def update_range_statistics(self, start, end):
-        mesh_num = self.stats.get_meshnum_in_range_by_actionid(start, end)
-        texture_num = len(self.stats.get_inputs_in_range_by_actionid(start, end))
-        msg = f"总面数: {mesh_num}     纹理数: {texture_num}     Drawcall数: {end-start+1}\n"
-        
-        # 添加面数统计信息
-        # 获取面数超过1000的action列表
-        mesh_actions = self.stats.get_top_n_actions_by_meshnum(10, start, end)
-        if mesh_actions:
-            msg += f"\n排行前{10}的Action列表:\n"
-            for meshnum, action_id in mesh_actions:
-                msg += f"   ActionID: {action_id}, 面数: {meshnum}\n"
-        
-        # 添加纹理分辨率统计
-        texture_resolutions = self.stats.count_texture_resolutions_in_range_by_actionid(start, end)
-        msg += "\n纹理分辨率统计:\n"
-        for res, count in texture_resolutions:
-            msg += f"   {res}: {count}张\n"
-        self.mqt.SetWidgetText(self.breadcrumbs, msg)
+    def _show_range_statistics(self, generation, msg):
+        # 回到 UI 线程时可能已有更新的范围，只显示最新一次的结果
+        if generation == self._range_generation:
+            self.mqt.SetWidgetText(self.breadcrumbs, msg)
 
     def on_export_images_clicked(self, *args, **kwargs):
+        """
+        按 DrawCall / Dispatch 导出范围内每个事件所有阶段的输入纹理：一次回放从前往后走完整个范围，
+        每张纹理只写一次，各 Draw 的绑定见导出目录下的 events/ 与 range_manifest.json
+        """
+        self._export_range("Export Range Textures", "",
+                           lambda exporter, controller, event_ids, folder_path, progress:
+                           exporter.save_range_textures(controller, event_ids, folder_path, progress))
+
+    def on_export_snapshots_clicked(self, *args, **kwargs):
+        """导出范围内每个 DrawCall 执行后的渲染目标快照，内容未变化的目标不重复写出"""
+        stats = self.stats
+
+        def export(exporter, controller, event_ids, folder_path, progress):
+            actions = [stats.get_action_by_eventid(event_id) for event_id in event_ids]
+            return exporter.save_range_target_snapshots(controller, actions, folder_path, progress)
+        self._export_range("Export Render Target Snapshots", "_rt", export)
+
+    def _export_range(self, title: str, folder_suffix: str, export: Callable):
+        """
+        选择目录后在 Replay 线程对范围内的 DrawCall / Dispatch 执行 export(exporter, controller, event_ids, folder_path, progress)，
+        导出到 <目录>/<capture>_<start>_<end><folder_suffix>
+        """
+        import subprocess
+        from .export_progress_window import ExportProgressWindow
+        from .texture_exporter import TextureExporter
+
+        if self.stats is None:
+            self.ctx.Extensions().MessageDialog(NO_CAPTURE_MESSAGE, title)
+            return
         start, end = self.get_action_range()
-        textures = self.stats.get_inputs_in_range_by_actionid(start, end)
-        if not textures:
-            self.ctx.Extensions().MessageDialog("未找到可导出的纹理", "导出纹理")
+        event_ids = self.stats.get_event_ids_in_range_by_actionid(
+            start, end, rd.ActionFlags.Drawcall | rd.ActionFlags.Dispatch)
+        if not event_ids:
+            self.ctx.Extensions().MessageDialog("范围内没有 DrawCall / Dispatch", "导出纹理")
             return
 
         open_dir = self.ctx.Extensions().OpenDirectoryName("选择导出目录", os.path.expanduser("~/Pictures"))
         if not open_dir:
             return
 
-        TextureSaver.open_directory = open_dir  # 设置全局变量
+        name = get_filename_without_extension(self.ctx.GetCaptureFilename())
+        folder_path = os.path.join(open_dir, f"{name}_{start}_{end}{folder_suffix}")
+        progress_window = ExportProgressWindow(self.ctx, title)
+        progress = progress_window.progress
+        exporter = TextureExporter(self.ctx)
+
         def do_export(controller):
-            name = self.ctx.GetCaptureFilename()
-            name = get_filename_without_extension(name)
-            folder_name = f"{name}_{start}_{end}"
-    
-            for tex in textures:
-                tex_id = tex.resourceId
-                TextureSaver.save_texture(self.ctx, controller, tex_id, folder_name, str(int(tex_id)))
-            self.ctx.Extensions().MessageDialog(f"导出完成，共导出 {len(textures)} 张纹理到：{TextureSaver.open_directory}", "导出纹理")
+            try:
+                count = export(exporter, controller, event_ids, folder_path, progress)
+            finally:
+                progress_window.close()
+            # 不在 Replay 线程调用 MessageDialog（会死锁），改用 print 输出日志
+            print(f"[TextureExporter] {title} 完成 — {len(event_ids)} 个 DrawCall / Dispatch，"
+                  f"共导出 {count} 项 -> {folder_path}")
+            subprocess.Popen(f'explorer "{os.path.normpath(folder_path)}"')
 
         self.ctx.Replay().AsyncInvoke("", do_export)
 
@@ -119,9 +253,13 @@ class DrawcallStatisticsWindow(qrd.CaptureViewer):
         
         
     def OnCaptureLoaded(self):
+        # 窗口保持停靠时重新打开 capture，为新 capture 重建统计
+        self.ctx.Replay().BlockInvoke(self._init_data)
         self.mqt.SetWidgetText(self.breadcrumbs, "Breadcrumbs:")
 
     def OnCaptureClosed(self):
+        self._cancel_range_statistics()
+        self.stats = None
         self.mqt.SetWidgetText(self.breadcrumbs, "Breadcrumbs:")
 
     def OnSelectedEventChanged(self, event):
@@ -154,6 +292,7 @@ def window_closed():
     global cur_window
 
     if cur_window is not None:
+        cur_window._cancel_range_statistics()
         cur_window.ctx.RemoveCaptureViewer(cur_window)
 
     cur_window = None
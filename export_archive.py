@@ -0,0 +1,178 @@
+import json
+import mmap
+import os
+import threading
+import time
+import zipfile
+from typing import List, Optional, Union
+
+from . import profiling
+from .export_manifest import MANIFEST_NAME
+
+ARCHIVE_SUFFIX = ".zip"
+# 归档写入缓冲区大小：多个子资源攒成一次大块写入，网络共享上尤其明显
+DEFAULT_BUFFER_SIZE = 16 * 1024 * 1024
+
+
+class _AppendOnlyFile:
+    """
+    只追加的文件包装。不支持 seek，zipfile 因此改用数据描述符记录 CRC 与大小，
+    写完一个条目后不再回头改写本地文件头，整个归档严格顺序写入，缓冲区不会被提前刷出。
+    """
+
+    def __init__(self, path: str, buffer_size: int):
+        self._file = open(path, "wb", buffering=buffer_size)
+
+    def write(self, data) -> int:
+        return self._file.write(data)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def seek(self, *args):
+        raise OSError("append-only")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class TextureArchiveWriter:
+    """
+    把导出的全部子资源写入一个不压缩的 zip（ZIP_STORED，超过 4GB 自动使用 Zip64），
+    代替成千上万个小文件。图片本身已经编码，再压缩收益很小；不压缩的条目可以按偏移直接读取。
+    写入先落到 <path>.tmp，close() 时再替换为正式文件，中途失败不会留下损坏的归档。
+    write() 可在多个线程调用，内部串行化。
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        :param path:        归档文件路径
+        :param buffer_size: 写入缓冲区大小
+        """
+        self.path = path
+        self._tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = _AppendOnlyFile(self._tmp_path, buffer_size)
+        self._zip = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._lock = threading.Lock()
+        self._sizes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, name: str, payload: bytes):
+        """
+        :param name:    归档内路径（以 / 分隔）
+        :param payload: 文件内容
+        """
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with self._lock:
+            with profiling.timer("archive.write"):
+                self._zip.writestr(info, payload)
+            self._sizes[name] = len(payload)
+
+    def write_file(self, name: str, path: str):
+        """把磁盘上的文件（例如 SaveTexture 的输出）写入归档"""
+        with open(path, "rb") as f:
+            self.write(name, f.read())
+
+    def size(self, name: str) -> Optional[int]:
+        """已写入条目的大小，未写入时返回 None"""
+        return self._sizes.get(name)
+
+    def close(self):
+        if self._zip is None:
+            return
+        with self._lock:
+            self._zip.close()
+            self._zip = None
+            self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+
+class TextureArchive:
+    """
+    读取 TextureArchiveWriter 写出的归档。默认用 mmap 映射整个文件，
+    read() 对不压缩的条目直接返回映射内存上的 memoryview，随机访问不产生拷贝。
+    返回的 memoryview 需在 close() 之前释放，否则 mmap 无法关闭。
+    """
+
+    def __init__(self, path: str, use_mmap: bool = True):
+        """
+        :param path:     归档文件路径
+        :param use_mmap: 是否内存映射；False 时 read() 通过 seek + read 返回 bytes
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        self._zip = zipfile.ZipFile(self._file)
+        self._entries = {info.filename: info for info in self._zip.infolist()}
+        self._data_offsets = {}
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def _data_offset(self, info: zipfile.ZipInfo) -> int:
+        offset = self._data_offsets.get(info.filename)
+        if offset is None:
+            # 本地文件头固定 30 字节，其后是文件名与扩展字段，长度以本地文件头为准
+            if self._map is not None:
+                header = self._map[info.header_offset:info.header_offset + 30]
+            else:
+                self._file.seek(info.header_offset)
+                header = self._file.read(30)
+            name_length = int.from_bytes(header[26:28], "little")
+            extra_length = int.from_bytes(header[28:30], "little")
+            offset = info.header_offset + 30 + name_length + extra_length
+            self._data_offsets[info.filename] = offset
+        return offset
+
+    def read(self, name: str) -> Union[memoryview, bytes]:
+        """读取条目内容；条目不存在时抛出 KeyError"""
+        info = self._entries[name]
+        if info.compress_type != zipfile.ZIP_STORED:
+            return self._zip.read(info)
+        offset = self._data_offset(info)
+        if self._map is not None:
+            return memoryview(self._map)[offset:offset + info.file_size]
+        self._file.seek(offset)
+        return self._file.read(info.file_size)
+
+    def manifest(self) -> Optional[dict]:
+        """归档内的 texture_manifest.json，不存在时返回 None"""
+        if MANIFEST_NAME not in self._entries:
+            return None
+        return json.loads(bytes(self.read(MANIFEST_NAME)).decode("utf-8"))
+
+    def extract(self, name: str, out_path: str):
+        """把单个条目写到磁盘"""
+        data = self.read(name)
+        try:
+            with open(out_path, "wb") as f:
+                f.write(data)
+        finally:
+            if isinstance(data, memoryview):
+                data.release()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._zip.close()
+        self._file.close()
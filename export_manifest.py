@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+from typing import Callable, Optional
+
+MANIFEST_VERSION = 3
+MANIFEST_NAME = "texture_manifest.json"
+# rd.TextureSave.sample.sampleIndex 为 ~0U 时 RenderDoc 把 MSAA 纹理的所有采样 resolve 后导出
+RESOLVE_SAMPLE_INDEX = 0xFFFFFFFF
+# 清单子资源中表示“采样已 resolve”的 sample 值
+RESOLVED_SAMPLE = -1
+
+
+class ExportManifest:
+    """
+    导出清单：逻辑输出路径 -> 实际文件、资源 ID、子资源、格式、尺寸、编码参数、文件大小与内容哈希。
+    去重模式下多个逻辑路径会指向同一个实际文件。路径均相对于清单所在目录。
+    增量导出时读取上一次的清单，条目仍然匹配的文件不再重写。
+    """
+
+    def __init__(self, root_dir: str, capture_key: Optional[list] = None):
+        """
+        :param root_dir:    清单所在目录（导出目录）
+        :param capture_key: 导出来源 capture 的缓存键（stats_cache.capture_cache_key），
+                            与上次相同时说明纹理内容不可能变化，可以免回读直接跳过
+        """
+        self.root_dir = root_dir
+        self.capture_key = capture_key
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root_dir, MANIFEST_NAME)
+
+    def relpath(self, path: str) -> str:
+        return os.path.relpath(path, self.root_dir).replace(os.sep, "/")
+
+    def abspath(self, relpath: str) -> str:
+        return os.path.join(self.root_dir, *relpath.split("/"))
+
+    def add(self, out_path: str, resource_id, name: str, subresource, content_hash: Optional[str],
+            file_path: str, texture=None, width: int = 0, height: int = 0, options: Optional[dict] = None):
+        """
+        :param out_path:     逻辑输出路径
+        :param subresource:  (mip, slice, sample)，MSAA 纹理 resolve 导出时 sample 为 RESOLVED_SAMPLE
+        :param content_hash: 回读数据的内容哈希，无法回读时为 None
+        :param file_path:    实际写入的文件路径（去重命中时为首次写入的文件）
+        :param texture:      纹理描述，用于记录格式
+        :param width:        子资源宽度
+        :param height:       子资源高度
+        :param options:      编码参数（ExportFormat.options）
+        """
+        entry = {
+            "resourceId": int(resource_id),
+            "name": name,
+            "subresource": list(subresource),
+            "format": texture.format.Name() if texture is not None else "",
+            "width": width,
+            "height": height,
+            "options": dict(options or {}),
+            "hash": content_hash,
+            "file": self.relpath(file_path),
+        }
+        with self._lock:
+            self.entries[self.relpath(out_path)] = entry
+
+    def carry(self, out_path: str, entry: dict):
+        """沿用上一次导出的条目（文件未重写）"""
+        with self._lock:
+            self.entries[self.relpath(out_path)] = dict(entry)
+
+    def find_unchanged(self, out_path: str, resource_id, subresource, texture, width: int, height: int,
+                       options: Optional[dict] = None) -> Optional[dict]:
+        """
+        在（上一次的）清单中查找 out_path 对应且元数据仍然一致的条目：
+        资源 ID、子资源、格式、尺寸与编码参数相同，文件由该条目独占且大小与记录一致。
+        内容哈希的比较由调用方完成。
+        """
+        rel = self.relpath(out_path)
+        entry = self.entries.get(rel)
+        if entry is None or entry.get("file") != rel:
+            return None
+        if (entry.get("resourceId") != int(resource_id)
+                or entry.get("subresource") != list(subresource)
+                or entry.get("format") != texture.format.Name()
+                or entry.get("width") != width
+                or entry.get("height") != height
+                or entry.get("options") != dict(options or {})):
+            return None
+        try:
+            if os.path.getsize(out_path) != entry.get("size"):
+                return None
+        except OSError:
+            return None
+        return entry
+
+    @classmethod
+    def load(cls, root_dir: str) -> Optional["ExportManifest"]:
+        """读取 root_dir 中已有的清单，不存在或版本不符时返回 None"""
+        manifest = cls(root_dir)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        manifest.capture_key = data.get("capture")
+        manifest.entries = data.get("entries", {})
+        return manifest
+
+    def _file_size(self, rel: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.abspath(rel))
+        except OSError:
+            return None
+
+    def dumps(self, size_of: Optional[Callable[[str], Optional[int]]] = None) -> str:
+        """
+        序列化为 JSON。文件大小在全部写盘完成后统一补齐，去重共享的文件只查询一次。
+        :param size_of: 相对路径 -> 文件大小，默认 stat 导出目录中的文件；归档导出时查询归档条目
+        """
+        size_of = size_of or self._file_size
+        sizes = {}
+        for entry in self.entries.values():
+            rel = entry["file"]
+            if rel not in sizes:
+                sizes[rel] = size_of(rel)
+            entry["size"] = sizes[rel]
+
+        data = {"version": MANIFEST_VERSION, "capture": self.capture_key, "entries": self.entries}
+        return json.dumps(data, ensure_ascii=False, indent=1)
+
+    def save(self):
+        text = self.dumps()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
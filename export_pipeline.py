@@ -0,0 +1,320 @@
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import renderdoc as rd
+
+from . import profiling, texture_codec
+from .export_archive import TextureArchiveWriter
+from .export_manifest import MANIFEST_NAME, RESOLVE_SAMPLE_INDEX, RESOLVED_SAMPLE, ExportManifest
+from .image_formats import subresource_size
+
+# 默认最多同时持有 512MB 尚未写盘的回读数据
+DEFAULT_MAX_INFLIGHT_BYTES = 512 * 1024 * 1024
+
+
+class TextureWritePipeline:
+    """
+    纹理导出流水线：Replay 线程只负责 GetTextureData 回读，
+    编码与写盘交给有界线程池并行完成，整体耗时取决于较慢的一段而不是两段之和。
+    未写盘数据总量超过 max_inflight_bytes 时回读会阻塞等待（背压），内存占用有上限。
+    8bit TGA 总能在 Python 侧编码，安装了 NumPy 时浮点 EXR 等常见格式也在线程池编码（见 texture_array）；
+    其余格式（压缩格式、MSAA 等）回退到 controller.SaveTexture。
+
+    提供 manifest_dir 时在该目录维护 texture_manifest.json（资源 ID、子资源、格式、尺寸、内容哈希）。
+    去重模式（dedup=True）下相同内容只写一次，其余引用记录到清单，hardlink=True 时再为其创建硬链接。
+    增量模式（incremental=True）下与上次的清单比对，未变化的文件不再重写。
+    回退到 SaveTexture 的格式不为哈希单独回读，清单中没有内容哈希，只在来源 capture 与上次相同时按元数据跳过。
+    提供 archive_path 时所有子资源顺序写入一个不压缩的 zip（见 export_archive），清单也写在归档内，
+    路径以 manifest_dir 为根；归档每次整体重写，不支持增量，去重命中只记录到清单。
+    变化模式（changed_only=True）用于连续导出同一渲染目标的快照：回读内容与该资源同一子资源上一次回读相同则不写。
+    比较直接用上一次回读的数据（逐字节比较比哈希快一个数量级），每个子资源常驻一份回读数据。
+
+    qrenderdoc 内嵌 Python 无法安全地启动子进程，因此使用线程池；
+    写文件与 bytes 切片都会释放 GIL，线程足以让编码写盘与回读重叠。
+    """
+
+    def __init__(self, max_workers: int = 0, max_inflight_bytes: int = DEFAULT_MAX_INFLIGHT_BYTES,
+                 dedup: bool = False, hardlink: bool = False, manifest_dir: Optional[str] = None,
+                 incremental: bool = False, capture_key: Optional[list] = None,
+                 archive_path: Optional[str] = None, changed_only: bool = False):
+        """
+        :param max_workers:        编码写盘线程数，0 表示按 CPU 数自动选择
+        :param max_inflight_bytes: 尚未写盘的回读数据上限
+        :param dedup:              是否按内容哈希去重
+        :param hardlink:           去重命中时是否为重复项创建指向首个文件的硬链接
+        :param manifest_dir:       清单输出目录，dedup / incremental 时必须提供
+        :param incremental:        是否跳过与上次清单一致的文件
+        :param capture_key:        来源 capture 的缓存键，与上次一致时跳过无需回读
+        :param archive_path:       归档文件路径，None 表示逐个文件写到磁盘
+        :param changed_only:       是否跳过与同一子资源上一次回读内容相同的快照
+        """
+        if (dedup or incremental or archive_path) and not manifest_dir:
+            raise ValueError("dedup / incremental / archive 模式需要提供 manifest_dir")
+        if incremental and archive_path:
+            raise ValueError("归档导出不支持增量模式")
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix="LcLTextureWriter",
+        )
+        self._max_inflight_bytes = max_inflight_bytes
+        self._inflight_bytes = 0
+        self._cond = threading.Condition()
+        self._futures = []
+        self._bottom_up = None
+        self.errors = []
+
+        self.dedup = dedup
+        self.archive = TextureArchiveWriter(archive_path) if archive_path else None
+        self.hardlink = hardlink and self.archive is None
+        self.manifest = ExportManifest(manifest_dir, capture_key) if manifest_dir else None
+        self.previous = ExportManifest.load(manifest_dir) if incremental else None
+        self.skipped = 0
+        self._hash_paths = {}       # 内容哈希 -> 首次写入的文件路径
+        self._path_futures = {}     # 文件路径 -> 写盘任务，硬链接需等待原文件写完
+        self.dedup_hits = 0
+        self.dedup_bytes = 0
+        self.changed_only = changed_only
+        self._last_data = {}        # (资源 ID, 子资源) -> 上一次回读的数据
+        self.unchanged = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _is_bottom_up(self, controller) -> bool:
+        # OpenGL 的纹理数据从最后一行开始
+        if self._bottom_up is None:
+            api = controller.GetAPIProperties().pipelineType
+            self._bottom_up = api == rd.GraphicsAPI.OpenGL
+        return self._bottom_up
+
+    def _acquire(self, size: int):
+        with self._cond:
+            # 至少允许一个任务在途，避免单张超大纹理永远等待
+            if self._inflight_bytes > 0 and self._inflight_bytes + size > self._max_inflight_bytes:
+                with profiling.timer("pipeline.backpressure_wait"):
+                    while self._inflight_bytes > 0 and self._inflight_bytes + size > self._max_inflight_bytes:
+                        self._cond.wait()
+            self._inflight_bytes += size
+
+    def _release(self, size: int):
+        with self._cond:
+            self._inflight_bytes -= size
+            self._cond.notify_all()
+
+    @staticmethod
+    def _mip_size(texture: rd.TextureDescription, mip: int):
+        return max(1, texture.width >> mip), max(1, texture.height >> mip)
+
+    def _readback(self, controller, texsave: rd.TextureSave, texture: rd.TextureDescription):
+        """回读 texsave 指定的子资源，返回 (data, width, height)；数据与预期大小不符时返回 None"""
+        mip = texsave.mip
+        width, height = self._mip_size(texture, mip)
+        sub = rd.Subresource(mip, texsave.slice.sliceIndex, 0)
+        with profiling.timer("replay.GetTextureData"):
+            data = controller.GetTextureData(texsave.resourceId, sub)
+        profiling.count("bytes.readback", len(data))
+        expected = subresource_size(texture.format, width, height)
+        if len(data) == expected:
+            return data, width, height
+        # 部分驱动对 3D 纹理返回整个 mip 的所有深度切片
+        depth = max(1, texture.depth >> mip)
+        if depth > 1 and len(data) == expected * depth:
+            offset = expected * texsave.slice.sliceIndex
+            return memoryview(data)[offset:offset + expected], width, height
+        return None
+
+    @staticmethod
+    def _content_hash(data, width, height, texture, texsave, options) -> str:
+        # 尺寸、格式、目标文件类型与编码参数一并参与哈希，字节相同但输出不同的数据不会被合并
+        digest = hashlib.blake2b(digest_size=16)
+        encoding = ",".join(f"{key}={value}" for key, value in sorted(options.items())) if options else ""
+        digest.update(f"{width}x{height}:{texture.format.Name()}:{int(texsave.destType)}:{encoding}:".encode("utf-8"))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _skip_unchanged(self, out_path: str, entry: dict):
+        """沿用上次导出的文件，其哈希登记为去重的原始文件"""
+        self.manifest.carry(out_path, entry)
+        profiling.count("pipeline.incremental_skips")
+        if entry.get("hash"):
+            self._hash_paths.setdefault(entry["hash"], out_path)
+        self.skipped += 1
+
+    def save(self, controller, texsave: rd.TextureSave, texture: rd.TextureDescription, out_path: str,
+             name: str = "", options: Optional[dict] = None) -> bool:
+        """
+        导出 texsave 指定的子资源到 out_path；必须在 Replay 线程调用。
+        :param options: 编码参数（ExportFormat.options），只作用于 Python 侧编码，SaveTexture 回退时忽略
+        :return: 变化模式下内容未变化而跳过时返回 False，其余情况（含增量跳过、去重命中）返回 True
+        """
+        if texture.msSamp <= 1:
+            sample = 0
+        elif texsave.sample.sampleIndex == RESOLVE_SAMPLE_INDEX:
+            sample = RESOLVED_SAMPLE
+        else:
+            sample = texsave.sample.sampleIndex
+        subresource = (texsave.mip, texsave.slice.sliceIndex, sample)
+        width, height = self._mip_size(texture, texsave.mip)
+
+        previous_entry = None
+        if self.previous is not None:
+            profiling.count("pipeline.incremental_checks")
+            previous_entry = self.previous.find_unchanged(out_path, texsave.resourceId, subresource,
+                                                          texture, width, height, options)
+            # 同一个 capture 文件的内容不会变化，元数据与编码参数一致即可免回读跳过
+            if previous_entry is not None and self.manifest.capture_key is not None \
+                    and self.previous.capture_key == self.manifest.capture_key:
+                self._skip_unchanged(out_path, previous_entry)
+                return True
+
+        encoder = texture_codec.find_encoder(texture.format, texsave.destType, options)
+        readback = None
+        # 只在回读数据会被用到时回读：Python 侧编码、去重的内容哈希、变化模式的比较；
+        # 没有编码器时 SaveTexture 会自己再回读一次，仅为清单哈希回读会让每张纹理回读两次
+        if (encoder is not None or self.dedup or self.changed_only) and texture.msSamp <= 1:
+            readback = self._readback(controller, texsave, texture)
+
+        if self.changed_only and readback is not None:
+            key = (int(texsave.resourceId), subresource)
+            data = readback[0]
+            with profiling.timer("pipeline.compare"):
+                if isinstance(data, memoryview):
+                    data = data.tobytes()
+                unchanged = self._last_data.get(key) == data
+            if unchanged:
+                profiling.count("pipeline.unchanged_snapshots")
+                self.unchanged += 1
+                return False
+            self._last_data[key] = data
+
+        content_hash = None
+        if self.manifest is not None:
+            if readback is not None:
+                data, width, height = readback
+                with profiling.timer("pipeline.hash"):
+                    content_hash = self._content_hash(data, width, height, texture, texsave, options)
+            if previous_entry is not None and content_hash is not None \
+                    and previous_entry.get("hash") == content_hash:
+                self._skip_unchanged(out_path, previous_entry)
+                return True
+
+        if self.dedup and content_hash is not None:
+            original = self._hash_paths.get(content_hash)
+            if original is not None:
+                profiling.count("pipeline.dedup_hits")
+                self.dedup_hits += 1
+                self.dedup_bytes += len(readback[0])
+                self.manifest.add(out_path, texsave.resourceId, name, subresource, content_hash, original,
+                                  texture, width, height, options)
+                if self.hardlink:
+                    self._futures.append(self._pool.submit(
+                        self._link, original, out_path, self._path_futures.get(original)))
+                return True
+            self._hash_paths[content_hash] = out_path
+
+        if self.manifest is not None:
+            self.manifest.add(out_path, texsave.resourceId, name, subresource, content_hash, out_path,
+                              texture, width, height, options)
+
+        if encoder is None or readback is None:
+            self._save_texture(controller, texsave, out_path)
+            return True
+
+        data, width, height = readback
+        size = len(data)
+        bottom_up = self._is_bottom_up(controller)
+        self._acquire(size)
+        try:
+            future = self._pool.submit(self._encode_and_write, encoder, data, width, height,
+                                       texture.format, bottom_up, out_path, size)
+        except BaseException:
+            self._release(size)
+            raise
+        self._futures.append(future)
+        if self.hardlink:
+            self._path_futures[out_path] = future
+        return True
+
+    def _save_texture(self, controller, texsave: rd.TextureSave, out_path: str):
+        if self.archive is None:
+            with profiling.timer("replay.SaveTexture"):
+                controller.SaveTexture(texsave, out_path)
+            return
+        # SaveTexture 只能写文件：先写到临时文件再放进归档
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(out_path)[1])
+        os.close(fd)
+        try:
+            with profiling.timer("replay.SaveTexture"):
+                controller.SaveTexture(texsave, tmp_path)
+            self.archive.write_file(self.manifest.relpath(out_path), tmp_path)
+        finally:
+            os.remove(tmp_path)
+
+    def _link(self, original, out_path, original_future):
+        # 线程池按提交顺序执行，原文件任务此时必然已开始，等待不会死锁
+        if original_future is not None:
+            original_future.result()
+        try:
+            with profiling.timer("fs.link"):
+                if os.path.lexists(out_path):
+                    os.remove(out_path)
+                os.link(original, out_path)
+        except OSError as e:
+            # 文件系统不支持硬链接时只保留清单记录
+            self.errors.append((out_path, e))
+
+    def _encode_and_write(self, encoder, data, width, height, fmt, bottom_up, out_path, size):
+        try:
+            with profiling.timer("pipeline.encode"):
+                payload = encoder(data, width, height, fmt, bottom_up)
+            if self.archive is not None:
+                self.archive.write(self.manifest.relpath(out_path), payload)
+            else:
+                with profiling.timer("fs.write"):
+                    with open(out_path, "wb") as f:
+                        f.write(payload)
+            profiling.count("bytes.written", len(payload))
+        except Exception as e:
+            self.errors.append((out_path, e))
+        finally:
+            self._release(size)
+
+    def close(self) -> int:
+        """等待所有写盘任务完成并关闭线程池，返回失败数量"""
+        with profiling.timer("pipeline.close_wait"):
+            for future in self._futures:
+                future.result()
+            self._futures.clear()
+            self._pool.shutdown(wait=True)
+        if self.archive is not None:
+            try:
+                with profiling.timer("fs.manifest_save"):
+                    self.archive.write(MANIFEST_NAME, self.manifest.dumps(self.archive.size).encode("utf-8"))
+                with profiling.timer("archive.close"):
+                    self.archive.close()
+            except OSError as e:
+                self.errors.append((self.archive.path, e))
+        elif self.manifest is not None:
+            try:
+                with profiling.timer("fs.manifest_save"):
+                    self.manifest.save()
+            except OSError as e:
+                self.errors.append((self.manifest.path, e))
+        if self.previous is not None:
+            print(f"[TextureExporter] 增量导出: {self.skipped} 个子资源未变化，已跳过")
+        if self.changed_only:
+            print(f"[TextureExporter] 快照: {self.unchanged} 个子资源内容未变化，已跳过")
+        if self.dedup:
+            print(f"[TextureExporter] 去重: 跳过 {self.dedup_hits} 个重复子资源，"
+                  f"节省 {self.dedup_bytes / (1024 * 1024):.1f} MB 写入")
+        self._last_data.clear()
+        for out_path, error in self.errors:
+            print(f"[TextureExporter] 写入失败: {out_path} ({error})")
+        return len(self.errors)
@@ -0,0 +1,64 @@
+import threading
+import time
+from typing import Callable, Optional
+
+
+class ExportCancelled(Exception):
+    """导出被用户取消"""
+
+
+class ExportProgress:
+    """
+    导出进度与取消令牌。
+    导出在 Replay 线程按子资源推进进度，UI 线程随时可以调用 cancel()；
+    导出在两个子资源之间检查取消，已提交的写盘任务与清单照常完成，下次增量导出可以接着做。
+    """
+
+    def __init__(self, callback: Optional[Callable[[int, int, int], None]] = None, min_interval: float = 0.1):
+        """
+        :param callback:     进度回调 (done, total, bytes)，在导出线程调用，应尽快返回
+        :param min_interval: 两次回调之间的最小间隔（秒），开始与结束时总会回调
+        """
+        self.total = 0      # 需要导出的子资源总数
+        self.done = 0       # 已处理的子资源数（含增量 / 去重跳过）
+        self.bytes = 0      # 已处理子资源的数据量估算
+        self._callback = callback
+        self._min_interval = min_interval
+        self._last_report = 0.0
+        self._cancel_event = threading.Event()
+
+    def start(self, total: int):
+        self.total = total
+        self.done = 0
+        self.bytes = 0
+        self._report(force=True)
+
+    def advance(self, size: int = 0):
+        """完成一个子资源"""
+        self.done += 1
+        self.bytes += size
+        self._report()
+
+    def finish(self):
+        self._report(force=True)
+
+    def _report(self, force: bool = False):
+        if self._callback is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_report >= self._min_interval:
+            self._last_report = now
+            self._callback(self.done, self.total, self.bytes)
+
+    def cancel(self):
+        """请求取消，可在任意线程调用"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """已请求取消时抛出 ExportCancelled"""
+        if self._cancel_event.is_set():
+            raise ExportCancelled()
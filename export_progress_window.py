@@ -0,0 +1,64 @@
+import qrenderdoc as qrd
+
+from .export_progress import ExportProgress
+from .utils import format_bytes
+
+
+class ExportProgressWindow:
+    """
+    导出进度窗口：进度条、已处理数量与数据量、取消按钮。
+    在 UI 线程创建；progress 的回调来自 Replay 线程，通过 InvokeOntoUIThread 更新控件。
+    """
+
+    def __init__(self, ctx: qrd.CaptureContext, title: str):
+        self.mqt = ctx.Extensions().GetMiniQtHelper()
+        self.progress = ExportProgress(self._on_progress)
+        self._closed = False
+
+        self.window = self.mqt.CreateToplevelWidget(title, lambda c, w, d: self._on_window_closed())
+        vert = self.mqt.CreateVerticalContainer()
+        self.mqt.AddWidget(self.window, vert)
+
+        self.label = self.mqt.CreateLabel()
+        self.mqt.SetWidgetText(self.label, "准备导出...")
+        self.mqt.AddWidget(vert, self.label)
+
+        self.progress_bar = self.mqt.CreateProgressBar(True)
+        self.mqt.ResetProgressBar(self.progress_bar)
+        self.mqt.AddWidget(vert, self.progress_bar)
+
+        self.cancel_button = self.mqt.CreateButton(lambda c, w, d: self._on_cancel_clicked())
+        self.mqt.SetWidgetText(self.cancel_button, "取消")
+        self.mqt.AddWidget(vert, self.cancel_button)
+
+        ctx.AddDockWindow(self.window, qrd.DockReference.MainToolArea, None)
+        ctx.RaiseDockWindow(self.window)
+
+    def _on_progress(self, done, total, size):
+        text = f"已处理 {done}/{total} 个子资源，{format_bytes(size)}"
+        percent = int(done * 100 / total) if total else 0
+        self.mqt.InvokeOntoUIThread(lambda: self._update(text, percent))
+
+    def _update(self, text, percent):
+        if self._closed:
+            return
+        self.mqt.SetWidgetText(self.label, text)
+        self.mqt.SetProgressBarValue(self.progress_bar, percent)
+
+    def _on_cancel_clicked(self):
+        self.progress.cancel()
+        self.mqt.SetWidgetText(self.label, "正在取消，等待已提交的写入完成...")
+        self.mqt.SetWidgetEnabled(self.cancel_button, False)
+
+    def _on_window_closed(self):
+        # 直接关闭窗口同样视为取消
+        self._closed = True
+        self.progress.cancel()
+
+    def close(self):
+        """导出结束后调用，可在任意线程调用"""
+        def do_close():
+            if not self._closed:
+                self._closed = True
+                self.mqt.CloseToplevelWidget(self.window)
+        self.mqt.InvokeOntoUIThread(do_close)
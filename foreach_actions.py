@@ -1,4 +1,8 @@
 import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+
 import renderdoc
 rd = renderdoc
 
@@ -12,47 +16,111 @@ def iterAction(d, controller, indent=''):
     # 递归子 action
     for c in d.children:
         iterAction(c, controller, indent + '    ')
-        
-
-def foreachActions(controller):
-	# Iterate over all of the root actions
-	for d in controller.GetRootActions():
-		iterAction(d,controller)
-
-	# Start iterating from the first real action as a child of markers
-	action = controller.GetRootActions()[0]
-
-	while len(action.children) > 0:
-		action = action.children[0]
-
-	# Counter for which pass we're in
-	passnum = 0
-	# Counter for how many actions are in the pass
-	passcontents = 0
-	# Whether we've started seeing actions in the pass - i.e. we're past any
-	# starting clear calls that may be batched together
-	inpass = False
-
-	print("Pass #0 starts with %d: %s" % (action.eventId, action.GetName(controller.GetStructuredFile())))
-
-	while action != None:
-		# When we encounter a clear
-		if action.flags & rd.ActionFlags.Clear:
-			if inpass:
-				print("Pass #%d contained %d actions" % (passnum, passcontents))
-				passnum += 1
-				print("Pass #%d starts with %d: %s" % (passnum, action.eventId, action.GetName(controller.GetStructuredFile())))
-				passcontents = 0
-				inpass = False
-		else:
-			passcontents += 1
-			inpass = True
-
-		# Advance to the next action
-		action = action.next
-		if action is None:
-			break
-
-	if inpass:
-		print("Pass #%d contained %d actions" % (passnum, passcontents))
 
+
+class RenderPass:
+    """一个 Pass：输出目标集合相同的一段连续 Action"""
+
+    __slots__ = ("index", "startEventId", "endEventId", "startActionId", "endActionId",
+                 "targets", "meshNum", "drawcalls", "inputTextures", "inputBytes", "outputBytes")
+
+    def __init__(self, index, action, targets):
+        self.index: int = index
+        self.startEventId: int = action.eventId
+        self.endEventId: int = action.eventId
+        self.startActionId: int = action.actionId
+        self.endActionId: int = action.actionId
+        self.targets: tuple = targets       # 输出目标 TextureData，按 resourceId 排序
+        self.meshNum: float = 0
+        self.drawcalls: int = 0
+        self.inputTextures: int = 0         # Pass 内去重后的输入纹理数
+        self.inputBytes: int = 0            # Pass 内去重后的输入纹理内存估算
+        self.outputBytes: int = 0           # 输出目标内存估算
+
+
+class PassIndex:
+    """
+    按输出目标集合切分 Pass 的索引。
+    一次按 eventId 顺序的线性遍历完成切分：有输出纹理的 Action 的目标集合与当前 Pass 不同时开启新 Pass，
+    没有输出的 Action（Marker、Dispatch、Copy 等）归入当前 Pass。
+    Pass 边界存放在数组中，任意 eventId 区间的 Pass 查询为 O(log n)。
+    """
+
+    def __init__(self, stats):
+        """:param stats: ControllerDataStats，需已完成收集"""
+        self.passes: List[RenderPass] = []
+        self._start_eids = array('q')
+        self._end_eids = array('q')
+        self._build(stats)
+
+    def _build(self, stats):
+        current = None
+        current_key = None
+        inputs = set()
+        indices = 0
+        drawcall_flag = int(rd.ActionFlags.Drawcall)
+
+        def close_pass():
+            current.inputTextures = len(inputs)
+            current.inputBytes = sum(tex.byteSize for tex in inputs)
+            current.meshNum = indices / 3
+            self._start_eids.append(current.startEventId)
+            self._end_eids.append(current.endEventId)
+
+        for action in stats.iter_actions():
+            outputs = action.outputsTextures
+            if outputs:
+                key = frozenset(tex.resourceId for tex in outputs)
+            else:
+                key = current_key
+            if current is not None and current_key is None and key is not None:
+                # 开头没有输出的 Action（Marker 等）并入第一个有输出目标的 Pass
+                current.targets = tuple(sorted(outputs, key=lambda tex: int(tex.resourceId)))
+                current.outputBytes = sum(tex.byteSize for tex in current.targets)
+                current_key = key
+            elif current is None or key != current_key:
+                if current is not None:
+                    close_pass()
+                targets = tuple(sorted(outputs, key=lambda tex: int(tex.resourceId)))
+                current = RenderPass(len(self.passes), action, targets)
+                current.outputBytes = sum(tex.byteSize for tex in targets)
+                self.passes.append(current)
+                current_key = key
+                inputs = set()
+                indices = 0
+            current.endEventId = action.eventId
+            current.endActionId = action.actionId
+            if action.meshNum:
+                indices += action.numIndices
+            if action.flags & drawcall_flag:
+                current.drawcalls += 1
+            inputs.update(action.inputsTextures)
+        if current is not None:
+            close_pass()
+
+    def __len__(self):
+        return len(self.passes)
+
+    def pass_slice(self, start_event_id, end_event_id) -> Tuple[int, int]:
+        """与 [start_event_id, end_event_id] 有交集的 Pass 下标区间 [lo, hi)"""
+        lo = bisect_left(self._end_eids, start_event_id)
+        hi = bisect_right(self._start_eids, end_event_id)
+        return lo, max(lo, hi)
+
+    def passes_in_range(self, start_event_id, end_event_id) -> List[RenderPass]:
+        lo, hi = self.pass_slice(start_event_id, end_event_id)
+        return self.passes[lo:hi]
+
+
+def foreachActions(stats, controller=None):
+    """打印 Pass 切分结果；提供 controller 时同时打印完整 Action 树"""
+    if controller is not None:
+        for d in controller.GetRootActions():
+            iterAction(d, controller)
+
+    index = stats.pass_index
+    for render_pass in index.passes:
+        targets = ", ".join(str(int(tex.resourceId)) for tex in render_pass.targets) or "-"
+        print("Pass #%d events %d-%d targets [%s]: %d drawcalls, %d triangles, %d input textures" % (
+            render_pass.index, render_pass.startEventId, render_pass.endEventId, targets,
+            render_pass.drawcalls, render_pass.meshNum, render_pass.inputTextures))
@@ -0,0 +1,106 @@
+"""
+图片文件容器的公共部分：PNG 分块、DDS 文件头、DXGI 格式对照与 BC 块大小。
+texture_codec（纯 Python）与 texture_array（NumPy）共用，本模块不依赖两者。
+"""
+import struct
+import zlib
+from typing import Optional
+
+import renderdoc as rd
+
+# PNG 默认 zlib 压缩级别
+PNG_COMPRESS_LEVEL = 6
+
+# (compType, compByteWidth, compCount, BGRA) -> DXGI_FORMAT，DDS 原样写入像素数据时使用
+_DXGI_FORMATS = {
+    (rd.CompType.Float, 4, 4, False): 2,        # R32G32B32A32_FLOAT
+    (rd.CompType.Float, 4, 3, False): 6,        # R32G32B32_FLOAT
+    (rd.CompType.Float, 2, 4, False): 10,       # R16G16B16A16_FLOAT
+    (rd.CompType.UNorm, 2, 4, False): 11,       # R16G16B16A16_UNORM
+    (rd.CompType.Float, 4, 2, False): 16,       # R32G32_FLOAT
+    (rd.CompType.UNorm, 1, 4, False): 28,       # R8G8B8A8_UNORM
+    (rd.CompType.UNormSRGB, 1, 4, False): 29,   # R8G8B8A8_UNORM_SRGB
+    (rd.CompType.Float, 2, 2, False): 34,       # R16G16_FLOAT
+    (rd.CompType.UNorm, 2, 2, False): 35,       # R16G16_UNORM
+    (rd.CompType.Float, 4, 1, False): 41,       # R32_FLOAT
+    (rd.CompType.UNorm, 1, 2, False): 49,       # R8G8_UNORM
+    (rd.CompType.Float, 2, 1, False): 54,       # R16_FLOAT
+    (rd.CompType.UNorm, 2, 1, False): 56,       # R16_UNORM
+    (rd.CompType.UNorm, 1, 1, False): 61,       # R8_UNORM
+    (rd.CompType.UNorm, 1, 4, True): 87,        # B8G8R8A8_UNORM
+    (rd.CompType.UNormSRGB, 1, 4, True): 91,    # B8G8R8A8_UNORM_SRGB
+}
+
+
+def _bc_table():
+    """BC 格式 -> (每块字节数, 默认 DXGI, sRGB / SNorm / 有符号浮点变体的 DXGI)"""
+    table = {}
+    for name, block_bytes, dxgi, variant in (
+            ("BC1", 8, 71, 72), ("BC2", 16, 74, 75), ("BC3", 16, 77, 78), ("BC4", 8, 80, 81),
+            ("BC5", 16, 83, 84), ("BC6", 16, 95, 96), ("BC7", 16, 98, 99)):
+        member = getattr(rd.ResourceFormatType, name, None)
+        if member is not None:
+            table[int(member)] = (block_bytes, dxgi, variant)
+    return table
+
+
+_BC_FORMATS = _bc_table()
+
+
+def is_block_compressed(fmt) -> bool:
+    """是否为可以原样写入 DDS 的 BC1~BC7 格式"""
+    return int(fmt.type) in _BC_FORMATS
+
+
+def subresource_size(fmt, width: int, height: int) -> int:
+    """GetTextureData 返回的一个 2D 子资源的字节数；BC 格式按 4x4 块向上取整"""
+    block = _BC_FORMATS.get(int(fmt.type))
+    if block is not None:
+        return ((width + 3) // 4) * ((height + 3) // 4) * block[0]
+    return width * height * fmt.compCount * fmt.compByteWidth
+
+
+def dxgi_format(fmt) -> Optional[int]:
+    """格式对应的 DXGI_FORMAT，DDS 无法原样表示时返回 None"""
+    block = _BC_FORMATS.get(int(fmt.type))
+    if block is not None:
+        # BC6 区分无符号 / 有符号半精度浮点（UF16 / SF16），其余区分 UNorm 与 sRGB / SNorm
+        if int(fmt.type) == int(getattr(rd.ResourceFormatType, "BC6", -1)):
+            return block[2] if "SF16" in fmt.Name() else block[1]
+        return block[2] if fmt.compType in (rd.CompType.UNormSRGB, rd.CompType.SNorm) else block[1]
+    if fmt.type != rd.ResourceFormatType.Regular:
+        return None
+    return _DXGI_FORMATS.get((fmt.compType, fmt.compByteWidth, fmt.compCount, fmt.compCount >= 3 and fmt.BGRAOrder()))
+
+
+def _png_chunk(tag: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+
+def png_file(width: int, height: int, bit_depth: int, color_type: int, filtered, level: int) -> bytes:
+    """
+    组装 PNG 文件。
+    :param filtered:   已加上每行过滤器字节的扫描线数据
+    :param color_type: 0 灰度，2 RGB，6 RGBA
+    :param level:      zlib 压缩级别 0~9
+    """
+    header = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(filtered, level)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def dds_header(width: int, height: int, dxgi: int, compressed: bool, pitch_or_size: int) -> bytes:
+    """带 DX10 扩展头的 DDS 文件头（2D 纹理、单个 mip、数组大小 1）"""
+    # DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT，再加 DDSD_LINEARSIZE 或 DDSD_PITCH
+    flags = 0x1007 | (0x80000 if compressed else 0x8)
+    header = struct.pack("<4sIIIIIII44x", b"DDS ", 124, flags, height, width, pitch_or_size, 0, 1)
+    # DDPF_FOURCC，'DX10' 表示后面跟 DX10 扩展头
+    header += struct.pack("<II4s20x", 32, 0x4, b"DX10")
+    header += struct.pack("<IIII4x", 0x1000, 0, 0, 0)
+    # DDS_DIMENSION_TEXTURE2D
+    header += struct.pack("<IIIII", dxgi, 3, 0, 1, 0)
+    return header
@@ -0,0 +1,178 @@
+"""
+可选的耗时统计：回放调用、文件读写等关键步骤用 timer() 包裹，用 count() 记录次数与数据量。
+默认关闭，关闭时 timer() 返回共享的空上下文管理器，开销只有一次布尔判断。
+
+开启方式：
+- 环境变量 LCL_TEXTURE_EXPORTER_PROFILE=1，报告写到导出目录（统计写到 capture 所在目录）；
+  值为目录路径时报告统一写到该目录；
+- 环境变量 LCL_TEXTURE_EXPORTER_CPROFILE=1 时同时输出 cProfile 数据（.prof，可用 snakeviz / pstats 查看）；
+- 代码中调用 enable()，或 batch_export.py --profile。
+
+每次导出 / 统计构建是一个 run()，结束时写出 lcl_profile_<name>.json：
+各计时项的调用次数、总耗时、最大耗时，以及计数项的累计值。
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PROFILE_ENV = "LCL_TEXTURE_EXPORTER_PROFILE"
+CPROFILE_ENV = "LCL_TEXTURE_EXPORTER_CPROFILE"
+
+_enabled = bool(os.environ.get(PROFILE_ENV))
+_report_dir: Optional[str] = os.environ[PROFILE_ENV] if os.path.isdir(os.environ.get(PROFILE_ENV, "")) else None
+_use_cprofile = bool(os.environ.get(CPROFILE_ENV))
+
+_lock = threading.Lock()
+_timings: Dict[str, List[float]] = {}     # 名称 -> [次数, 总耗时, 最大耗时]
+_counters: Dict[str, int] = {}
+_run_owner: Optional[int] = None    # 正在进行的最外层 run 所在线程，由 _lock 保护
+
+
+def enable(report_dir: Optional[str] = None, use_cprofile: bool = False):
+    """
+    :param report_dir:   报告输出目录，None 表示写到各 run 指定的默认目录
+    :param use_cprofile: 是否同时输出 cProfile 数据
+    """
+    global _enabled, _report_dir, _use_cprofile
+    _enabled = True
+    _report_dir = report_dir
+    _use_cprofile = use_cprofile
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class _Timer:
+    __slots__ = ("name", "begin")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.begin = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.begin
+        with _lock:
+            entry = _timings.get(self.name)
+            if entry is None:
+                _timings[self.name] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """计时上下文管理器：with profiling.timer("replay.SaveTexture"): ..."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def count(name: str, value: int = 1):
+    """累加计数项，例如回读字节数"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+
+def report() -> dict:
+    """当前累计的计时与计数，按总耗时从大到小排列"""
+    with _lock:
+        timings = sorted(_timings.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "timings": {
+                name: {"calls": calls, "total": round(total, 6), "max": round(longest, 6)}
+                for name, (calls, total, longest) in timings
+            },
+            "counters": dict(sorted(_counters.items())),
+        }
+
+
+@contextmanager
+def run(name: str, default_dir: Optional[str] = None):
+    """
+    一次完整的导出 / 统计：开始时清空累计值，结束时写出 JSON 报告（以及可选的 cProfile 数据）。
+    同一时间只有一个 run 生效：嵌套调用以及其他线程在此期间开始的 run 不清空累计值也不写报告，
+    其中的计时与计数并入正在进行的 run。
+    :param name:        报告名，文件为 lcl_profile_<name>.json
+    :param default_dir: 未指定报告目录时的输出目录
+    """
+    global _run_owner
+    with _lock:
+        owner = _enabled and _run_owner is None
+        if owner:
+            _run_owner = threading.get_ident()
+            _timings.clear()
+            _counters.clear()
+    if not owner:
+        yield
+        return
+
+    profiler = cProfile.Profile() if _use_cprofile else None
+    begin = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with timer(f"run.{name}"):
+            yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - begin
+        try:
+            write_report(name, default_dir, elapsed, profiler)
+        finally:
+            with _lock:
+                _run_owner = None
+
+
+def write_report(name: str, default_dir: Optional[str], elapsed: float,
+                 profiler: Optional[cProfile.Profile] = None) -> Optional[str]:
+    out_dir = _report_dir or default_dir or os.getcwd()
+    path = os.path.join(out_dir, f"lcl_profile_{name}.json")
+    data = {"name": name, "elapsed": round(elapsed, 6), "created": time.strftime("%Y-%m-%d %H:%M:%S")}
+    data.update(report())
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(out_dir, f"lcl_profile_{name}.prof"))
+    except OSError as e:
+        print(f"[TextureExporter] 性能报告写入失败: {path} ({e})")
+        return None
+    print(f"[TextureExporter] 性能报告: {path}")
+    return path
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import sys
+import zlib
+from array import array
+from typing import Dict, Optional, Tuple
+
+# 缓存格式版本，结构变化时递增，旧文件会被自动忽略并重建
+CACHE_VERSION = 1
+# actions / usages 分段以 int64 数组的原始字节存储（小端），textures 分段为 JSON
+CACHE_MAGIC = b"LCLSTATS\n"
+CACHE_SUFFIX = ".lclstats"
+
+# 内容哈希只采样 capture 文件首尾各 1MB，数 GB 的 .rdc 也能在毫秒级完成校验
+_HASH_SAMPLE_BYTES = 1 << 20
+
+
+def sidecar_path(capture_path: str) -> str:
+    """统计缓存文件路径：与 .rdc 同目录，追加 .lclstats 后缀"""
+    return capture_path + CACHE_SUFFIX
+
+
+def capture_cache_key(capture_path: str) -> Optional[list]:
+    """
+    生成 capture 文件的缓存键：[文件大小, mtime_ns, 首尾采样内容的 sha1]。
+    文件不存在（例如远程 capture）时返回 None。
+    """
+    try:
+        st = os.stat(capture_path)
+        digest = hashlib.sha1()
+        with open(capture_path, "rb") as f:
+            digest.update(f.read(_HASH_SAMPLE_BYTES))
+            if st.st_size > 2 * _HASH_SAMPLE_BYTES:
+                f.seek(-_HASH_SAMPLE_BYTES, os.SEEK_END)
+                digest.update(f.read(_HASH_SAMPLE_BYTES))
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+
+
+def capture_identity(capture_path: str) -> list:
+    """进程内按 capture 缓存数据时的键：capture_cache_key，文件不可读（远程 capture）时退回文件路径"""
+    return capture_cache_key(capture_path) or [capture_path]
+
+
+class CachedResourceFormat:
+    """从缓存还原的 rd.ResourceFormat"""
+
+    def __init__(self, name, type, compType, compCount, compByteWidth):
+        self.name = name
+        self.type = type
+        self.compType = compType
+        self.compCount = compCount
+        self.compByteWidth = compByteWidth
+
+    def Name(self):
+        return self.name
+
+
+class CachedTextureDescription:
+    """从缓存还原的 rd.TextureDescription"""
+
+    def __init__(self, width, height, depth, mips, arraysize, msSamp, cubemap, creationFlags, format):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.mips = mips
+        self.arraysize = arraysize
+        self.msSamp = msSamp
+        self.cubemap = cubemap
+        self.creationFlags = creationFlags
+        self.format = CachedResourceFormat(*format)
+
+
+def texture_row(texture) -> list:
+    fmt = texture.format
+    return [
+        texture.width, texture.height, texture.depth, texture.mips, texture.arraysize,
+        texture.msSamp, bool(texture.cubemap), int(texture.creationFlags),
+        [fmt.Name(), int(getattr(fmt, "type", 0)), int(fmt.compType), fmt.compCount, fmt.compByteWidth],
+    ]
+
+
+class StatsSnapshot:
+    """
+    缓存文件的惰性视图：打开时只读取并校验头部，
+    actions / textures / usages 三个分段在首次访问时才解压。
+    """
+
+    def __init__(self, path: str, header: dict, data_offset: int):
+        self._path = path
+        self._sections = header["sections"]
+        self._data_offset = data_offset
+
+    def _section(self, name) -> bytes:
+        offset, length = self._sections[name]
+        with open(self._path, "rb") as f:
+            f.seek(self._data_offset + offset)
+            return zlib.decompress(f.read(length))
+
+    def _int_section(self, name) -> array:
+        values = array("q")
+        values.frombytes(self._section(name))
+        if sys.byteorder != "little":
+            values.byteswap()
+        return values
+
+    @property
+    def action_columns(self) -> Tuple[array, array, array, array]:
+        """(actionIds, eventIds, flags, numIndices) 四列，不逐行创建对象"""
+        rows = self._int_section("actions")
+        return rows[0::4], rows[1::4], rows[2::4], rows[3::4]
+
+    @property
+    def textures(self) -> Dict[int, CachedTextureDescription]:
+        rows = json.loads(self._section("textures"))
+        return {int(rid): CachedTextureDescription(*row) for rid, row in rows.items()}
+
+    @property
+    def usages(self) -> Dict[int, tuple]:
+        values = self._int_section("usages")
+        result = {}
+        i = 0
+        while i < len(values):
+            rid, count = values[i], values[i + 1]
+            flat = values[i + 2:i + 2 + 2 * count]
+            result[rid] = tuple(zip(flat[0::2], flat[1::2]))
+            i += 2 + 2 * count
+        return result
+
+
+def load_snapshot(capture_path: str) -> Optional[StatsSnapshot]:
+    """读取并校验 capture 的统计缓存，缓存缺失、损坏或与 capture 不匹配时返回 None"""
+    key = capture_cache_key(capture_path)
+    if key is None:
+        return None
+    path = sidecar_path(capture_path)
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                return None
+            header = json.loads(f.readline())
+            data_offset = f.tell()
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != CACHE_VERSION or header.get("key") != key:
+        return None
+    return StatsSnapshot(path, header, data_offset)
+
+
+def save_snapshot(capture_path: str, actions: list, textures: dict, usages: dict) -> bool:
+    """
+    写入统计缓存。
+    :param actions:  [[actionId, eventId, flags, numIndices], ...]
+    :param textures: {int(resourceId): texture_row(...)}
+    :param usages:   {int(resourceId): ((eventId, usage), ...)}
+    :return: 写入成功返回 True（目录只读等情况返回 False，不影响统计）
+    """
+    key = capture_cache_key(capture_path)
+    if key is None:
+        return False
+    action_values = array("q")
+    for row in actions:
+        action_values.extend(row)
+    usage_values = array("q")
+    for rid, rows in usages.items():
+        usage_values.append(rid)
+        usage_values.append(len(rows))
+        for eid, usage in rows:
+            usage_values.append(eid)
+            usage_values.append(usage)
+    if sys.byteorder != "little":
+        action_values.byteswap()
+        usage_values.byteswap()
+    blobs = {
+        "actions": zlib.compress(action_values.tobytes(), 1),
+        "textures": zlib.compress(json.dumps(textures, separators=(",", ":")).encode("utf-8"), 1),
+        "usages": zlib.compress(usage_values.tobytes(), 1),
+    }
+    sections = {}
+    offset = 0
+    for name, blob in blobs.items():
+        sections[name] = [offset, len(blob)]
+        offset += len(blob)
+    header = {"version": CACHE_VERSION, "key": key, "sections": sections}
+
+    path = sidecar_path(capture_path)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for blob in blobs.values():
+                f.write(blob)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[ControllerDataStats] 统计缓存写入失败: {e}")
+        return False
+    return True
@@ -0,0 +1,55 @@
+"""
+命令行批量导出基准：用伪造的回放控制器处理一批 capture，对比串行与进程池并行。
+
+    python test/bench_batch_export.py [num_captures] [jobs]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+batch_export = fake_renderdoc.load_extension_module("batch_export")
+
+
+def run(captures, out_dir, jobs):
+    shutil.rmtree(out_dir, ignore_errors=True)
+    begin = time.perf_counter()
+    results = batch_export.run_batch(captures, out_dir, jobs, {"incremental": False},
+                                     open_capture=fake_renderdoc.open_fake_capture)
+    elapsed = time.perf_counter() - begin
+    failed = [r for r in results if "error" in r]
+    assert not failed, failed[0]["traceback"]
+    assert all(r["textures"] > 0 and r["stats"]["actions"] > 0 for r in results)
+    return elapsed, results
+
+
+def main(num_captures=8, jobs=0):
+    jobs = jobs or os.cpu_count() or 1
+    work_dir = tempfile.mkdtemp(prefix="lcl_batch_")
+    try:
+        captures = []
+        for i in range(num_captures):
+            path = os.path.join(work_dir, "captures", f"frame_{i:03d}.rdc")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(os.urandom(4096))
+            captures.append(path)
+        found = batch_export.find_captures([os.path.join(work_dir, "captures")])
+        assert sorted(found) == sorted(captures)
+
+        serial, results = run(captures, os.path.join(work_dir, "out_serial"), 1)
+        parallel, _ = run(captures, os.path.join(work_dir, "out_parallel"), jobs)
+        textures = sum(r["textures"] for r in results)
+        print(f"{num_captures} captures, {textures} textures")
+        print(f"serial        : {serial:7.2f}s")
+        print(f"{jobs:2d} processes  : {parallel:7.2f}s  ({serial / parallel:.1f}x)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8, int(sys.argv[2]) if len(sys.argv) > 2 else 0)
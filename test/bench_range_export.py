@@ -0,0 +1,140 @@
+"""
+范围导出基准：按 DrawCall / Dispatch 导出一段 Action 范围内每个事件所有阶段的输入纹理
+- 逐 Draw 导出（每个 Draw 单独选中后导出到各自目录，同一纹理每个绑定都回读写盘）；
+- 一次回放的范围导出（升序 SetFrameEvent，每张纹理只回读写入一次，事件目录为硬链接）；
+- 再次导出同一范围（绑定来自 BindingCache，只为回读纹理回放）。
+比较耗时、GetTextureData 次数、需要重放的事件数与输出大小，并校验两者每个事件导出的内容一致。
+
+    python test/bench_range_export.py [num_draws]
+"""
+import filecmp
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+rd = fake_renderdoc
+utils = fake_renderdoc.load_extension_module("utils")
+texture_exporter = fake_renderdoc.load_extension_module("texture_exporter")
+binding_cache = fake_renderdoc.load_extension_module("binding_cache")
+ExportProgress = fake_renderdoc.load_extension_module("export_progress").ExportProgress
+TextureWritePipeline = fake_renderdoc.load_extension_module("export_pipeline").TextureWritePipeline
+
+
+def legacy_per_draw(exporter, controller, event_ids, out_dir):
+    """对照：在 UI 中逐个选中 Draw 后单独导出，没有跨事件的缓存与去重，每个绑定都回读"""
+    for event_id in event_ids:
+        stages = exporter._action_stages(event_id)
+        snapshot = binding_cache.BindingCache().snapshot(controller, event_id, stages=stages)
+        folder_path = os.path.join(out_dir, str(event_id))
+        with TextureWritePipeline() as pipeline:
+            for prefix, slot_idx, unique_name, resource_id in exporter._draw_bindings(snapshot, stages):
+                utils.TextureSaver.save_texture(exporter.capture_ctx, controller, resource_id,
+                                                folder_path, unique_name, pipeline=pipeline)
+
+
+def disk_usage(folder):
+    """按 inode 去重统计，硬链接只计一次"""
+    seen, total = set(), 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            st = os.stat(os.path.join(root, name))
+            if st.st_ino not in seen:
+                seen.add(st.st_ino)
+                total += st.st_size
+    return total
+
+
+def measure(controller, func):
+    controller.call_counts.clear()
+    controller.replayed_events = 0
+    begin = time.perf_counter()
+    func()
+    return (time.perf_counter() - begin, controller.call_counts.get("GetTextureData", 0),
+            controller.replayed_events, controller.call_counts.get("SetFrameEvent.backward", 0),
+            controller.call_counts.get("GetPipelineState", 0))
+
+
+def main(num_draws=300):
+    controller, ctx = fake_renderdoc.generate_capture(num_draws=num_draws, num_textures=120, max_size=256)
+    stats = utils.ControllerDataStats(controller, ctx, use_cache=False)
+    action_ids = sorted(stats.actionid_action_map.keys())
+    start, end = action_ids[len(action_ids) // 10], action_ids[-len(action_ids) // 10]
+    event_ids = stats.get_event_ids_in_range_by_actionid(start, end, rd.ActionFlags.Drawcall | rd.ActionFlags.Dispatch)
+    exporter = texture_exporter.TextureExporter(ctx)
+
+    work_dir = tempfile.mkdtemp(prefix="lcl_range_")
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        legacy_dir = os.path.join(work_dir, "legacy")
+        range_dir = os.path.join(work_dir, "range")
+        # 两种方式都从 capture 打开时的位置（最后一个事件）开始
+        controller.SetFrameEvent(ctx.CurEvent(), False)
+        legacy = measure(controller, lambda: legacy_per_draw(exporter, controller, event_ids, legacy_dir))
+        controller.SetFrameEvent(ctx.CurEvent(), False)
+        progress = ExportProgress()
+        ranged = measure(controller, lambda: exporter.save_range_textures(controller, event_ids, range_dir, progress))
+        rerun_dir = os.path.join(work_dir, "rerun")
+        rerun = measure(controller, lambda: exporter.save_range_textures(controller, event_ids, rerun_dir))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    try:
+        with open(os.path.join(range_dir, texture_exporter.RANGE_MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        assert manifest["eventIds"] == event_ids
+        # 每张纹理的每个子资源只回读一次；范围内只向前回放，唯一的一次后退是结束时回到 UI 当前事件
+        subresources = sum(len(entry["files"]) for entry in manifest["textures"].values())
+        assert ranged[1] == subresources, (ranged[1], subresources)
+        assert ranged[3] == 1, ranged[3]
+        assert controller.current_event == ctx.CurEvent()
+        # 再次导出时绑定全部命中缓存，只为回读纹理向前回放，不超过第一次导出
+        assert rerun[4] == 0 and rerun[3] == 1 and rerun[2] <= ranged[2], rerun
+        # 管线状态保留着另一类 shader 的旧绑定：Dispatch 只导出 CS，DrawCall 不导出 CS
+        for event_id in event_ids:
+            stages = {row["stage"] for row in manifest["events"][str(event_id)]}
+            if ctx.GetAction(event_id).flags & rd.ActionFlags.Dispatch:
+                assert stages <= {"CS"}, (event_id, stages)
+            else:
+                assert "CS" not in stages, (event_id, stages)
+        # 顶点着色器与像素着色器共用模块时，变量名取自各自阶段的反射
+        for event_id in event_ids:
+            for row in manifest["events"][str(event_id)]:
+                assert row["stage"] != "VS" or row["name"] == "_HeightMap", (event_id, row)
+        # 每个用到的 shader 阶段只取一次反射，不为残留的旧绑定取反射
+        cache = binding_cache.BindingCache.get(ctx, controller)
+        # 同一模块用于多个阶段时每个阶段各取一次
+        shaders = {(entry[0], stage) for event_id in event_ids
+                   for stage, entry in controller._pipelines[event_id][0].items()}
+        assert cache.reflections.lookups == len(shaders), (cache.reflections.lookups, len(shaders))
+        # 每个事件目录与逐 Draw 导出的内容一致，再次导出的结果与第一次一致
+        for event_id in event_ids:
+            legacy_event = os.path.join(legacy_dir, str(event_id))
+            names = sorted(os.listdir(legacy_event))
+            for folder in (range_dir, rerun_dir):
+                range_event = os.path.join(folder, "events", str(event_id))
+                assert names == sorted(os.listdir(range_event)), event_id
+                match, mismatch, errors = filecmp.cmpfiles(legacy_event, range_event, names, shallow=False)
+                assert not mismatch and not errors, (event_id, mismatch, errors)
+
+        mb = 1024 * 1024
+        print(f"{len(event_ids)} DrawCalls / Dispatches, ActionID {start}-{end}, {len(manifest['textures'])} unique textures, "
+              f"{len(shaders)} shaders")
+        for label, (elapsed, reads, replayed, backward, states), folder in (("per draw", legacy, legacy_dir),
+                                                                            ("range", ranged, range_dir),
+                                                                            ("rerun", rerun, rerun_dir)):
+            print(f"   {label:9s} {elapsed:7.3f}s  GetTextureData {reads:6d}  GetPipelineState {states:5d}"
+                  f"  replayed events {replayed:8d}  backward seeks {backward:3d}  disk {disk_usage(folder) / mb:8.1f} MB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,90 @@
+"""
+ControllerDataStats 范围查询基准：
+- 范围面数：前缀和索引 vs 逐 eventId 遍历；
+- 范围 Top-N / 阈值：线段树 + 堆 vs 全量遍历排序。
+
+    python test/bench_range_stats.py [num_draws]
+"""
+import random
+import sys
+import time
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+utils = fake_renderdoc.load_extension_module("utils")
+
+
+def legacy_meshnum_in_range(stats, start_action_id, end_action_id):
+    """改动前的实现：逐个 eventId 查字典累加"""
+    start_event_id = stats.get_event_id(start_action_id)
+    end_event_id = stats.get_event_id(end_action_id)
+    if start_event_id is None or end_event_id is None:
+        return 0
+    total = 0
+    for eid in range(start_event_id, end_event_id + 1):
+        action = stats.get_action_by_eventid(eid)
+        if action:
+            total += action.meshNum
+    return total
+
+
+def legacy_top_n(stats, n, start_action_id, end_action_id, threshold=None):
+    """改动前的实现：遍历全部 action 后完整排序"""
+    result = []
+    for action_id, action_data in stats.actionid_action_map.items():
+        if action_id < start_action_id or action_id > end_action_id:
+            continue
+        if action_data.meshNum > (0 if threshold is None else threshold):
+            result.append((action_data.meshNum, action_id))
+    result = sorted(result, key=lambda x: x[0], reverse=True)
+    return result[:n] if threshold is None else result
+
+
+def bench(func, ranges):
+    begin = time.perf_counter()
+    results = [func(start, end) for start, end in ranges]
+    return (time.perf_counter() - begin) / len(ranges), results
+
+
+def main(num_draws=200000, num_queries=200):
+    controller, ctx = fake_renderdoc.generate_capture(num_draws=num_draws, num_textures=64)
+    begin = time.perf_counter()
+    stats = utils.ControllerDataStats(controller, ctx)
+    print(f"build stats: {num_draws} draws in {time.perf_counter() - begin:.3f}s")
+
+    action_ids = sorted(stats.actionid_action_map.keys())
+    rng = random.Random(42)
+    ranges = []
+    for _ in range(num_queries):
+        a, b = rng.choice(action_ids), rng.choice(action_ids)
+        ranges.append((min(a, b), max(a, b)))
+
+    legacy_time, legacy_results = bench(lambda s, e: legacy_meshnum_in_range(stats, s, e), ranges)
+    index_time, index_results = bench(stats.get_meshnum_in_range_by_actionid, ranges)
+
+    for expected, actual in zip(legacy_results, index_results):
+        assert abs(expected - actual) <= 1e-6 * max(1.0, expected), (expected, actual)
+
+    print(f"legacy loop : {legacy_time * 1e3:9.3f} ms/query")
+    print(f"prefix index: {index_time * 1e3:9.3f} ms/query")
+    print(f"speedup     : {legacy_time / index_time:9.1f}x")
+
+    legacy_time, legacy_results = bench(lambda s, e: legacy_top_n(stats, 10, s, e), ranges)
+    index_time, index_results = bench(lambda s, e: stats.get_top_n_actions_by_meshnum(10, s, e), ranges)
+    assert legacy_results == index_results
+    print(f"top-10 legacy sort : {legacy_time * 1e3:9.3f} ms/query")
+    print(f"top-10 segment tree: {index_time * 1e3:9.3f} ms/query")
+
+    threshold = 9000
+    legacy_time, legacy_results = bench(lambda s, e: legacy_top_n(stats, 0, s, e, threshold), ranges)
+    index_time, index_results = bench(
+        lambda s, e: stats.get_actions_by_meshnum_threshold(threshold, s, e), ranges)
+    assert legacy_results == index_results
+    assert stats.get_actions_by_meshnum_threshold(threshold) == legacy_top_n(stats, 0, 0, 1 << 62, threshold)
+    print(f"threshold legacy   : {legacy_time * 1e3:9.3f} ms/query")
+    print(f"threshold index    : {index_time * 1e3:9.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,59 @@
+"""
+扩展加载耗时：导入扩展包并执行 register()，对比延迟导入与改动前的一次性导入。
+改动前 __init__.py 在加载时导入 texture_exporter、drawcall_statistics、utils 与 test.test，
+这里在同一个包上额外导入这些模块来复现。每次测量都在新的解释器进程中进行。
+
+    python test/bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+# register() 注册的菜单：事件浏览器 2 项、纹理查看器 6 项、窗口菜单 1 项
+EXPECTED_MENUS = 9
+
+# 改动前 __init__.py 在加载时导入的模块
+EAGER_MODULES = ["texture_exporter", "drawcall_statistics", "export_progress_window", "utils", "test.test"]
+
+SCRIPT = """
+import sys, time
+sys.path.insert(0, {test_dir!r})
+import fake_renderdoc
+fake_renderdoc.install()
+ctx = fake_renderdoc.install_qrenderdoc()
+begin = time.perf_counter()
+package = fake_renderdoc.load_extension_package()
+for name in {eager!r}:
+    __import__(fake_renderdoc.EXTENSION_PACKAGE + "." + name)
+package.register("1.0", ctx)
+elapsed = time.perf_counter() - begin
+assert len(ctx.Extensions().menus) == {menus}, len(ctx.Extensions().menus)
+assert len(ctx.viewers) == 1
+print(elapsed, len([m for m in sys.modules if m.startswith(fake_renderdoc.EXTENSION_PACKAGE)]))
+"""
+
+
+def measure(eager_modules, runs):
+    samples = []
+    modules = 0
+    for _ in range(runs):
+        script = SCRIPT.format(test_dir=TEST_DIR, eager=eager_modules, menus=EXPECTED_MENUS)
+        # -B：不写 .pyc；各次运行仍会读取已有的 __pycache__，与真实启动一致
+        output = subprocess.check_output([sys.executable, "-B", "-c", script], text=True)
+        elapsed, modules = output.split()
+        samples.append(float(elapsed))
+    return statistics.median(samples), int(modules)
+
+
+def main(runs=15):
+    lazy, lazy_modules = measure([], runs)
+    eager, eager_modules = measure(EAGER_MODULES, runs)
+    print(f"eager import : {eager * 1e3:7.2f} ms  ({eager_modules} extension modules)")
+    print(f"lazy import  : {lazy * 1e3:7.2f} ms  ({lazy_modules} extension modules)")
+    print(f"saved        : {(eager - lazy) * 1e3:7.2f} ms per startup ({eager / lazy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 15)
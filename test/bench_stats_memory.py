@@ -0,0 +1,114 @@
+"""
+ControllerDataStats 内存基准：列式存储 vs 改动前每个 Action 一个对象加两个 set 的表示。
+用 tracemalloc 统计构建后仍被统计对象持有的内存。
+
+伪造的 Action 树由控制器持有，改动前 ActionData.action 对它的引用不计入这里的结果；
+真实回放中 SWIG 包装的 ActionDescription 会因此常驻，实际差距比这里更大。
+
+    python test/bench_stats_memory.py [num_draws]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+utils = fake_renderdoc.load_extension_module("utils")
+rd = fake_renderdoc
+
+
+class LegacyActionData:
+    """改动前的 ActionData"""
+
+    def __init__(self, action):
+        self.action = action
+        self.actionId = action.actionId
+        self.eventId = action.eventId
+        self.flags = action.flags
+        self.numIndices = action.numIndices
+        self.meshNum = action.numIndices / 3 if action.flags & rd.ActionFlags.Drawcall and action.flags & rd.ActionFlags.Indexed else 0
+        self.inputsTextures = set()
+        self.outputsTextures = set()
+
+
+class LegacyTextureData:
+    """改动前的 TextureData"""
+
+    def __init__(self, resource_id, texture):
+        self.resourceId = resource_id
+        self.texture = texture
+        self.width = texture.width
+        self.height = texture.height
+        self.format = texture.format
+        self.creationFlags = texture.creationFlags
+        self.arraysize = texture.arraysize
+        self.depth = texture.depth
+        self.mips = texture.mips
+        self.msSamp = texture.msSamp
+        self.formatName = texture.format.Name()
+        self.byteSize = utils.texture_byte_size(texture)
+
+
+def build_legacy(controller, ctx):
+    """改动前 ControllerDataStats._collect 的数据结构"""
+    eventid_action_map = {}
+    actionid_action_map = {}
+
+    def collect_actions(actions):
+        for action in actions:
+            action_data = LegacyActionData(action)
+            eventid_action_map[action.eventId] = action_data
+            actionid_action_map[action.actionId] = action_data
+            collect_actions(action.children)
+    collect_actions(controller.GetRootActions())
+
+    usage_table = utils.TextureUsageTable.get(ctx, controller)
+    for resource_id, usages in usage_table.usages.items():
+        texture_data = LegacyTextureData(resource_id, ctx.GetTexture(resource_id))
+        for eid, usage in usages:
+            action_data = eventid_action_map.get(eid)
+            if not action_data:
+                continue
+            if usage in utils._INPUT_USAGE_IDS:
+                action_data.inputsTextures.add(texture_data)
+            if usage in utils._OUTPUT_USAGE_IDS:
+                action_data.outputsTextures.add(texture_data)
+    return eventid_action_map, actionid_action_map
+
+
+def measure(build):
+    """返回 (retained, peak, 构建耗时)；耗时单独计一次，tracemalloc 会显著拖慢构建"""
+    begin = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - begin
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak, elapsed
+
+
+def main(num_draws=200000):
+    controller, ctx = fake_renderdoc.generate_capture(num_draws=num_draws, num_textures=256)
+    # 使用表在两种表示之间共享，提前构建使其不计入任何一方
+    utils.TextureUsageTable.get(ctx, controller)
+
+    legacy_retained, legacy_peak, legacy_time = measure(lambda: build_legacy(controller, ctx))
+    retained, peak, elapsed = measure(lambda: utils.ControllerDataStats(controller, ctx, use_cache=False))
+
+    mb = 1024 * 1024
+    print(f"{num_draws} draws")
+    print(f"legacy objects : retained {legacy_retained / mb:8.1f} MB, peak {legacy_peak / mb:8.1f} MB, "
+          f"build {legacy_time:.2f}s (collection only)")
+    print(f"columnar store : retained {retained / mb:8.1f} MB, peak {peak / mb:8.1f} MB, "
+          f"build {elapsed:.2f}s (including pass / meshNum indexes)")
+    print(f"reduction      : {legacy_retained / retained:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,229 @@
+"""
+性能基准套件：用 fake_renderdoc 生成指定规模的合成 capture，在没有 qrenderdoc 的普通机器上测量
+- ControllerDataStats 构建耗时（冷启动 / 命中 .lclstats 缓存）；
+- 范围查询延迟（面数、输入纹理、Top-N、纹理内存、Pass）；
+- Export All Texture 吞吐（全量 / 去重 / 增量重跑 / 单个归档 / 未压缩 TGA）与输出大小。
+
+结果可写成 JSON，并与之前保存的基线比较，任一指标退化超过容差时返回非 0，便于在 CI 中发现性能回退。
+其余 bench_*.py 针对单项优化与改动前的实现做对比，本套件只关心当前实现的绝对耗时。
+
+    python test/bench_suite.py [--draws 10000,100000] [--json out.json] [--baseline base.json] [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+utils = fake_renderdoc.load_extension_module("utils")
+ExportFormatPolicy = fake_renderdoc.load_extension_module("export_format").ExportFormatPolicy
+ExportProgress = fake_renderdoc.load_extension_module("export_progress").ExportProgress
+TextureWritePipeline = fake_renderdoc.load_extension_module("export_pipeline").TextureWritePipeline
+texture_codec = fake_renderdoc.load_extension_module("texture_codec")
+rd = fake_renderdoc
+
+
+def median_time(func, repeat):
+    """多次运行取中位数（秒）"""
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - begin)
+    return statistics.median(samples)
+
+
+def make_capture(work_dir, num_draws, num_textures, max_size):
+    """生成合成 capture；capture 路径指向真实文件，统计缓存才能计算缓存键"""
+    path = os.path.join(work_dir, f"bench_{num_draws}.rdc")
+    with open(path, "wb") as f:
+        f.write(os.urandom(64 * 1024))
+    return fake_renderdoc.generate_capture(num_draws=num_draws, num_textures=num_textures, filename=path,
+                                           max_size=max_size, duplicate_ratio=0.3)
+
+
+def bench_stats(controller, ctx, repeat):
+    def build(use_cache):
+        utils.TextureUsageTable.invalidate()
+        return utils.ControllerDataStats(controller, ctx, use_cache=use_cache)
+
+    results = {"stats_build_cold_s": median_time(lambda: build(False), repeat)}
+    build(True)  # 写入缓存
+    results["stats_build_cached_s"] = median_time(lambda: build(True), repeat)
+    utils.TextureUsageTable.invalidate()
+    return results
+
+
+def bench_queries(stats, num_queries, seed=42):
+    action_ids = sorted(stats.actionid_action_map.keys())
+    rng = random.Random(seed)
+    ranges = []
+    for _ in range(num_queries):
+        a, b = rng.choice(action_ids), rng.choice(action_ids)
+        ranges.append((min(a, b), max(a, b)))
+
+    queries = {
+        "meshnum": stats.get_meshnum_in_range_by_actionid,
+        "inputs": stats.get_inputs_in_range_by_actionid,
+        "top10": lambda s, e: stats.get_top_n_actions_by_meshnum(10, s, e),
+        "memory": stats.count_texture_memory_in_range_by_actionid,
+        "resolutions": stats.count_texture_resolutions_in_range_by_actionid,
+        "passes": stats.get_passes_in_range_by_actionid,
+    }
+    results = {}
+    for name, query in queries.items():
+        begin = time.perf_counter()
+        for start, end in ranges:
+            query(start, end)
+        results[f"query_{name}_ms"] = (time.perf_counter() - begin) / len(ranges) * 1e3
+    return results
+
+
+def _exported_bytes(folder):
+    total = 0
+    for root, _, files in os.walk(folder):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files if f.endswith((".tga", ".png", ".exr", ".dds")))
+    return total
+
+
+def bench_export(controller, ctx, work_dir):
+    """吞吐按回读的原始数据量计算，与输出格式的压缩率无关"""
+    out_dir = os.path.join(work_dir, "export")
+    results = {}
+    source_bytes = 0
+
+    def run(folder, **kwargs):
+        nonlocal source_bytes
+        utils.TextureUsageTable.invalidate()
+        progress = ExportProgress()
+        begin = time.perf_counter()
+        utils.TextureSaver.export_all_textures(ctx, controller, out_dir, folder, progress=progress, **kwargs)
+        source_bytes = progress.bytes
+        return time.perf_counter() - begin
+
+    mb = 1024 * 1024
+    # 默认格式为以往的 TGA / 单精度 EXR，其余各项使用 PNG / DDS / 半精度 EXR
+    compressed = ExportFormatPolicy()
+    elapsed = run("full", incremental=False, format_policy=compressed)
+    results["export_full_s"] = elapsed
+    results["export_full_mb_per_s"] = source_bytes / mb / elapsed
+    results["export_full_output_mb"] = _exported_bytes(os.path.join(out_dir, "full")) / mb
+    results["export_dedup_s"] = run("dedup", incremental=False, dedup=True, format_policy=compressed)
+    results["export_incremental_rerun_s"] = run("full", incremental=True, format_policy=compressed)
+    elapsed = run("archive", incremental=False, archive=True, format_policy=compressed)
+    results["export_archive_s"] = elapsed
+    results["export_archive_mb_per_s"] = source_bytes / mb / elapsed
+    elapsed = run("tga", incremental=False)
+    results["export_tga_s"] = elapsed
+    results["export_tga_output_mb"] = _exported_bytes(os.path.join(out_dir, "tga")) / mb
+    shutil.rmtree(out_dir, ignore_errors=True)
+    return results
+
+
+def check_fallback_readback(work_dir, mips=6):
+    """
+    Python 侧无法编码的纹理（BC7 导出为 PNG）只由 SaveTexture 回读一次：
+    默认的增量清单不能让流水线为了内容哈希再回读一遍
+    """
+    fmt = rd.ResourceFormat("BC7_UNORM", 4, 1, rd.CompType.UNorm, rd.ResourceFormatType.BC7)
+    assert texture_codec.find_encoder(fmt, rd.FileType.PNG) is None
+    rid = rd.ResourceId(1)
+    texture = rd.TextureDescription(rid, 256, 256, mips=mips, format=fmt)
+    controller = rd.ReplayController([], [], {rid: texture}, {})
+    out_dir = os.path.join(work_dir, "fallback")
+    with TextureWritePipeline(manifest_dir=out_dir, incremental=True) as pipeline:
+        for mip in range(mips):
+            texsave = rd.TextureSave()
+            texsave.resourceId, texsave.destType, texsave.mip = rid, rd.FileType.PNG, mip
+            os.makedirs(out_dir, exist_ok=True)
+            pipeline.save(controller, texsave, texture, os.path.join(out_dir, f"tex_{mip}.png"))
+    reads, saves = controller.call_counts.get("GetTextureData", 0), controller.call_counts.get("SaveTexture", 0)
+    assert saves == mips and reads == saves, (reads, saves)
+
+
+def run_suite(sizes, num_textures, num_queries, max_size, repeat, export_draws):
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="lcl_bench_")
+    stdout = sys.stdout
+    try:
+        for num_draws in sizes:
+            controller, ctx = make_capture(work_dir, num_draws, num_textures, max_size)
+            case = bench_stats(controller, ctx, repeat)
+            stats = utils.ControllerDataStats(controller, ctx)
+            case.update(bench_queries(stats, num_queries))
+            results[f"draws_{num_draws}"] = case
+
+        check_fallback_readback(work_dir)
+        controller, ctx = make_capture(work_dir, export_draws, num_textures, max_size)
+        # 导出时逐纹理打印的日志不计入结果
+        sys.stdout = open(os.devnull, "w")
+        try:
+            results["export"] = bench_export(controller, ctx, work_dir)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """返回退化超过容差的指标；_mb_per_s 越大越好，其余（耗时、输出大小）越小越好"""
+    regressions = []
+    for case, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(case, {}).get(name)
+            if not base:
+                continue
+            higher_is_better = name.endswith("_mb_per_s")
+            ratio = base / value if higher_is_better else value / base
+            if ratio > 1 + tolerance:
+                regressions.append((case, name, base, value, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LcL Texture Exporter 性能基准")
+    parser.add_argument("--draws", default="10000,100000", help="逗号分隔的 DrawCall 数量，每个规模一组统计基准")
+    parser.add_argument("--textures", type=int, default=200, help="每个 capture 的纹理数量")
+    parser.add_argument("--queries", type=int, default=200, help="每种范围查询的随机区间数")
+    parser.add_argument("--max-size", type=int, default=1024, help="纹理最大边长")
+    parser.add_argument("--repeat", type=int, default=3, help="构建耗时取几次运行的中位数")
+    parser.add_argument("--export-draws", type=int, default=2000, help="导出基准的 DrawCall 数量")
+    parser.add_argument("--json", help="把结果写入该 JSON 文件")
+    parser.add_argument("--baseline", help="与之前保存的结果比较")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的退化比例")
+    args = parser.parse_args(argv)
+
+    sizes = [int(x) for x in args.draws.split(",") if x]
+    results = run_suite(sizes, args.textures, args.queries, args.max_size, args.repeat, args.export_draws)
+
+    for case, metrics in results.items():
+        print(case)
+        for name, value in metrics.items():
+            print(f"   {name:32s} {value:12.4f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for case, name, base, value, ratio in regressions:
+            print(f"REGRESSION {case}.{name}: {base:.4f} -> {value:.4f} ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+渲染目标快照基准：导出一段范围内每个 DrawCall 执行后的渲染目标
+- 逐 Draw 全量导出（每个 Draw 的每个输出目标都写一次）；
+- 变化模式（TextureExporter.save_range_target_snapshots：升序回放，内容未变化的目标不写）。
+比较耗时、写出的文件数、磁盘占用与回放代价，并校验写出的快照恰好是目标内容发生变化的事件。
+
+    python test/bench_target_snapshots.py [num_draws]
+"""
+import bisect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+rd = fake_renderdoc
+utils = fake_renderdoc.load_extension_module("utils")
+texture_exporter = fake_renderdoc.load_extension_module("texture_exporter")
+TextureWritePipeline = fake_renderdoc.load_extension_module("export_pipeline").TextureWritePipeline
+
+
+def every_draw(ctx, controller, actions, out_dir):
+    """对照：每个 Draw 之后无条件导出它的全部输出目标"""
+    with TextureWritePipeline() as pipeline:
+        for action in actions:
+            controller.SetFrameEvent(action.eventId, False)
+            for tex in action.outputsTextures:
+                utils.TextureSaver.save_texture(ctx, controller, tex.resourceId,
+                                                os.path.join(out_dir, str(int(tex.resourceId))),
+                                                str(action.eventId), export_renderbuffer=True, pipeline=pipeline)
+
+
+def folder_stats(folder):
+    count = size = 0
+    for root, _, files in os.walk(folder):
+        for name in files:
+            if not name.endswith(".json"):
+                count += 1
+                size += os.path.getsize(os.path.join(root, name))
+    return count, size
+
+
+def measure(controller, func):
+    controller.call_counts.clear()
+    controller.replayed_events = 0
+    begin = time.perf_counter()
+    func()
+    return (time.perf_counter() - begin, controller.replayed_events,
+            controller.call_counts.get("SetFrameEvent.backward", 0))
+
+
+def main(num_draws=400):
+    controller, ctx = fake_renderdoc.generate_capture(num_draws=num_draws, num_textures=40, max_size=512)
+    stats = utils.ControllerDataStats(controller, ctx, use_cache=False)
+    action_ids = sorted(stats.actionid_action_map.keys())
+    start, end = action_ids[len(action_ids) // 10], action_ids[-len(action_ids) // 10]
+    event_ids = stats.get_event_ids_in_range_by_actionid(start, end, rd.ActionFlags.Drawcall)
+    actions = [stats.get_action_by_eventid(event_id) for event_id in event_ids]
+    exporter = texture_exporter.TextureExporter(ctx)
+
+    work_dir = tempfile.mkdtemp(prefix="lcl_snapshots_")
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        full_dir = os.path.join(work_dir, "full")
+        changed_dir = os.path.join(work_dir, "changed")
+        controller.SetFrameEvent(ctx.CurEvent(), False)
+        full = measure(controller, lambda: every_draw(ctx, controller, actions, full_dir))
+        controller.SetFrameEvent(ctx.CurEvent(), False)
+        changed = measure(controller, lambda: exporter.save_range_target_snapshots(controller, actions, changed_dir))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    try:
+        with open(os.path.join(changed_dir, texture_exporter.RANGE_MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        # 每个目标的第一次快照总会写出，之后只在内容真正变化的事件写出
+        seen = set()
+        for action in actions:
+            for row in manifest["events"][str(action.eventId)]:
+                rid = rd.ResourceId(row["resourceId"])
+                writes = controller.target_writes[rid]
+                index = bisect.bisect_left(writes, action.eventId)
+                expected = rid not in seen or (index < len(writes) and writes[index] == action.eventId)
+                assert row["changed"] == expected, (action.eventId, row)
+                seen.add(rid)
+        assert changed[2] == 1, changed[2]
+
+        mb = 1024 * 1024
+        print(f"{len(actions)} DrawCalls, ActionID {start}-{end}, {len(manifest['targets'])} render targets")
+        for label, (elapsed, replayed, backward), folder in (("every draw", full, full_dir),
+                                                             ("changed", changed, changed_dir)):
+            count, size = folder_stats(folder)
+            print(f"   {label:10s} {elapsed:7.3f}s  files {count:6d}  disk {size / mb:8.1f} MB"
+                  f"  replayed events {replayed:8d}  backward seeks {backward:3d}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
@@ -0,0 +1,186 @@
+"""
+NumPy 编码路径基准与校验（需要安装 NumPy）：
+- 8bit TGA / PNG：texture_array 与纯 Python texture_codec 输出一致（TGA 逐字节，PNG 解码后逐像素），比较编码耗时；
+- PNG / EXR（含半精度）/ DDS（含 BC 原样写入）：按各自格式解析输出并与源数据比对，测量编码吞吐；
+- PNG 各压缩级别的耗时与文件大小；
+- 线程池并行编码相对单线程的加速（zlib 压缩与大块拷贝释放 GIL）。
+
+    python test/bench_texture_array.py [size]
+"""
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_renderdoc
+
+fake_renderdoc.install()
+texture_codec = fake_renderdoc.load_extension_module("texture_codec")
+texture_array = fake_renderdoc.load_extension_module("texture_array")
+image_formats = fake_renderdoc.load_extension_module("image_formats")
+rd = fake_renderdoc
+
+import numpy as np  # noqa: E402
+
+RGBA8 = rd.ResourceFormat("R8G8B8A8_UNORM", 4, 1, rd.CompType.UNorm)
+BGRA8 = rd.ResourceFormat("B8G8R8A8_UNORM", 4, 1, rd.CompType.UNorm, bgra=True)
+RG8 = rd.ResourceFormat("R8G8_UNORM", 2, 1, rd.CompType.UNorm)
+R8 = rd.ResourceFormat("R8_UNORM", 1, 1, rd.CompType.UNorm)
+RGBA16F = rd.ResourceFormat("R16G16B16A16_FLOAT", 4, 2, rd.CompType.Float)
+RGBA32F = rd.ResourceFormat("R32G32B32A32_FLOAT", 4, 4, rd.CompType.Float)
+RGBA16 = rd.ResourceFormat("R16G16B16A16_UNORM", 4, 2, rd.CompType.UNorm)
+BC7 = rd.ResourceFormat("BC7_UNORM", 4, 1, rd.CompType.UNorm, rd.ResourceFormatType.BC7)
+BC1_SRGB = rd.ResourceFormat("BC1_UNORM_SRGB", 4, 1, rd.CompType.UNormSRGB, rd.ResourceFormatType.BC1)
+
+
+def make_data(size, fmt, seed=7):
+    rng = np.random.default_rng(seed)
+    if fmt.compType == rd.CompType.Float:
+        values = rng.random((size, size, fmt.compCount), dtype=np.float32) * 4.0
+        return values.astype(f"<f{fmt.compByteWidth}").tobytes()
+    return rng.integers(0, 256, size * size * fmt.compCount * fmt.compByteWidth, dtype=np.uint8).tobytes()
+
+
+def timed(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - begin)
+    return best, result
+
+
+def decode_png(payload):
+    """只支持本模块写出的 PNG：单个 IDAT、None / Up 过滤器"""
+    width, height, bits, color_type = struct.unpack(">IIBB", payload[16:26])
+    idat = payload.index(b"IDAT")
+    length = struct.unpack(">I", payload[idat - 4:idat])[0]
+    raw = np.frombuffer(zlib.decompress(payload[idat + 4:idat + 4 + length]), dtype=np.uint8)
+    channels = {0: 1, 2: 3, 6: 4}[color_type]
+    rows = raw.reshape(height, -1)
+    filters = set(rows[:, 0].tolist())
+    assert filters <= {0, 2}, filters
+    pixels = rows[:, 1:].copy()
+    if filters == {2}:
+        pixels = np.cumsum(pixels, axis=0, dtype=np.uint8)
+    dtype = ">u2" if bits == 16 else np.uint8
+    return pixels.view(dtype).reshape(height, width, channels)
+
+
+def decode_exr(payload, width, height):
+    """只支持本模块写出的无压缩扫描线 EXR，返回按 R、G、B、A 排列的数组"""
+    assert struct.unpack("<ii", payload[:8]) == (20000630, 2)
+    pos = payload.index(b"chlist\0") + 7
+    size = struct.unpack("<i", payload[pos:pos + 4])[0]
+    chlist = payload[pos + 4:pos + 4 + size]
+    names, types = [], []
+    while chlist[0]:
+        end = chlist.index(b"\0")
+        names.append(chlist[:end].decode())
+        types.append(struct.unpack("<i", chlist[end + 1:end + 5])[0])
+        chlist = chlist[end + 17:]
+    dtype = "<f2" if types[0] == 1 else "<f4"
+    header_end = payload.index(b"screenWindowWidth\0float\0") + len("screenWindowWidth\0float\0") + 8 + 1
+    offsets = np.frombuffer(payload, dtype="<u8", count=height, offset=header_end)
+    result = np.empty((height, width, len(names)), dtype=dtype)
+    for y, offset in enumerate(offsets):
+        line_y, line_size = struct.unpack("<ii", payload[offset:offset + 8])
+        assert line_y == y
+        line = np.frombuffer(payload, dtype=dtype, count=line_size // np.dtype(dtype).itemsize, offset=offset + 8)
+        planar = line.reshape(len(names), width)
+        for index, name in enumerate(names):
+            result[y, :, "RGBA".index(name)] = planar[index]
+    return result
+
+
+def check_pure(size):
+    print("TGA / PNG (8bit, 与纯 Python 实现比较)")
+    for name in ("tga", "png"):
+        pure = getattr(texture_codec, f"encode_{name}")
+        vectorized = getattr(texture_array, f"encode_{name}")
+        for fmt in (RGBA8, BGRA8, RG8, R8):
+            data = make_data(size, fmt)
+            for bottom_up in (False, True):
+                expected = pure(data, size, size, fmt, bottom_up)
+                actual = vectorized(data, size, size, fmt, bottom_up)
+                if name == "png":
+                    assert np.array_equal(decode_png(actual), decode_png(expected)), (name, fmt.Name())
+                else:
+                    assert actual == expected, (name, fmt.Name())
+            pure_time, _ = timed(lambda: pure(data, size, size, fmt))
+            numpy_time, _ = timed(lambda: vectorized(data, size, size, fmt))
+            print(f"   {name.upper()} {fmt.Name():20s} pure {pure_time * 1e3:8.2f} ms   numpy {numpy_time * 1e3:8.2f} ms")
+
+
+def check_formats(size):
+    print("PNG / EXR / DDS")
+    mb = size * size / (1024 * 1024)
+    for fmt in (RGBA8, BGRA8, RGBA16):
+        data = make_data(size, fmt)
+        elapsed, payload = timed(lambda: texture_array.encode_png(data, size, size, fmt, True))
+        source = texture_array.to_array(data, size, size, fmt)[::-1][..., texture_array.rgba_order(fmt)]
+        assert np.array_equal(decode_png(payload), source), fmt.Name()
+        print(f"   PNG {fmt.Name():20s} {elapsed * 1e3:8.2f} ms  {mb * 4 * fmt.compByteWidth / elapsed:8.1f} MB/s")
+
+    for fmt in (RGBA16F, RGBA32F):
+        data = make_data(size, fmt)
+        source = texture_array.to_array(data, size, size, fmt)
+        for half in (False, True):
+            elapsed, payload = timed(lambda: texture_array.encode_exr(data, size, size, fmt, half=half))
+            expected = source.astype(np.float16) if half else source
+            assert np.array_equal(decode_exr(payload, size, size), expected)
+            label = f"{fmt.Name()}{' half' if half else ''}"
+            print(f"   EXR {label:25s} {elapsed * 1e3:8.2f} ms  {len(payload) / (1024 * 1024):6.1f} MB file")
+
+    for fmt in (RGBA8, RGBA16F, BC7, BC1_SRGB):
+        data = make_data(size, fmt)
+        expected = data[:image_formats.subresource_size(fmt, size, size)]
+        payload = texture_codec.encode_dds(data, size, size, fmt)
+        assert payload[:4] == b"DDS " and payload[128:132] == struct.pack("<I", image_formats.dxgi_format(fmt))
+        assert payload[148:] == expected
+        print(f"   DDS {fmt.Name():20s} ok ({len(expected)} bytes passthrough)")
+
+
+def check_levels(size):
+    """平滑渐变加少量噪声，近似真实贴图的可压缩程度"""
+    fmt = RGBA8
+    y, x = np.mgrid[0:size, 0:size]
+    rng = np.random.default_rng(3)
+    image = np.stack([x * 255 // size, y * 255 // size, (x + y) * 127 // size, np.full_like(x, 255)], axis=2)
+    image = np.clip(image + rng.integers(-4, 5, image.shape), 0, 255).astype(np.uint8)
+    data = image.tobytes()
+    tga_time, tga = timed(lambda: texture_codec.encode_tga(data, size, size, fmt))
+    print(f"PNG 压缩级别 ({size}x{size} RGBA8, TGA {len(tga) / 1024:.0f} KB in {tga_time * 1e3:.1f} ms)")
+    for level in (0, 1, 3, 6, 9):
+        elapsed, payload = timed(lambda: texture_array.encode_png(data, size, size, fmt, level=level), repeat=3)
+        pure_time, pure_payload = timed(lambda: texture_codec.encode_png(data, size, size, fmt, level=level), repeat=3)
+        print(f"   level {level}: numpy (Up) {elapsed * 1e3:8.1f} ms {len(payload) / 1024:8.0f} KB   "
+              f"pure (None) {pure_time * 1e3:8.1f} ms {len(pure_payload) / 1024:8.0f} KB")
+
+
+def check_parallel(size, count=16, workers=4):
+    fmt = RGBA8
+    images = [make_data(size, fmt, seed) for seed in range(count)]
+
+    def encode(data):
+        return texture_array.encode_png(data, size, size, fmt)
+
+    serial, _ = timed(lambda: [encode(data) for data in images], repeat=2)
+    with ThreadPoolExecutor(workers) as pool:
+        parallel, _ = timed(lambda: list(pool.map(encode, images)), repeat=2)
+    print(f"PNG x{count}: serial {serial:.3f}s, {workers} threads {parallel:.3f}s ({serial / parallel:.2f}x)")
+
+
+def main(size=1024):
+    if not texture_array.available():
+        print("NumPy 未安装，跳过")
+        return
+    check_pure(size)
+    check_formats(size)
+    check_levels(size)
+    check_parallel(size)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1024)
@@ -0,0 +1,677 @@
+"""
+纯 Python 的 renderdoc 模块替身，用于在没有 qrenderdoc 的普通机器上运行基准测试。
+只实现插件实际用到的接口子集：Action 树、资源列表、纹理描述与资源使用记录。
+
+用法:
+    import fake_renderdoc
+    fake_renderdoc.install()                      # 注册为 sys.modules["renderdoc"]
+    utils = fake_renderdoc.load_extension_module("utils")
+    controller, ctx = fake_renderdoc.generate_capture(num_draws=10000)
+"""
+import bisect
+import enum
+import importlib
+import importlib.util
+import os
+import random
+import sys
+import types
+import zlib
+
+EXTENSION_PACKAGE = "lcl_texture_exporter"
+EXTENSION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ActionFlags(enum.IntFlag):
+    NoFlags = 0x0
+    Clear = 0x1
+    Drawcall = 0x2
+    Dispatch = 0x4
+    PushMarker = 0x20
+    Indexed = 0x10000
+
+
+class ResourceType(enum.IntEnum):
+    Unknown = 0
+    Buffer = 2
+    Texture = 3
+
+
+class ResourceUsage(enum.IntEnum):
+    Unused = 0
+    VertexBuffer = 1
+    IndexBuffer = 2
+    VS_Constants = 3
+    VS_Resource = 13
+    HS_Resource = 14
+    DS_Resource = 15
+    GS_Resource = 16
+    PS_Resource = 17
+    CS_Resource = 18
+    TS_Resource = 19
+    MS_Resource = 20
+    All_Resource = 21
+    ColorTarget = 40
+    DepthStencilTarget = 41
+    Clear = 47
+
+
+class CompType(enum.IntEnum):
+    Typeless = 0
+    Float = 1
+    UNorm = 2
+    SNorm = 3
+    UInt = 4
+    SInt = 5
+    UScaled = 6
+    SScaled = 7
+    Depth = 8
+    UNormSRGB = 9
+
+
+class ResourceFormatType(enum.IntEnum):
+    Regular = 0
+    Undefined = 1
+    BC1 = 2
+    BC2 = 3
+    BC3 = 4
+    BC4 = 5
+    BC5 = 6
+    BC6 = 7
+    BC7 = 8
+    ETC2 = 9
+    EAC = 10
+    ASTC = 11
+    R10G10B10A2 = 12
+    R11G11B10 = 13
+    R5G6B5 = 14
+    R5G5B5A1 = 15
+    R9G9B9E5 = 16
+    R4G4B4A4 = 17
+    R4G4 = 18
+    D16S8 = 19
+    D24S8 = 20
+    D32S8 = 21
+    S8 = 22
+    A8 = 28
+
+
+class GraphicsAPI(enum.IntEnum):
+    D3D11 = 0
+    D3D12 = 1
+    OpenGL = 2
+    Vulkan = 3
+
+
+class FileType(enum.IntEnum):
+    DDS = 0
+    PNG = 1
+    JPG = 2
+    BMP = 3
+    TGA = 4
+    HDR = 5
+    EXR = 6
+    Raw = 7
+
+
+class AlphaMapping(enum.IntEnum):
+    Discard = 0
+    BlendToColor = 1
+    BlendToCheckerboard = 2
+    Preserve = 3
+
+
+class TextureCategory(enum.IntFlag):
+    NoFlags = 0x0
+    ShaderRead = 0x1
+    ColorTarget = 0x2
+    DepthTarget = 0x4
+    ShaderReadWrite = 0x8
+    SwapBuffer = 0x10
+
+
+class ShaderStage(enum.IntEnum):
+    Vertex = 0
+    Hull = 1
+    Domain = 2
+    Geometry = 3
+    Pixel = 4
+    Fragment = 4
+    Compute = 5
+    Task = 6
+    Mesh = 7
+
+
+class Descriptor:
+    def __init__(self, resource=None):
+        self.resource = resource if resource is not None else ResourceId.Null()
+
+
+class UsedDescriptor:
+    def __init__(self, resource=None):
+        self.descriptor = Descriptor(resource)
+
+
+class ShaderResource:
+    """ShaderReflection.readOnlyResources / readWriteResources 的元素"""
+
+    def __init__(self, name, isTexture=True):
+        self.name = name
+        self.isTexture = isTexture
+
+
+class ShaderReflection:
+    def __init__(self, resourceId, stage, readOnlyResources=(), readWriteResources=()):
+        self.resourceId = resourceId
+        self.stage = stage
+        self.readOnlyResources = list(readOnlyResources)
+        self.readWriteResources = list(readWriteResources)
+
+
+class PipeState:
+    """
+    某个事件的管线状态。
+    :param stages:  {ShaderStage: (shader ResourceId, 只读资源 ResourceId 列表, ShaderReflection[, 读写资源 ResourceId 列表])}
+    :param outputs: 颜色渲染目标 ResourceId 列表
+    """
+
+    def __init__(self, stages=None, outputs=(), depth=None):
+        self._stages = stages or {}
+        self._outputs = list(outputs)
+        self._depth = depth
+
+    def GetShader(self, stage):
+        entry = self._stages.get(stage)
+        return entry[0] if entry else ResourceId.Null()
+
+    def GetShaderEntryPoint(self, stage):
+        return "main" if stage in self._stages else ""
+
+    def GetShaderReflection(self, stage):
+        entry = self._stages.get(stage)
+        return entry[2] if entry else None
+
+    def GetReadOnlyResources(self, stage, onlyUsed=False):
+        entry = self._stages.get(stage)
+        return [UsedDescriptor(rid) for rid in entry[1]] if entry else []
+
+    def GetReadWriteResources(self, stage, onlyUsed=False):
+        entry = self._stages.get(stage)
+        return [UsedDescriptor(rid) for rid in entry[3]] if entry and len(entry) > 3 else []
+
+    def GetOutputTargets(self):
+        return [Descriptor(rid) for rid in self._outputs]
+
+    def GetDepthTarget(self):
+        return Descriptor(self._depth)
+
+
+class ResourceId:
+    """与 rd.ResourceId 一样可比较、可哈希，并支持 int() 转换"""
+    __slots__ = ("_value",)
+
+    def __init__(self, value=0):
+        self._value = value
+
+    @staticmethod
+    def Null():
+        return ResourceId(0)
+
+    def __int__(self):
+        return self._value
+
+    def __eq__(self, other):
+        return isinstance(other, ResourceId) and other._value == self._value
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __repr__(self):
+        return f"ResourceId::{self._value}"
+
+
+class ResourceFormat:
+    def __init__(self, name="R8G8B8A8_UNORM", compCount=4, compByteWidth=1, compType=CompType.UNorm,
+                 type=ResourceFormatType.Regular, bgra=False):
+        self._name = name
+        self.compCount = compCount
+        self.compByteWidth = compByteWidth
+        self.compType = compType
+        self.type = type
+        self._bgra = bgra
+
+    def Name(self):
+        return self._name
+
+    def BGRAOrder(self):
+        return self._bgra
+
+
+RGBA8_UNORM = ResourceFormat()
+RGBA16_FLOAT = ResourceFormat("R16G16B16A16_FLOAT", 4, 2, CompType.Float)
+
+
+class Subresource:
+    def __init__(self, mip=0, slice=0, sample=0):
+        self.mip = mip
+        self.slice = slice
+        self.sample = sample
+
+
+class SliceMapping:
+    def __init__(self):
+        self.sliceIndex = 0
+        self.slicesAsGrid = False
+        self.sliceGridWidth = 1
+        self.cubeCruciform = False
+
+
+class SampleMapping:
+    def __init__(self):
+        self.mapToArray = False
+        self.sampleIndex = 0
+
+
+class TextureSave:
+    def __init__(self):
+        self.resourceId = ResourceId.Null()
+        self.destType = FileType.DDS
+        self.mip = 0
+        self.slice = SliceMapping()
+        self.sample = SampleMapping()
+        self.alpha = AlphaMapping.Discard
+        self.jpegQuality = 90
+
+
+class APIProperties:
+    def __init__(self, pipelineType=GraphicsAPI.D3D11):
+        self.pipelineType = pipelineType
+
+
+class TextureDescription:
+    def __init__(self, resourceId, width, height, depth=1, mips=1, arraysize=1,
+                 msSamp=1, cubemap=False, format=None, creationFlags=TextureCategory.ShaderRead):
+        self.resourceId = resourceId
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.mips = mips
+        self.arraysize = arraysize
+        self.msSamp = msSamp
+        self.cubemap = cubemap
+        self.format = format or ResourceFormat()
+        self.creationFlags = creationFlags
+
+
+class ResourceDescription:
+    def __init__(self, resourceId, name, type=ResourceType.Texture):
+        self.resourceId = resourceId
+        self.name = name
+        self.type = type
+
+
+class EventUsage:
+    __slots__ = ("eventId", "usage")
+
+    def __init__(self, eventId, usage):
+        self.eventId = eventId
+        self.usage = usage
+
+
+class ActionDescription:
+    def __init__(self, eventId, actionId, flags=ActionFlags.NoFlags, numIndices=0, name=""):
+        self.eventId = eventId
+        self.actionId = actionId
+        self.flags = flags
+        self.numIndices = numIndices
+        self.name = name
+        self.children = []
+        self.next = None
+        self.previous = None
+
+    def GetName(self, structured_file=None):
+        return self.name
+
+
+class ReplayController:
+    """模拟 rd.ReplayController，调用计数可用于统计回放往返次数"""
+
+    def __init__(self, root_actions, resources, textures, usages, pipelines=None):
+        self._root_actions = root_actions
+        self._resources = resources
+        self._textures = textures
+        self._usages = usages
+        # eventId -> (stages, outputs)，见 PipeState；只包含该 action 自己使用的阶段
+        self._pipelines = pipelines or {}
+        # 与真实 API 一样，管线状态同时报告上一次绑定的另一类 shader：
+        # Draw 时仍能取到之前 Dispatch 的 compute shader，Dispatch 时仍能取到之前 Draw 的图形 shader
+        self._bound = {}
+        graphics, compute = {}, {}
+        for event_id in sorted(self._pipelines):
+            stages, outputs = self._pipelines[event_id]
+            if ShaderStage.Compute in stages:
+                compute = {ShaderStage.Compute: stages[ShaderStage.Compute]}
+            else:
+                graphics = stages
+            self._bound[event_id] = ({**graphics, **compute}, outputs)
+        self.content_seeds = {}
+        # 渲染目标 ResourceId -> 改变其内容的 eventId（升序），回读结果取决于当前事件
+        self.target_writes = {}
+        self.call_counts = {}
+        # 打开 capture 后回放停在最后一个事件；replayed_events 累计 SetFrameEvent 需要重放的事件数，
+        # 向前移动只重放中间的事件，向后移动要从帧首重放
+        self.current_event = max(self._pipelines, default=0)
+        self.replayed_events = 0
+
+    def _count(self, name):
+        self.call_counts[name] = self.call_counts.get(name, 0) + 1
+
+    def GetRootActions(self):
+        self._count("GetRootActions")
+        return self._root_actions
+
+    def GetResources(self):
+        self._count("GetResources")
+        return self._resources
+
+    def GetTextures(self):
+        self._count("GetTextures")
+        return list(self._textures.values())
+
+    def GetUsage(self, resource_id):
+        self._count("GetUsage")
+        return self._usages.get(resource_id, [])
+
+    def GetStructuredFile(self):
+        return None
+
+    def GetAPIProperties(self):
+        return APIProperties()
+
+    def SetFrameEvent(self, event_id, force):
+        self._count("SetFrameEvent")
+        if event_id < self.current_event:
+            self._count("SetFrameEvent.backward")
+            self.replayed_events += event_id
+        else:
+            self.replayed_events += event_id - self.current_event
+        self.current_event = event_id
+
+    def GetPipelineState(self):
+        self._count("GetPipelineState")
+        stages, outputs = self._bound.get(self.current_event, ({}, ()))
+        return PipeState(stages, outputs)
+
+    def GetTextureData(self, resource_id, sub):
+        """按纹理内容种子生成确定性的像素数据；content_seeds 相同的纹理内容相同"""
+        self._count("GetTextureData")
+        tex = self._textures[resource_id]
+        width = max(1, tex.width >> sub.mip)
+        height = max(1, tex.height >> sub.mip)
+        if ResourceFormatType.BC1 <= tex.format.type <= ResourceFormatType.BC7:
+            block_bytes = 8 if tex.format.type in (ResourceFormatType.BC1, ResourceFormatType.BC4) else 16
+            size = ((width + 3) // 4) * ((height + 3) // 4) * block_bytes
+        else:
+            size = width * height * tex.format.compCount * tex.format.compByteWidth
+        seed = self.content_seeds.get(resource_id, int(resource_id))
+        writes = self.target_writes.get(resource_id)
+        if writes is not None:
+            seed = seed * 7919 + bisect.bisect_right(writes, self.current_event)
+        pattern = bytes((seed * 31 + sub.mip * 7 + sub.slice * 13 + i) & 0xFF for i in range(251))
+        return (pattern * (size // len(pattern) + 1))[:size]
+
+    def SaveTexture(self, texsave, path):
+        """模拟 RenderDoc 的回读 + 编码 + 写盘"""
+        self._count("SaveTexture")
+        sub = Subresource(texsave.mip, texsave.slice.sliceIndex, 0)
+        with open(path, "wb") as f:
+            f.write(self.GetTextureData(texsave.resourceId, sub))
+        return True
+
+
+class CaptureContext:
+    """模拟 qrenderdoc.CaptureContext 中插件用到的查询接口"""
+
+    def __init__(self, controller, filename="fake_capture.rdc"):
+        self._controller = controller
+        self._filename = filename
+        self._resources = {res.resourceId: res for res in controller._resources}
+        self._actions = {}
+        pending = list(controller._root_actions)
+        while pending:
+            action = pending.pop()
+            self._actions[action.eventId] = action
+            pending.extend(action.children)
+        self._event_id = controller.current_event
+
+    def CurEvent(self):
+        return self._event_id
+
+    def CurSelectedEvent(self):
+        return self._event_id
+
+    def SetEventID(self, exclude, selected_event_id, event_id, force=False):
+        self._event_id = event_id
+
+    def GetCaptureFilename(self):
+        return self._filename
+
+    def GetTexture(self, resource_id):
+        return self._controller._textures.get(resource_id)
+
+    def GetResource(self, resource_id):
+        return self._resources.get(resource_id)
+
+    def GetAction(self, event_id):
+        return self._actions.get(event_id)
+
+
+def install():
+    """把本模块注册为 renderdoc，必须在导入插件模块之前调用"""
+    sys.modules["renderdoc"] = sys.modules[__name__]
+    return sys.modules[__name__]
+
+
+class _Extensions:
+    """qrenderdoc.ExtensionManager 的替身，只记录注册的菜单"""
+
+    def __init__(self):
+        self.menus = []
+
+    def RegisterPanelMenu(self, base, submenus, callback):
+        self.menus.append((base, tuple(submenus), callback))
+
+    def RegisterWindowMenu(self, base, submenus, callback):
+        self.menus.append((base, tuple(submenus), callback))
+
+
+class _QtContext:
+    """qrenderdoc.CaptureContext 的替身，只用于扩展注册"""
+
+    def __init__(self):
+        self._extensions = _Extensions()
+        self.viewers = []
+
+    def Extensions(self):
+        return self._extensions
+
+    def AddCaptureViewer(self, viewer):
+        self.viewers.append(viewer)
+
+    def RemoveCaptureViewer(self, viewer):
+        self.viewers.remove(viewer)
+
+
+def install_qrenderdoc():
+    """
+    注册一个最小的 qrenderdoc 替身，只包含扩展注册与模块导入时引用的名称，
+    用于测量扩展加载耗时，不能驱动任何 UI。
+    :return: 可传给扩展 register() 的上下文对象
+    """
+    qrd = types.ModuleType("qrenderdoc")
+    for name in ("CaptureContext", "CaptureViewer", "MiniQtHelper"):
+        setattr(qrd, name, type(name, (), {}))
+    qrd.PanelMenu = enum.IntEnum("PanelMenu", "EventBrowser TextureViewer MeshPreview PipelineStateViewer")
+    qrd.WindowMenu = enum.IntEnum("WindowMenu", "Window Tools")
+    qrd.DockReference = enum.IntEnum("DockReference", "MainToolArea TopOf")
+    sys.modules["qrenderdoc"] = qrd
+    return _QtContext()
+
+
+def load_extension_package():
+    """像 qrenderdoc 一样导入整个扩展包（执行 __init__.py），需先调用 install / install_qrenderdoc"""
+    spec = importlib.util.spec_from_file_location(
+        EXTENSION_PACKAGE, os.path.join(EXTENSION_DIR, "__init__.py"),
+        submodule_search_locations=[EXTENSION_DIR])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules[EXTENSION_PACKAGE] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+def load_extension_module(name):
+    """
+    以合成包的形式导入插件子模块，使插件内的相对导入 (from .utils import ...) 可用，
+    且不会执行依赖 qrenderdoc 的 __init__.py。
+    """
+    if EXTENSION_PACKAGE not in sys.modules:
+        package = types.ModuleType(EXTENSION_PACKAGE)
+        package.__path__ = [EXTENSION_DIR]
+        sys.modules[EXTENSION_PACKAGE] = package
+    return importlib.import_module(f"{EXTENSION_PACKAGE}.{name}")
+
+
+def generate_capture(num_draws=1000, num_textures=200, draws_per_marker=50,
+                     inputs_per_draw=4, seed=1234, filename="fake_capture.rdc",
+                     max_size=2048, duplicate_ratio=0.0):
+    """
+    生成一个合成 capture：按 Marker 分组的 DrawCall 树，每个 Draw 采样若干纹理并写入一个渲染目标。
+    :param max_size:        纹理最大边长
+    :param duplicate_ratio: 内容与另一张纹理完全相同的输入纹理比例
+    :return: (ReplayController, CaptureContext)
+    """
+    rng = random.Random(seed)
+
+    # 纹理：前 4 张作为渲染目标，其余为着色器输入
+    textures = {}
+    resources = []
+    for i in range(num_textures):
+        rid = ResourceId(1000 + i)
+        is_target = i < 4
+        size = rng.choice([s for s in (64, 128, 256, 512, 1024, 2048) if s <= max_size] or [max_size])
+        textures[rid] = TextureDescription(
+            rid, size, size,
+            mips=1 if is_target else max(1, size.bit_length() - 1),
+            format=RGBA16_FLOAT if is_target else RGBA8_UNORM,
+            creationFlags=TextureCategory.ColorTarget if is_target else TextureCategory.ShaderRead,
+        )
+        # 少量 Cube / 2D Array / 3D 纹理
+        if not is_target and i % 17 == 5:
+            textures[rid].arraysize, textures[rid].cubemap = 6, True
+        elif not is_target and i % 23 == 7:
+            textures[rid].arraysize = 4
+        elif not is_target and i % 29 == 9:
+            textures[rid].depth = min(size, 16)
+        resources.append(ResourceDescription(rid, f"Texture_{i}"))
+    target_ids = [rid for rid in textures if textures[rid].creationFlags & TextureCategory.ColorTarget]
+    input_ids = [rid for rid in textures if rid not in target_ids] or target_ids
+
+    # 少量 Fragment Shader 在所有 Draw 之间共享，与真实渲染器一致
+    slot_names = ["_MainTex", "_NormalMap", "_MaskTex", "_NoiseTex", "_DetailTex", "_LightMap", "_ShadowMap", "_Ramp"]
+    shaders = []
+    for i in range(8):
+        shader_id = ResourceId(900000 + i)
+        names = [f"{slot_names[j % len(slot_names)]}{'' if j < len(slot_names) else j}" for j in range(inputs_per_draw)]
+        shaders.append((shader_id, ShaderReflection(shader_id, ShaderStage.Fragment,
+                                                    [ShaderResource(name) for name in names])))
+
+    # 顶点着色器采样高度图，每个 Pass 开头有一次 Compute Dispatch（GPU Driven 剔除 / 生成）
+    # 第一个顶点着色器与第一个像素着色器是同一个模块的不同入口（同一 ResourceId，资源列表不同）
+    vertex_ids = [shaders[0][0], ResourceId(910001)]
+    vertex_shaders = [(rid, ShaderReflection(rid, ShaderStage.Vertex, [ShaderResource("_HeightMap")]))
+                      for rid in vertex_ids]
+    compute_shaders = [(ResourceId(920000 + i), ShaderReflection(ResourceId(920000 + i), ShaderStage.Compute,
+                                                                  [ShaderResource("_InputTex"), ShaderResource("_HiZ")],
+                                                                  [ShaderResource("_Output")]))
+                       for i in range(2)]
+    stage_rng = random.Random(seed + 2)
+
+    usages = {rid: [] for rid in textures}
+    pipelines = {}
+    # 约三成 Draw 不改变渲染目标内容（被遮挡、全部丢弃等），单独的随机数不影响其余生成结果
+    write_rng = random.Random(seed + 1)
+    target_writes = {rid: [] for rid in target_ids}
+    root_actions = []
+    event_id = 1
+    action_id = 1
+    flat = []
+    marker = None
+    for draw in range(num_draws):
+        if draw % draws_per_marker == 0:
+            marker = ActionDescription(event_id, action_id, ActionFlags.PushMarker, name=f"Pass {draw // draws_per_marker}")
+            root_actions.append(marker)
+            event_id += 1
+            action_id += 1
+            dispatch = ActionDescription(event_id, action_id, ActionFlags.Dispatch, name=f"Dispatch {draw // draws_per_marker}")
+            marker.children.append(dispatch)
+            flat.append(dispatch)
+            cs_inputs = stage_rng.sample(input_ids, min(2, len(input_ids)))
+            for rid in cs_inputs:
+                usages[rid].append(EventUsage(event_id, ResourceUsage.CS_Resource))
+            shader_id, reflection = compute_shaders[stage_rng.randrange(len(compute_shaders))]
+            pipelines[event_id] = ({ShaderStage.Compute: (shader_id, cs_inputs, reflection)}, ())
+            event_id += 1
+            action_id += 1
+        flags = ActionFlags.Drawcall | ActionFlags.Indexed if rng.random() < 0.9 else ActionFlags.Drawcall
+        num_indices = rng.randrange(3, 30000, 3)
+        action = ActionDescription(event_id, action_id, flags, num_indices, name=f"Draw {draw}")
+        marker.children.append(action)
+        flat.append(action)
+
+        inputs = rng.sample(input_ids, min(inputs_per_draw, len(input_ids)))
+        for rid in inputs:
+            usages[rid].append(EventUsage(event_id, ResourceUsage.PS_Resource))
+        target = target_ids[(draw // draws_per_marker) % len(target_ids)]
+        usages[target].append(EventUsage(event_id, ResourceUsage.ColorTarget))
+        if write_rng.random() >= 0.3:
+            target_writes[target].append(event_id)
+        shader_id, reflection = shaders[rng.randrange(len(shaders))]
+        stages = {ShaderStage.Fragment: (shader_id, inputs, reflection)}
+        # 约四分之一的 Draw 在顶点着色器采样纹理，其中一半与像素着色器采样同一张
+        if stage_rng.random() < 0.25:
+            vs_input = inputs[0] if stage_rng.random() < 0.5 else stage_rng.choice(input_ids)
+            usages[vs_input].append(EventUsage(event_id, ResourceUsage.VS_Resource))
+            vs_id, vs_reflection = vertex_shaders[stage_rng.randrange(len(vertex_shaders))]
+            stages[ShaderStage.Vertex] = (vs_id, [vs_input], vs_reflection)
+        pipelines[event_id] = (stages, (target,))
+
+        # 每个 action 之间穿插若干非 action 的 API 事件，与真实 capture 的 eventId 分布一致
+        event_id += rng.randint(1, 4)
+        action_id += 1
+
+    for prev, cur in zip(flat, flat[1:]):
+        prev.next = cur
+        cur.previous = prev
+
+    controller = ReplayController(root_actions, resources, textures, usages, pipelines)
+    controller.target_writes = target_writes
+    # 部分输入纹理复用另一张同尺寸纹理的内容（模拟流式拷贝 / 逐帧重复上传）
+    by_size = {}
+    for rid in input_ids:
+        by_size.setdefault(textures[rid].width, []).append(rid)
+    for group in by_size.values():
+        for rid in group[1:]:
+            if rng.random() < duplicate_ratio:
+                controller.content_seeds[rid] = controller.content_seeds.get(group[0], int(group[0]))
+    return controller, CaptureContext(controller, filename)
+
+
+def open_fake_capture(capture_path, num_draws=2000, num_textures=100, max_size=512):
+    """
+    batch_export.run_batch 可用的 open_capture 替身：按文件名生成确定性的合成 capture。
+    :return: (ReplayController, close 回调)
+    """
+    seed = zlib.crc32(os.path.basename(capture_path).encode("utf-8"))
+    controller, _ = generate_capture(num_draws=num_draws, num_textures=num_textures, seed=seed,
+                                     filename=capture_path, max_size=max_size, duplicate_ratio=0.3)
+    return controller, lambda: None
@@ -0,0 +1,255 @@
+"""
+基于 NumPy 的纹理回读与编码：GetTextureData 的原始字节通过 memoryview 零拷贝映射为 ndarray，
+在 Python 侧完成常见格式的解码，并直接从数组写出 PNG / TGA / EXR（DDS 无需解码，见 texture_codec）。
+编码只依赖数组本身，可以在 Replay 线程之外批量、并行完成（zlib 压缩与大块拷贝都会释放 GIL）。
+
+NumPy 是可选依赖：qrenderdoc 内嵌 Python 默认不带 NumPy，未安装时 available() 返回 False，
+find_encoder() 一律返回 None，导出流水线回退到纯 Python 编码或 controller.SaveTexture。
+
+支持的格式：Regular 类型、1~4 通道、每通道 1/2/4 字节的 UNorm / sRGB / SNorm / UInt / SInt / Float，
+含 BGRA 顺序。压缩格式、打包格式（R10G10B10A2 等）与深度格式不在此处理。
+"""
+import struct
+from typing import Callable, Optional
+
+import renderdoc as rd
+
+from .image_formats import PNG_COMPRESS_LEVEL, png_file
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_DTYPE_KINDS = {
+    rd.CompType.UNorm: "u",
+    rd.CompType.UNormSRGB: "u",
+    rd.CompType.UInt: "u",
+    rd.CompType.SNorm: "i",
+    rd.CompType.SInt: "i",
+    rd.CompType.Float: "f",
+}
+
+def available() -> bool:
+    """NumPy 是否可用"""
+    return np is not None
+
+
+def _dtype(fmt):
+    kind = _DTYPE_KINDS.get(fmt.compType)
+    if kind is None or fmt.type != rd.ResourceFormatType.Regular or not 1 <= fmt.compCount <= 4:
+        return None
+    if fmt.compByteWidth not in (1, 2, 4) or (kind == "f" and fmt.compByteWidth == 1):
+        return None
+    return np.dtype(f"<{kind}{fmt.compByteWidth}")
+
+
+def is_supported(fmt) -> bool:
+    """格式能否解码为数组"""
+    return np is not None and _dtype(fmt) is not None
+
+
+def to_array(data, width: int, height: int, fmt) -> "np.ndarray":
+    """
+    将紧密排列的像素数据映射为形状 (height, width, compCount) 的数组。
+    直接引用 data 的缓冲区，不拷贝；GetTextureData 返回 bytes 时数组只读。
+    通道保持存储顺序，BGRA 格式需要 RGBA 顺序时用 rgba_order() 索引。
+    """
+    dtype = _dtype(fmt)
+    if dtype is None:
+        raise ValueError(f"不支持的纹理格式: {fmt.Name()}")
+    count = fmt.compCount
+    pixels = np.frombuffer(memoryview(data), dtype=dtype, count=width * height * count)
+    return pixels.reshape(height, width, count)
+
+
+def rgba_order(fmt) -> list:
+    """存储顺序到 RGBA 顺序的通道索引"""
+    if fmt.compCount >= 3 and fmt.BGRAOrder():
+        return [2, 1, 0, 3][:fmt.compCount]
+    return list(range(fmt.compCount))
+
+
+def to_float(pixels: "np.ndarray", fmt, linear: bool = False) -> "np.ndarray":
+    """
+    转换为 float32：UNorm 归一化到 [0, 1]，SNorm 归一化到 [-1, 1]，整数格式保留原值。
+    :param linear: sRGB 格式是否转换到线性空间（只作用于 RGB，不作用于 Alpha）
+    """
+    comp_type = fmt.compType
+    if comp_type == rd.CompType.Float:
+        return pixels.astype(np.float32, copy=False)
+    if comp_type in (rd.CompType.UNorm, rd.CompType.UNormSRGB):
+        result = pixels.astype(np.float32) / float(np.iinfo(pixels.dtype).max)
+        if linear and comp_type == rd.CompType.UNormSRGB:
+            rgb = result[..., :3]
+            rgb[...] = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+        return result
+    if comp_type == rd.CompType.SNorm:
+        return np.maximum(pixels.astype(np.float32) / float(np.iinfo(pixels.dtype).max), -1.0)
+    return pixels.astype(np.float32)
+
+
+def to_unorm(pixels: "np.ndarray", fmt, bits: int = 8) -> "np.ndarray":
+    """
+    转换为 8 / 16 位无符号整数，用于 PNG / TGA 等整数图片格式。
+    同位宽的 UNorm 数据原样返回；其余先归一化再截断到 [0, 1]。
+    """
+    target = np.uint8 if bits == 8 else np.uint16
+    comp_type = fmt.compType
+    if comp_type in (rd.CompType.UNorm, rd.CompType.UNormSRGB):
+        source_bits = pixels.dtype.itemsize * 8
+        if source_bits == bits:
+            return pixels
+        if source_bits > bits:
+            return (pixels >> (source_bits - bits)).astype(target)
+        return pixels.astype(target) * target(257)
+    if comp_type in (rd.CompType.UInt, rd.CompType.SInt):
+        return np.clip(pixels, 0, np.iinfo(target).max).astype(target)
+    scale = float(np.iinfo(target).max)
+    values = np.clip(to_float(pixels, fmt), 0.0, 1.0)
+    return (values * scale + 0.5).astype(target)
+
+
+def _top_down(pixels: "np.ndarray", bottom_up: bool) -> "np.ndarray":
+    # PNG / EXR 都从第一行开始存储，OpenGL 数据需要上下翻转（视图，不拷贝）
+    return pixels[::-1] if bottom_up else pixels
+
+
+def _rgb_channels(pixels: "np.ndarray", fmt) -> "np.ndarray":
+    """按 RGBA 顺序排列通道；双通道补一个全 0 的 B 通道，与 RenderDoc 保存 RG 纹理的方式一致"""
+    order = rgba_order(fmt)
+    if order != list(range(fmt.compCount)):
+        pixels = pixels[..., order]
+    if fmt.compCount == 2:
+        blue = np.zeros(pixels.shape[:2] + (1,), dtype=pixels.dtype)
+        pixels = np.concatenate((pixels, blue), axis=2)
+    return pixels
+
+
+def encode_tga(data, width: int, height: int, fmt, bottom_up: bool = False) -> bytes:
+    """
+    编码为未压缩 TGA。非 8 位格式先转换为 8 位；1 通道输出灰度图，其余输出 BGR(A)。
+    :param bottom_up: 数据是否从最后一行开始（OpenGL），决定 TGA 的原点标记
+    """
+    pixels = to_unorm(to_array(data, width, height, fmt), fmt, 8)
+    if fmt.compCount == 1:
+        image_type, bpp, alpha_bits = 3, 8, 0
+        out = pixels
+    else:
+        out = _rgb_channels(pixels, fmt)
+        out_count = out.shape[2]
+        # TGA 要求 BGR(A) 顺序
+        out = out[..., [2, 1, 0, 3][:out_count]]
+        image_type, bpp, alpha_bits = 2, out_count * 8, 8 if out_count == 4 else 0
+
+    descriptor = alpha_bits | (0 if bottom_up else 0x20)
+    header = struct.pack("<BBBHHBHHHHBB", 0, 0, image_type, 0, 0, 0, 0, 0, width, height, bpp, descriptor)
+    return header + np.ascontiguousarray(out).tobytes()
+
+
+def encode_png(data, width: int, height: int, fmt, bottom_up: bool = False,
+               level: int = PNG_COMPRESS_LEVEL) -> bytes:
+    """
+    编码为 PNG。16 位 UNorm 保留 16 位精度，其余转换为 8 位；1 通道输出灰度图，其余输出 RGB(A)。
+    每行使用 Up 过滤器，整幅图像一次 zlib 压缩。
+    :param level: zlib 压缩级别 0~9
+    """
+    pixels = to_array(data, width, height, fmt)
+    bits = 16 if fmt.compByteWidth == 2 and fmt.compType in (rd.CompType.UNorm, rd.CompType.UNormSRGB) else 8
+    pixels = _top_down(to_unorm(pixels, fmt, bits), bottom_up)
+    if fmt.compCount == 1:
+        color_type = 0
+    else:
+        pixels = _rgb_channels(pixels, fmt)
+        color_type = 6 if pixels.shape[2] == 4 else 2
+    if bits == 16:
+        pixels = pixels.astype(">u2")
+
+    # 每行开头一个过滤器字节。Up 过滤器（2）存储与上一行同位置字节的差，
+    # 平滑的贴图差值大多接近 0，比 None 过滤器压得更小，zlib 也更快
+    rows = np.ascontiguousarray(pixels).reshape(height, -1).view(np.uint8)
+    raw = np.empty((height, rows.shape[1] + 1), dtype=np.uint8)
+    raw[:, 0] = 2
+    raw[0, 1:] = rows[0]
+    np.subtract(rows[1:], rows[:-1], out=raw[1:, 1:])
+
+    return png_file(width, height, bits, color_type, raw, level)
+
+
+def _exr_attribute(name: str, type_name: str, payload: bytes) -> bytes:
+    return name.encode("ascii") + b"\0" + type_name.encode("ascii") + b"\0" + struct.pack("<i", len(payload)) + payload
+
+
+def encode_exr(data, width: int, height: int, fmt, bottom_up: bool = False, half: bool = False) -> bytes:
+    """
+    编码为无压缩的扫描线 OpenEXR。16 位浮点保存为 HALF，其余保存为 FLOAT；
+    UNorm / SNorm 先归一化，sRGB 转换到线性空间。通道按 R、G、B、A 命名。
+    :param half: 全部保存为 HALF，32 位浮点数据的文件大小减半（超出 ±65504 的值变为无穷大）
+    """
+    pixels = to_array(data, width, height, fmt)
+    if half:
+        if pixels.dtype != np.float16:
+            pixels = to_float(pixels, fmt, linear=True).astype(np.float16)
+    elif not (fmt.compType == rd.CompType.Float and fmt.compByteWidth == 2):
+        pixels = to_float(pixels, fmt, linear=True)
+    pixels = _top_down(pixels, bottom_up)[..., rgba_order(fmt)]
+    pixel_type = 1 if pixels.dtype.itemsize == 2 else 2    # 1 = HALF, 2 = FLOAT
+
+    # EXR 要求通道按名称字母序排列
+    names = "RGBA"[:fmt.compCount]
+    channels = sorted(range(fmt.compCount), key=lambda index: names[index])
+    chlist = b"".join(names[index].encode("ascii") + b"\0" + struct.pack("<iB3xii", pixel_type, 0, 1, 1)
+                      for index in channels) + b"\0"
+    box = struct.pack("<iiii", 0, 0, width - 1, height - 1)
+    header = b"".join((
+        struct.pack("<ii", 20000630, 2),
+        _exr_attribute("channels", "chlist", chlist),
+        _exr_attribute("compression", "compression", b"\0"),
+        _exr_attribute("dataWindow", "box2i", box),
+        _exr_attribute("displayWindow", "box2i", box),
+        _exr_attribute("lineOrder", "lineOrder", b"\0"),
+        _exr_attribute("pixelAspectRatio", "float", struct.pack("<f", 1.0)),
+        _exr_attribute("screenWindowCenter", "v2f", struct.pack("<ff", 0.0, 0.0)),
+        _exr_attribute("screenWindowWidth", "float", struct.pack("<f", 1.0)),
+        b"\0",
+    ))
+
+    # 无压缩时每个块是一行：y、数据长度，然后各通道依次存放整行数据
+    item_size = pixels.dtype.itemsize
+    line_size = width * item_size * fmt.compCount
+    blocks = np.empty((height, 8 + line_size), dtype=np.uint8)
+    block_header = blocks[:, :8].view("<i4")
+    block_header[:, 0] = np.arange(height, dtype=np.int32)
+    block_header[:, 1] = line_size
+    planar = pixels.astype("<f2" if pixel_type == 1 else "<f4", copy=False).transpose(0, 2, 1)[:, channels, :]
+    blocks[:, 8:] = np.ascontiguousarray(planar).reshape(height, -1).view(np.uint8)
+
+    first_block = len(header) + 8 * height
+    offsets = first_block + np.arange(height, dtype="<u8") * (8 + line_size)
+    return header + offsets.tobytes() + blocks.tobytes()
+
+
+def find_encoder(fmt, file_type) -> Optional[Callable]:
+    """
+    返回 encoder(data, width, height, fmt, bottom_up) -> bytes；
+    未安装 NumPy、格式或文件类型不支持时返回 None。
+    """
+    if not is_supported(fmt):
+        return None
+    if file_type == rd.FileType.TGA:
+        return encode_tga
+    if file_type == rd.FileType.PNG:
+        return encode_png
+    if file_type == rd.FileType.EXR:
+        return encode_exr
+    return None
+
+
+def read_texture(controller, resource_id, texture, mip: int = 0, slice_index: int = 0) -> "np.ndarray":
+    """
+    回读一个子资源并映射为数组 (height, width, compCount)，供脚本批量处理；必须在 Replay 线程调用。
+    返回的数组引用回读缓冲区，转换、编码可以交给其他线程完成。
+    """
+    width, height = max(1, texture.width >> mip), max(1, texture.height >> mip)
+    data = controller.GetTextureData(resource_id, rd.Subresource(mip, slice_index, 0))
+    return to_array(data, width, height, texture.format)
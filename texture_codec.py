@@ -0,0 +1,136 @@
+import functools
+import struct
+from typing import Callable, Optional
+
+import renderdoc as rd
+
+from . import texture_array
+from .image_formats import PNG_COMPRESS_LEVEL, dds_header, dxgi_format, is_block_compressed, png_file, subresource_size
+
+
+def is_unorm8(fmt) -> bool:
+    """是否为每通道 8bit 的常规 UNorm/sRGB 格式（R8、R8G8、R8G8B8、R8G8B8A8、B8G8R8A8）"""
+    return (
+        fmt.type == rd.ResourceFormatType.Regular
+        and fmt.compByteWidth == 1
+        and fmt.compType in (rd.CompType.UNorm, rd.CompType.UNormSRGB)
+        and 1 <= fmt.compCount <= 4
+    )
+
+
+def bytes_per_pixel(fmt) -> int:
+    """常规格式每像素字节数"""
+    return fmt.compCount * fmt.compByteWidth
+
+
+def _rows(data, row_bytes: int, height: int, bottom_up: bool):
+    """按行切分（memoryview 切片不拷贝），bottom_up 时倒序，得到从第一行开始的行序列"""
+    src = memoryview(data)
+    order = range(height - 1, -1, -1) if bottom_up else range(height)
+    return [src[y * row_bytes:(y + 1) * row_bytes] for y in order]
+
+
+def _rgb_bytes(data, width: int, height: int, fmt) -> bytes:
+    """8bit 像素转为 RGB(A) 顺序；双通道补一个全 0 的 B 通道，与 RenderDoc 保存 RG 纹理的方式一致"""
+    count = fmt.compCount
+    src = memoryview(data)
+    if count == 4 and not fmt.BGRAOrder():
+        return src
+    out_count = 4 if count == 4 else 3
+    out = bytearray(width * height * out_count)
+    if count == 2:
+        out[0::3] = src[0::2]
+        out[1::3] = src[1::2]
+    else:
+        red, blue = (2, 0) if fmt.BGRAOrder() else (0, 2)
+        out[0::out_count] = src[red::count]
+        out[1::out_count] = src[1::count]
+        out[2::out_count] = src[blue::count]
+        if count == 4:
+            out[3::4] = src[3::4]
+    return out
+
+
+def encode_tga(data, width: int, height: int, fmt, bottom_up: bool = False) -> bytes:
+    """
+    将 8bit UNorm 原始像素编码为未压缩 TGA。
+    通道重排全部使用切片赋值，在 C 层完成，不逐像素循环。
+    :param data:      GetTextureData 返回的紧密排列像素数据
+    :param bottom_up: 数据是否从最后一行开始（OpenGL），决定 TGA 的原点标记
+    """
+    count = fmt.compCount
+    src = memoryview(data)
+    if count == 1:
+        image_type, bpp, alpha_bits = 3, 8, 0
+        pixels = bytes(src)
+    else:
+        # TGA 要求 BGR(A) 顺序
+        out_count = 4 if count == 4 else 3
+        out = bytearray(width * height * out_count)
+        if count == 2:
+            out[1::3] = src[1::2]
+            out[2::3] = src[0::2]
+        else:
+            red, blue = (2, 0) if fmt.BGRAOrder() else (0, 2)
+            out[0::out_count] = src[blue::count]
+            out[1::out_count] = src[1::count]
+            out[2::out_count] = src[red::count]
+            if count == 4:
+                out[3::4] = src[3::4]
+        image_type, bpp, alpha_bits = 2, out_count * 8, 8 if out_count == 4 else 0
+        pixels = out
+
+    descriptor = alpha_bits | (0 if bottom_up else 0x20)
+    header = struct.pack("<BBBHHBHHHHBB", 0, 0, image_type, 0, 0, 0, 0, 0, width, height, bpp, descriptor)
+    return header + bytes(pixels)
+
+
+def encode_png(data, width: int, height: int, fmt, bottom_up: bool = False,
+               level: int = PNG_COMPRESS_LEVEL) -> bytes:
+    """
+    将 8bit UNorm 原始像素编码为 PNG。1 通道输出灰度图，其余输出 RGB(A)；每行使用 None 过滤器。
+    :param level: zlib 压缩级别 0~9，越低越快、文件越大
+    """
+    if fmt.compCount == 1:
+        pixels, color_type, channels = data, 0, 1
+    else:
+        pixels = _rgb_bytes(data, width, height, fmt)
+        channels = 4 if fmt.compCount == 4 else 3
+        color_type = 6 if channels == 4 else 2
+    rows = _rows(pixels, width * channels, height, bottom_up)
+    # 每行开头一个过滤器字节（0 = None）
+    filtered = b"\0" + b"\0".join(rows)
+    return png_file(width, height, 8, color_type, filtered, level)
+
+
+def encode_dds(data, width: int, height: int, fmt, bottom_up: bool = False) -> bytes:
+    """
+    编码为 DDS，数据原样写入，不做任何解码。
+    BC 压缩数据无法按行翻转（一个块跨 4 行），保持回读时的存储顺序；常规格式在 bottom_up 时按行翻转。
+    """
+    dxgi = dxgi_format(fmt)
+    if is_block_compressed(fmt):
+        size = subresource_size(fmt, width, height)
+        return dds_header(width, height, dxgi, True, size) + bytes(memoryview(data)[:size])
+    pitch = width * bytes_per_pixel(fmt)
+    rows = _rows(data, pitch, height, bottom_up)
+    return dds_header(width, height, dxgi, False, pitch) + b"".join(rows)
+
+
+def find_encoder(fmt, file_type, options: Optional[dict] = None) -> Optional[Callable]:
+    """
+    返回能在 Replay 线程之外完成编码的函数 encoder(data, width, height, fmt, bottom_up) -> bytes，
+    安装了 NumPy 时优先使用 texture_array（支持的格式更多，通道重排也更快），否则只处理 8bit UNorm 的 TGA / PNG。
+    DDS 不需要解码，任何能用 DXGI 表示的格式（含 BC1~BC7）都直接写入。
+    不支持的格式返回 None，由调用方回退到 controller.SaveTexture。
+    :param options: 传给编码函数的关键字参数，例如 PNG 的 {"level": 1}、EXR 的 {"half": True}
+    """
+    if file_type == rd.FileType.DDS:
+        encoder = encode_dds if dxgi_format(fmt) is not None else None
+    else:
+        encoder = texture_array.find_encoder(fmt, file_type)
+        if encoder is None and is_unorm8(fmt):
+            encoder = {rd.FileType.TGA: encode_tga, rd.FileType.PNG: encode_png}.get(file_type)
+    if encoder is not None and options:
+        encoder = functools.partial(encoder, **options)
+    return encoder
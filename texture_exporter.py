@@ -21,12 +21,32 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 ###############################################################################
+import json
 import os
 import subprocess
 import renderdoc as rd
-from typing import List
+from typing import List, Optional
 
-from .utils import TextureSaver
+from . import profiling
+from .binding_cache import ALL_STAGES, GRAPHICS_STAGES, BindingCache, BindingSnapshot, stages_for_action
+from .utils import TextureSaver, _safe_tex_name
+from .export_pipeline import TextureWritePipeline
+from .export_progress import ExportCancelled, ExportProgress
+
+# 范围导出目录内的清单文件名
+RANGE_MANIFEST_NAME = "range_manifest.json"
+
+# 反射缺失时各阶段的默认变量名前缀
+_STAGE_PREFIXES = {
+    int(getattr(rd.ShaderStage, name)): prefix
+    for name, prefix in (("Vertex", "VS"), ("Hull", "HS"), ("Domain", "DS"), ("Geometry", "GS"),
+                         ("Pixel", "FS"), ("Compute", "CS"), ("Task", "TS"), ("Mesh", "MS"))
+    if hasattr(rd.ShaderStage, name)
+}
+# 导出顺序：Fragment 最先，重名时 Fragment 的变量保持原名，与只导出 Fragment 时的文件名一致
+_EXPORT_STAGES = (rd.ShaderStage.Fragment,) + tuple(
+    stage for stage in ALL_STAGES if int(stage) != int(rd.ShaderStage.Fragment)
+)
 
 
 class TextureExporter:
@@ -44,58 +64,288 @@ class TextureExporter:
         self.open_directory = selected
         return self.open_directory
 
-    def _build_slot_var_map(self, state: rd.PipeState) -> dict:
+    @staticmethod
+    def _unique_name(name_counter: dict, var_name: str) -> str:
+        """同一个 Draw 内变量名重复时自动追加 _1/_2 后缀"""
+        if var_name in name_counter:
+            name_counter[var_name] += 1
+            return f"{var_name}_{name_counter[var_name]}"
+        name_counter[var_name] = 0
+        return var_name
+
+    def _action_stages(self, event_id: int) -> tuple:
+        """事件对应 Action 使用的 shader 阶段；不是 Action 的事件按图形管线处理"""
+        action = self.capture_ctx.GetAction(int(event_id))
+        return stages_for_action(action.flags) if action is not None else GRAPHICS_STAGES
+
+    def _draw_bindings(self, snapshot: BindingSnapshot, stages) -> list:
         """
-        通过 ShaderReflection 枚举顺序构建 slot_idx -> shader 变量名 的映射。
-        refl.readOnlyResources 的枚举顺序与 GetReadOnlyResources 返回列表顺序一致。
+        事件快照中 stages 各阶段绑定的只读资源，返回 [(阶段前缀, slot_idx, 变量名, ResourceId), ...]。
+        变量名在整个事件内唯一，不同阶段的同名变量追加 _1/_2 后缀；同一纹理可能出现多次。
+        :param stages: 该事件实际使用的阶段（见 _action_stages），快照中其余阶段是残留的旧绑定
         """
-        slot_map = {}
-        refl: rd.ShaderReflection = state.GetShaderReflection(rd.ShaderStage.Fragment)
-        if refl is None:
-            return slot_map
-        for slot_idx, res in enumerate(refl.readOnlyResources):
-            slot_map[slot_idx] = res.name
-        return slot_map
-
-    # 导出当前 DrawCall 绑定的所有 Fragment Shader 输入纹理
-    def save_current_draw_textures(self, controller: rd.ReplayController):
-        event_id = str(int(self.capture_ctx.CurSelectedEvent()))
-        state: rd.PipeState = controller.GetPipelineState()
-
-        # slot_idx -> shader 变量名（枚举顺序与 GetReadOnlyResources 一致）
-        slot_var_map = self._build_slot_var_map(state)
+        stages = {int(stage) for stage in stages}
+        name_counter: dict = {}
+        bindings = []
+        for stage in _EXPORT_STAGES:
+            if int(stage) not in stages:
+                continue
+            stage_bindings = snapshot.get(stage)
+            if stage_bindings is None:
+                continue
+            prefix = _STAGE_PREFIXES[int(stage)]
+            for slot_idx, var_name, resource_id in stage_bindings:
+                if resource_id == rd.ResourceId.Null():
+                    continue
+                unique_name = self._unique_name(name_counter, var_name or f"{prefix}{slot_idx}")
+                bindings.append((prefix, slot_idx, unique_name, resource_id))
+        return bindings
 
-        # 获取 Fragment Shader 绑定的所有只读资源
-        used_descriptor_list: List[rd.UsedDescriptor] = state.GetReadOnlyResources(
-            rd.ShaderStage.Fragment
-        )
+    @staticmethod
+    def _link_files(file_name: str, files: List[str], dst_dir: str, link_name: str) -> Optional[List[str]]:
+        """
+        为一张纹理的各子资源文件创建以 link_name 开头的硬链接，子资源后缀与扩展名沿用原文件。
+        :param file_name: 原文件名中子资源后缀之前的部分
+        :return: 链接路径；文件系统不支持硬链接时返回 None
+        """
+        links = []
+        for src in files:
+            tail = os.path.basename(src)[len(file_name):]
+            dst = os.path.join(dst_dir, f"{_safe_tex_name(link_name)}{tail}")
+            try:
+                os.makedirs(dst_dir, exist_ok=True)
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                os.link(src, dst)
+            except OSError:
+                return None
+            links.append(dst)
+        return links
 
-        folder_path = os.path.join(self.open_directory, event_id)
+    # 导出当前 DrawCall / Dispatch 所有阶段绑定的输入纹理
+    def save_current_draw_textures(self, controller: rd.ReplayController):
+        event_id = int(self.capture_ctx.CurSelectedEvent())
+        folder_path = os.path.join(self.open_directory, str(event_id))
+        # 开启性能统计时报告写到导出目录
+        with profiling.run(f"draw_{event_id}", folder_path):
+            # 选中的事件（例如 Marker，或选择已变化而 UI 的回放请求还排在本任务之后）不一定是回放所在的事件，
+            # 先回放到选中的事件，缓存的快照与纹理回读都与 event_id 对应；之前查询过的事件直接使用缓存的绑定
+            with profiling.timer("replay.SetFrameEvent"):
+                controller.SetFrameEvent(event_id, False)
+            try:
+                stages = self._action_stages(event_id)
+                snapshot = BindingCache.get(self.capture_ctx, controller).snapshot(controller, event_id, seek=False,
+                                                                                   stages=stages)
 
-        # 检测重名：记录每个文件名出现的次数，重名时自动追加 _1/_2 后缀
-        name_counter: dict = {}
-        texture_count = 0
-
-        for slot_idx, used_descriptor in enumerate(used_descriptor_list):
-            descriptor = used_descriptor.descriptor
-            var_name = slot_var_map.get(slot_idx, f"FS{slot_idx}")
-
-            # 处理重名
-            if var_name in name_counter:
-                name_counter[var_name] += 1
-                unique_name = f"{var_name}_{name_counter[var_name]}"
-            else:
-                name_counter[var_name] = 0
-                unique_name = var_name
-
-            if TextureSaver.save_texture(
-                self.capture_ctx, controller,
-                descriptor.resource, folder_path, unique_name
-            ):
-                texture_count += 1
+                # 获取所有阶段绑定的只读资源，重名变量自动追加 _1/_2 后缀；
+                # 同一纹理绑定到多个阶段 / slot 时只回读一次，其余变量名为硬链接
+                texture_count = 0
+                exported = {}   # int(ResourceId) -> (文件名, 子资源文件)
+                aliases = []
+                with TextureWritePipeline() as pipeline:
+                    for prefix, slot_idx, unique_name, resource_id in self._draw_bindings(snapshot, stages):
+                        key = int(resource_id)
+                        if key in exported:
+                            aliases.append((exported[key], unique_name))
+                            continue
+                        out_paths = []
+                        if TextureSaver.save_texture(
+                            self.capture_ctx, controller,
+                            resource_id, folder_path, unique_name,
+                            pipeline=pipeline, out_paths=out_paths
+                        ):
+                            texture_count += 1
+                        exported[key] = (_safe_tex_name(unique_name), out_paths)
+            finally:
+                # 回到 UI 当前事件，与界面显示保持一致
+                with profiling.timer("replay.SetFrameEvent"):
+                    controller.SetFrameEvent(self.capture_ctx.CurEvent(), False)
+            # 流水线关闭后文件都已写完，再创建链接
+            for (file_name, files), unique_name in aliases:
+                if files and self._link_files(file_name, files, folder_path, unique_name) is None:
+                    print(f"[TextureExporter] 无法创建硬链接: {unique_name} -> {file_name}")
 
         # 导出完成日志（不调用 MessageDialog，避免 Replay 线程死锁）
         print(f"[TextureExporter] Export Complete — EventID={event_id}, "
               f"Total={texture_count} textures -> {folder_path}")
         # 打开导出目录（非阻塞）
-        subprocess.Popen(f'explorer "{os.path.normpath(folder_path)}"')
\ No newline at end of file
+        subprocess.Popen(f'explorer "{os.path.normpath(folder_path)}"')
+
+    def save_range_textures(self, controller: rd.ReplayController, event_ids: List[int], folder_path: str,
+                            progress: Optional[ExportProgress] = None) -> int:
+        """
+        一次回放导出一段事件中每个 DrawCall / Dispatch 所用阶段（见 stages_for_action）绑定的输入纹理。
+        事件按 eventId 升序依次 SetFrameEvent，回放只向前推进，不会为每个 Draw 从帧首重放；
+        绑定取自 BindingCache，已缓存的事件只在有纹理需要回读时才回放；
+        每张纹理只在第一次用到时回读写入 textures/，各事件的绑定以硬链接 events/<eventId>/<变量名>
+        和 range_manifest.json 记录（文件系统不支持硬链接时只写清单）。
+        导出完成后回放回到 UI 当前事件。
+        :param event_ids:   要导出的事件，通常为 ControllerDataStats.get_event_ids_in_range_by_actionid 的结果
+        :param folder_path: 导出目录
+        :param progress:    进度与取消令牌，按事件推进，两个事件之间检查取消
+        :return: 导出的纹理数量（去重后）
+        """
+        event_ids = sorted(set(event_ids))
+        textures_dir = os.path.join(folder_path, "textures")
+        # int(ResourceId) -> 纹理清单项；未导出（渲染目标、非纹理）的资源 files 为空
+        textures = {}
+        # eventId -> [(阶段前缀, slot_idx, 变量名, int(ResourceId))]
+        events = {}
+        if progress is not None:
+            progress.start(len(event_ids))
+        cache = BindingCache.get(self.capture_ctx, controller)
+        replay_event = None     # 本次导出中回放停留的事件，未移动过时为 None
+
+        with profiling.run(f"range_{event_ids[0]}_{event_ids[-1]}" if event_ids else "range", folder_path):
+            with TextureWritePipeline() as pipeline:
+                try:
+                    for event_id in event_ids:
+                        if progress is not None:
+                            progress.check_cancelled()
+                        # 未命中时回放到该事件
+                        stages = self._action_stages(event_id)
+                        misses = cache.misses
+                        snapshot = cache.snapshot(controller, event_id, stages=stages)
+                        if cache.misses != misses:
+                            replay_event = event_id
+                        bindings = []
+                        for prefix, slot_idx, unique_name, resource_id in self._draw_bindings(snapshot, stages):
+                            key = int(resource_id)
+                            entry = textures.get(key)
+                            if entry is None:
+                                # 绑定来自缓存时回放不在该事件，回读前先推进到该事件，
+                                # 纹理内容与逐 Draw 导出时一致；事件升序，仍然只向前推进
+                                if replay_event != event_id:
+                                    with profiling.timer("replay.SetFrameEvent"):
+                                        controller.SetFrameEvent(event_id, False)
+                                    replay_event = event_id
+                                entry = self._save_range_texture(controller, resource_id, textures_dir,
+                                                                 pipeline, event_id)
+                                textures[key] = entry
+                            if entry["files"]:
+                                bindings.append((prefix, slot_idx, unique_name, key))
+                        events[event_id] = bindings
+                        if progress is not None:
+                            progress.advance()
+                except ExportCancelled:
+                    print(f"[TextureExporter] 范围导出已取消，已完成 {len(events)}/{len(event_ids)} 个事件")
+                finally:
+                    # 回放移动过时回到 UI 当前事件，与界面显示保持一致
+                    if replay_event is not None:
+                        with profiling.timer("replay.SetFrameEvent"):
+                            controller.SetFrameEvent(self.capture_ctx.CurEvent(), False)
+            # 流水线关闭后纹理文件都已写完，再创建各事件的链接
+            with profiling.timer("fs.range_links"):
+                manifest = self._write_range_links(folder_path, textures, events)
+        if progress is not None:
+            progress.finish()
+
+        manifest["eventIds"] = sorted(events)
+        os.makedirs(folder_path, exist_ok=True)
+        with open(os.path.join(folder_path, RANGE_MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        return sum(1 for entry in textures.values() if entry["files"])
+
+    def _save_range_texture(self, controller, resource_id, textures_dir: str, pipeline, event_id: int) -> dict:
+        """导出范围内第一次用到的纹理，文件名带资源 ID，避免不同资源同名互相覆盖"""
+        resource_desc = self.capture_ctx.GetResource(resource_id)
+        name = resource_desc.name if (resource_desc and resource_desc.name) else ""
+        tex_name = f"{name}_{int(resource_id)}" if name else str(int(resource_id))
+        out_paths = []
+        TextureSaver.save_texture(self.capture_ctx, controller, resource_id, textures_dir, tex_name,
+                                  pipeline=pipeline, out_paths=out_paths)
+        return {"name": name, "fileName": _safe_tex_name(tex_name), "firstEventId": event_id, "files": out_paths}
+
+    @staticmethod
+    def _write_range_links(folder_path: str, textures: dict, events: dict) -> dict:
+        """为每个事件的绑定创建硬链接，返回范围清单；第一次链接失败后不再尝试，只记录清单"""
+        can_link = True
+        manifest_events = {}
+        for event_id, bindings in events.items():
+            event_dir = os.path.join(folder_path, "events", str(event_id))
+            rows = []
+            for prefix, slot_idx, unique_name, key in bindings:
+                entry = textures[key]
+                links = None
+                if can_link:
+                    links = TextureExporter._link_files(entry["fileName"], entry["files"], event_dir, unique_name)
+                    can_link = links is not None
+                rows.append({"stage": prefix, "slot": slot_idx, "name": unique_name, "resourceId": key,
+                             "links": [os.path.relpath(path, folder_path) for path in links or ()]})
+            manifest_events[str(event_id)] = rows
+        manifest_textures = {
+            str(key): {"name": entry["name"], "firstEventId": entry["firstEventId"],
+                       "files": [os.path.relpath(path, folder_path) for path in entry["files"]]}
+            for key, entry in textures.items() if entry["files"]
+        }
+        return {"textures": manifest_textures, "events": manifest_events}
+
+    def save_range_target_snapshots(self, controller: rd.ReplayController, actions, folder_path: str,
+                                    progress: Optional[ExportProgress] = None) -> int:
+        """
+        导出每个 DrawCall 执行后其渲染目标（ActionData.outputsTextures，含深度）的快照，用于查看画面逐步构建的过程。
+        事件按 eventId 升序回放，只向前推进；每个事件只回读它写入的目标，
+        内容与该目标上一次快照相同（被遮挡、全部丢弃的 Draw）时不写文件。
+        快照写到 <folder_path>/<目标名>_<资源 ID>/<eventId>.<ext>，按文件名排序即为该目标的构建序列，
+        每个事件写出了哪些快照记录在 range_manifest.json。
+        :param actions:     要导出的 ActionData，通常为统计窗口所选范围内的 DrawCall
+        :param folder_path: 导出目录
+        :param progress:    进度与取消令牌，按事件推进，两个事件之间检查取消
+        :return: 写出的快照数量（按子资源计）
+        """
+        actions = sorted(actions, key=lambda action: action.eventId)
+        # eventId 补零到相同位数，文件名排序与回放顺序一致
+        width = len(str(actions[-1].eventId)) if actions else 1
+        targets = {}    # int(ResourceId) -> 目标目录名
+        events = {}
+        snapshot_count = 0
+        if progress is not None:
+            progress.start(len(actions))
+
+        name = f"snapshots_{actions[0].eventId}_{actions[-1].eventId}" if actions else "snapshots"
+        with profiling.run(name, folder_path):
+            with TextureWritePipeline(changed_only=True) as pipeline:
+                try:
+                    for action in actions:
+                        if progress is not None:
+                            progress.check_cancelled()
+                        event_id = action.eventId
+                        outputs = action.outputsTextures
+                        if outputs:
+                            with profiling.timer("replay.SetFrameEvent"):
+                                controller.SetFrameEvent(event_id, False)
+                        rows = []
+                        for tex in outputs:
+                            key = int(tex.resourceId)
+                            target_dir = targets.get(key)
+                            if target_dir is None:
+                                resource_desc = self.capture_ctx.GetResource(tex.resourceId)
+                                target_name = resource_desc.name if (resource_desc and resource_desc.name) else "RT"
+                                target_dir = targets[key] = _safe_tex_name(f"{target_name}_{key}")
+                            out_paths = []
+                            TextureSaver.save_texture(self.capture_ctx, controller, tex.resourceId,
+                                                      os.path.join(folder_path, target_dir), f"{event_id:0{width}d}",
+                                                      export_renderbuffer=True, pipeline=pipeline,
+                                                      out_paths=out_paths)
+                            snapshot_count += len(out_paths)
+                            rows.append({"resourceId": key, "changed": bool(out_paths),
+                                         "files": [os.path.relpath(path, folder_path) for path in out_paths]})
+                        events[str(event_id)] = rows
+                        if progress is not None:
+                            progress.advance()
+                except ExportCancelled:
+                    print(f"[TextureExporter] 快照导出已取消，已完成 {len(events)}/{len(actions)} 个事件")
+                finally:
+                    # 回放回到 UI 当前事件，与界面显示保持一致
+                    with profiling.timer("replay.SetFrameEvent"):
+                        controller.SetFrameEvent(self.capture_ctx.CurEvent(), False)
+        if progress is not None:
+            progress.finish()
+
+        manifest = {"eventIds": [int(event_id) for event_id in events],
+                    "targets": {str(key): target_dir for key, target_dir in targets.items()},
+                    "events": events}
+        os.makedirs(folder_path, exist_ok=True)
+        with open(os.path.join(folder_path, RANGE_MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        return snapshot_count
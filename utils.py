@@ -1,8 +1,19 @@
 import sys
 import os
+import heapq
 import renderdoc
-from typing import Set, Optional
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from typing import List, Optional
 from typing import Dict
+from . import profiling, stats_cache
+from .export_archive import ARCHIVE_SUFFIX
+from .export_format import ExportFormatPolicy
+from .export_manifest import RESOLVE_SAMPLE_INDEX
+from .export_pipeline import TextureWritePipeline
+from .export_progress import ExportCancelled, ExportProgress
+from .foreach_actions import PassIndex, RenderPass
 rd = renderdoc
 ResourceUsage = rd.ResourceUsage
 
@@ -25,6 +36,10 @@ OUTPUT_RESOURCE_USAGES = [
     ResourceUsage.DepthStencilTarget,
 ]
 
+# 以整数存储的 usage 集合，便于在紧凑的使用表中做成员判断
+_INPUT_USAGE_IDS = frozenset(int(u) for u in INPUT_RESOURCE_USAGES)
+_OUTPUT_USAGE_IDS = frozenset(int(u) for u in OUTPUT_RESOURCE_USAGES)
+
 # Cube Map 面名称
 CUBE_FACE_NAMES = ["X+", "X-", "Y+", "Y-", "Z+", "Z-"]
 
@@ -34,114 +49,595 @@ def get_filename_without_extension(path):
     file_name, extension = os.path.splitext(base_name)  # 分割文件名和扩展名
     return file_name
 
-class ActionData:
-    def __init__(self, action):
-        self.action = action
-        self.actionId: int = action.actionId
-        self.eventId: int = action.eventId
-        self.flags = action.flags
-        self.numIndices: int = action.numIndices
-        self.meshNum: float = action.numIndices / 3 if action.flags & rd.ActionFlags.Drawcall and action.flags & rd.ActionFlags.Indexed else 0
-        self.inputsTextures: Set[TextureData] = set()
-        self.outputsTextures: Set[TextureData] = set()
+def format_bytes(size: float) -> str:
+    """字节数转为易读字符串"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.2f} {unit}"
+        size /= 1024
+
+
+def _format_type_table(names_and_values):
+    """ResourceFormatType 名称 -> int 值；不同 RenderDoc 版本的枚举成员不完全一致，缺失的直接忽略"""
+    table = {}
+    for name, value in names_and_values:
+        member = getattr(rd.ResourceFormatType, name, None)
+        if member is not None:
+            table[int(member)] = value
+    return table
+
+
+# 块压缩格式：(块宽, 块高, 每块字节数)；ETC2/EAC 的字节数由通道数决定，ASTC 的块尺寸从格式名解析
+_BLOCK_FORMATS = _format_type_table([
+    ("BC1", (4, 4, 8)), ("BC4", (4, 4, 8)),
+    ("BC2", (4, 4, 16)), ("BC3", (4, 4, 16)), ("BC5", (4, 4, 16)), ("BC6", (4, 4, 16)), ("BC7", (4, 4, 16)),
+    ("ETC2", (4, 4, 8)), ("EAC", (4, 4, 8)), ("ASTC", (4, 4, 16)), ("PVRTC", (4, 4, 8)),
+])
+
+# 打包格式每像素字节数（深度模板格式按 GPU 实际存储的对齐大小计算）
+_PACKED_FORMAT_BYTES = _format_type_table([
+    ("R10G10B10A2", 4), ("R11G11B10", 4), ("R9G9B9E5", 4),
+    ("R5G6B5", 2), ("R5G5B5A1", 2), ("R4G4B4A4", 2), ("R4G4", 1), ("A8", 1),
+    ("D16S8", 4), ("D24S8", 4), ("D32S8", 8), ("S8", 1),
+])
+
+
+_ETC2_TYPE = int(getattr(rd.ResourceFormatType, "ETC2", -1))
+_EAC_TYPE = int(getattr(rd.ResourceFormatType, "EAC", -1))
+_ASTC_TYPE = int(getattr(rd.ResourceFormatType, "ASTC", -1))
+
+
+def _block_layout(fmt):
+    """返回 (块宽, 块高, 每块字节数)，非压缩格式的块为 1x1"""
+    fmt_type = int(fmt.type)
+    block = _BLOCK_FORMATS.get(fmt_type)
+    if block is not None:
+        block_w, block_h, block_bytes = block
+        if fmt_type == _ETC2_TYPE and fmt.compCount == 4:
+            block_bytes = 16
+        elif fmt_type == _EAC_TYPE:
+            block_bytes = 8 * max(1, fmt.compCount)
+        elif fmt_type == _ASTC_TYPE:
+            # 形如 ASTC_6x6_UNORM
+            for token in fmt.Name().split("_"):
+                dims = token.split("x")
+                if len(dims) == 2 and dims[0].isdigit() and dims[1].isdigit():
+                    block_w, block_h = int(dims[0]), int(dims[1])
+                    break
+        return block_w, block_h, block_bytes
+    packed = _PACKED_FORMAT_BYTES.get(fmt_type)
+    if packed is not None:
+        return 1, 1, packed
+    return 1, 1, fmt.compCount * fmt.compByteWidth
+
+
+def texture_byte_size(texture) -> int:
+    """
+    估算纹理的 GPU 内存占用（字节）：完整 mip 链 × 数组大小 × MSAA 采样数，
+    块压缩格式按块向上取整。不含驱动的对齐与元数据开销。
+    """
+    block_w, block_h, block_bytes = _block_layout(texture.format)
+    total = 0
+    for mip in range(max(1, texture.mips)):
+        width = max(1, texture.width >> mip)
+        height = max(1, texture.height >> mip)
+        depth = max(1, texture.depth >> mip)
+        blocks = ((width + block_w - 1) // block_w) * ((height + block_h - 1) // block_h)
+        total += blocks * block_bytes * depth
+    return total * max(1, texture.arraysize) * max(1, texture.msSamp)
+
+
+def subresource_byte_size(texture, mip: int) -> int:
+    """单个子资源（一个 mip 的一个切片 / 深度层 / 采样）的数据量估算"""
+    block_w, block_h, block_bytes = _block_layout(texture.format)
+    width = max(1, texture.width >> mip)
+    height = max(1, texture.height >> mip)
+    return ((width + block_w - 1) // block_w) * ((height + block_h - 1) // block_h) * block_bytes
+
 
 class TextureData:
+    """统计用到的纹理字段；不持有 TextureDescription，纹理很多时每张只占固定的几个槽位"""
+
+    __slots__ = ("resourceId", "width", "height", "depth", "arraysize", "mips", "msSamp",
+                 "creationFlags", "formatName", "byteSize")
+
     def __init__(self, resource_id, texture: rd.TextureDescription):
         self.resourceId = resource_id
-        self.texture = texture
-        self.width = texture.width
-        self.height = texture.height
-        self.format = texture.format
+        self.width: int = texture.width
+        self.height: int = texture.height
+        self.depth: int = texture.depth
+        self.arraysize: int = texture.arraysize
+        self.mips: int = texture.mips
+        self.msSamp: int = texture.msSamp
         self.creationFlags = texture.creationFlags
-        self.arraysize = texture.arraysize
-        self.depth = texture.depth
-        self.mips = texture.mips
-        self.msSamp = texture.msSamp
+        self.formatName: str = texture.format.Name()
+        self.byteSize: int = texture_byte_size(texture)  # 预计算，范围统计时直接求和
+
+
+class ActionData:
+    """
+    ControllerDataStats 列式存储中一行的只读视图，访问时按需创建，不常驻内存。
+    inputsTextures / outputsTextures 为该 Action 去重后的 TextureData 元组。
+    """
+
+    __slots__ = ("_stats", "_row")
+
+    def __init__(self, stats: "ControllerDataStats", row: int):
+        self._stats = stats
+        self._row = row
+
+    @property
+    def actionId(self) -> int:
+        return self._stats._action_ids[self._row]
+
+    @property
+    def eventId(self) -> int:
+        return self._stats._event_ids[self._row]
+
+    @property
+    def flags(self) -> int:
+        return self._stats._flags[self._row]
+
+    @property
+    def numIndices(self) -> int:
+        return self._stats._num_indices[self._row]
+
+    @property
+    def meshNum(self) -> float:
+        return self._stats._meshnums[self._row]
+
+    @property
+    def inputsTextures(self) -> tuple:
+        return self._stats._row_textures(self._stats._input_offsets, self._stats._input_ids, self._row)
+
+    @property
+    def outputsTextures(self) -> tuple:
+        return self._stats._row_textures(self._stats._output_offsets, self._stats._output_ids, self._row)
+
+    def __eq__(self, other):
+        return isinstance(other, ActionData) and self._stats is other._stats and self._row == other._row
+
+    def __hash__(self):
+        return hash((id(self._stats), self._row))
+
+
+class _ActionMap(Mapping):
+    """
+    eventId / actionId -> ActionData 的只读映射。
+    键为有序数组，查找是一次二分查找，不为每个 Action 保存字典项。
+    """
+
+    def __init__(self, stats: "ControllerDataStats", keys: array, rows: Optional[array] = None):
+        """
+        :param keys: 升序排列的键
+        :param rows: keys[i] 对应的行号，None 表示行号即下标
+        """
+        self._stats = stats
+        self._keys = keys
+        self._rows = rows
+
+    def _find(self, key):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return i if self._rows is None else self._rows[i]
+        return None
+
+    def __getitem__(self, key) -> ActionData:
+        row = self._find(key)
+        if row is None:
+            raise KeyError(key)
+        return ActionData(self._stats, row)
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def _build_csr(keys: array, num_rows: int, stride: int):
+    """
+    把 row * stride + column 编码的键（可重复）转为 CSR：offsets[row]:offsets[row + 1] 为该行去重后的列。
+    :return: (offsets, columns)
+    """
+    offsets = array('q', [0]) * (num_rows + 1)
+    columns = array('i')
+    last = -1
+    for key in sorted(keys):
+        if key == last:
+            continue
+        last = key
+        row, column = divmod(key, stride)
+        offsets[row + 1] += 1
+        columns.append(column)
+    for row in range(num_rows):
+        offsets[row + 1] += offsets[row]
+    return offsets, columns
+
+
+class TextureUsageTable:
+    """
+    纹理资源使用表：一次遍历 GetResources + GetUsage，得到 resourceId -> ((eventId, usage), ...)。
+    usage 以 int 存储；同一 capture 会话内由统计窗口与纹理导出共享，回放往返只付一次。
+    """
+
+    _cached_key = None
+    _cached_table: Optional["TextureUsageTable"] = None
+
+    def __init__(self, controller, cached_usages: Optional[Dict[int, tuple]] = None):
+        """
+        :param controller:    ReplayController
+        :param cached_usages: 来自统计缓存的 {int(resourceId): usages}，提供时不再调用 GetUsage
+        """
+        self.resources: Dict[rd.ResourceId, rd.ResourceDescription] = {}  # 按 GetResources 顺序
+        self.usages: Dict[rd.ResourceId, tuple] = {}
+        with profiling.timer("replay.GetResources"):
+            resources = controller.GetResources()
+        for res in resources:
+            if res.type != rd.ResourceType.Texture:
+                continue
+            self.resources[res.resourceId] = res
+            if cached_usages is not None:
+                self.usages[res.resourceId] = cached_usages.get(int(res.resourceId), ())
+            else:
+                with profiling.timer("replay.GetUsage"):
+                    self.usages[res.resourceId] = tuple(
+                        (u.eventId, int(u.usage)) for u in controller.GetUsage(res.resourceId)
+                    )
+
+    def is_shader_input(self, resource_id) -> bool:
+        """纹理是否在任意事件中被用作着色器输入资源"""
+        return any(usage in _INPUT_USAGE_IDS for _, usage in self.usages.get(resource_id, ()))
+
+    @classmethod
+    def get(cls, capture_ctx, controller, cached_usages: Optional[Dict[int, tuple]] = None) -> "TextureUsageTable":
+        """获取当前 capture 的使用表，首次调用时收集，之后直接复用；按 capture 文件标识区分 capture"""
+        key = stats_cache.capture_identity(capture_ctx.GetCaptureFilename())
+        if cls._cached_table is None or cls._cached_key != key:
+            cls._cached_table = cls(controller, cached_usages)
+            cls._cached_key = key
+        return cls._cached_table
+
+    @classmethod
+    def invalidate(cls):
+        """capture 关闭时丢弃缓存（由扩展注册的 CaptureViewer 调用）"""
+        cls._cached_key = None
+        cls._cached_table = None
+
+
+class MeshNumRangeIndex:
+    """
+    面数排行索引，收集时构建一次：
+    - 按面数降序预排序的数组，阈值查询先二分出全局超过阈值的前缀，再按 actionId 范围过滤；
+    - 按 actionId 排序的区间最大值线段树，限定范围的 Top-N / 阈值查询从区间最大值出发，
+      用堆按面数从大到小逐个展开左右子区间，复杂度 O(k log n)，k 为返回数量。
+    面数相同时按 actionId 升序，与旧实现的稳定排序一致。
+    """
+
+    def __init__(self, action_ids: array, meshnums: array):
+        """:param action_ids / meshnums: 同一顺序的 actionId 与面数列"""
+        order = sorted(range(len(action_ids)), key=action_ids.__getitem__)
+        self._action_ids = array('q', (action_ids[i] for i in order))
+        self._meshnums = array('d', (meshnums[i] for i in order))
+        n = len(order)
+
+        # 按面数降序的位置数组
+        self._sorted_positions = array('i', sorted(range(n), key=lambda i: -self._meshnums[i]))
+        self._sorted_neg_meshnums = array('d', (-self._meshnums[i] for i in self._sorted_positions))
+
+        # 线段树节点存放区间最大值所在位置，-1 表示空
+        size = 1
+        while size < n:
+            size *= 2
+        self._size = size
+        tree = array('i', [-1]) * (2 * size)
+        tree[size:size + n] = array('i', range(n))
+        for node in range(size - 1, 0, -1):
+            tree[node] = self._better(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def _better(self, i, j):
+        if i < 0:
+            return j
+        if j < 0:
+            return i
+        mi, mj = self._meshnums[i], self._meshnums[j]
+        return j if mj > mi or (mj == mi and j < i) else i
+
+    def _range_max(self, lo, hi):
+        """位置区间 [lo, hi) 内面数最大的位置"""
+        best = -1
+        tree = self._tree
+        lo += self._size
+        hi += self._size
+        while lo < hi:
+            if lo & 1:
+                best = self._better(best, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = self._better(best, tree[hi])
+            lo >>= 1
+            hi >>= 1
+        return best
+
+    def _position_range(self, start_action_id, end_action_id):
+        lo = 0 if start_action_id is None else bisect_left(self._action_ids, start_action_id)
+        hi = len(self._action_ids) if end_action_id is None else bisect_right(self._action_ids, end_action_id)
+        return lo, hi
+
+    def above_threshold(self, threshold, start_action_id=None, end_action_id=None):
+        """
+        actionId 范围内面数大于 threshold 的全部 action，[(meshnum, action_id), ...] 降序。
+        全局超过阈值的数量相对范围较少时直接过滤预排序数组，否则走线段树展开。
+        """
+        lo, hi = self._position_range(start_action_id, end_action_id)
+        count = bisect_left(self._sorted_neg_meshnums, -threshold)
+        if count > 16 * (hi - lo):
+            result = []
+            for meshnum, action_id in self.iter_descending(start_action_id, end_action_id):
+                if meshnum <= threshold:
+                    break
+                result.append((meshnum, action_id))
+            return result
+        meshnums, action_ids = self._meshnums, self._action_ids
+        return [(meshnums[i], action_ids[i]) for i in self._sorted_positions[:count] if lo <= i < hi]
+
+    def iter_descending(self, start_action_id=None, end_action_id=None):
+        """按面数从大到小逐个生成 actionId 范围内的 (meshnum, action_id)"""
+        lo, hi = self._position_range(start_action_id, end_action_id)
+        heap = []
+
+        def push(lo, hi):
+            if lo < hi:
+                i = self._range_max(lo, hi)
+                heapq.heappush(heap, (-self._meshnums[i], i, lo, hi))
+
+        push(lo, hi)
+        while heap:
+            neg_meshnum, i, lo, hi = heapq.heappop(heap)
+            yield -neg_meshnum, self._action_ids[i]
+            push(lo, i)
+            push(i + 1, hi)
+
 
 class ControllerDataStats:
-    def __init__(self, controller, ctx):
+    def __init__(self, controller, ctx, use_cache: bool = True):
+        """
+        :param controller: ReplayController
+        :param ctx:        CaptureContext
+        :param use_cache:  是否读写 .rdc 旁的统计缓存（.lclstats），命中时跳过 Action 树遍历与 GetUsage
+        """
         self.ctx = ctx
-        self.eventid_action_map : Dict[int, ActionData] = {}    # eventId -> ActionData
-        self.actionid_action_map : Dict[int, ActionData] = {}  # actionId -> ActionData
-        self._collect(controller)
+        self.use_cache = use_cache
+        # 列式存储，每行一个 Action，按 eventId 升序排列
+        self._event_ids = array('q')
+        self._action_ids = array('q')
+        self._flags = array('I')
+        self._num_indices = array('I')
+        self._meshnums = array('d')
+        # actionId 升序排列及其对应的行号
+        self._sorted_action_ids = array('q')
+        self._action_rows = array('i')
+        # 被引用到的纹理，以及每行输入 / 输出纹理下标的 CSR 索引
+        self.textures: List[TextureData] = []
+        self._input_offsets = array('q', [0])
+        self._input_ids = array('i')
+        self._output_offsets = array('q', [0])
+        self._output_ids = array('i')
+        # numIndices 前缀和（仅 Indexed DrawCall），与行对齐
+        self._indices_prefix = array('q', [0])
+        with profiling.run("stats", os.path.dirname(ctx.GetCaptureFilename())):
+            self._collect(controller)
+            self._build_event_index()
+            self.eventid_action_map = _ActionMap(self, self._event_ids)  # eventId -> ActionData
+            self.actionid_action_map = _ActionMap(self, self._sorted_action_ids, self._action_rows)  # actionId -> ActionData
+            with profiling.timer("stats.pass_index"):
+                self.pass_index = PassIndex(self)
+            with profiling.timer("stats.meshnum_index"):
+                self._meshnum_index = MeshNumRangeIndex(self._action_ids, self._meshnums)
+
+    @staticmethod
+    def _walk_actions(roots):
+        """遍历 Action 树，返回 (actionIds, eventIds, flags, numIndices) 四列"""
+        columns = (array('q'), array('q'), array('q'), array('q'))
+        action_ids, event_ids, flags, num_indices = columns
 
-    def _collect(self, controller):
-        # 收集eventId到Action的映射
         def collect_actions(actions):
             for action in actions:
-                actionData = ActionData(action)
-                self.eventid_action_map[action.eventId] = actionData
-                self.actionid_action_map[action.actionId] = actionData
+                action_ids.append(action.actionId)
+                event_ids.append(action.eventId)
+                flags.append(int(action.flags))
+                num_indices.append(action.numIndices)
                 if hasattr(action, 'children'):
                     collect_actions(action.children)
-        collect_actions(controller.GetRootActions())
+        collect_actions(roots)
+        return columns
 
-        # 收集纹理资源的输入输出使用情况，直接添加到对应的 ActionData
-        resources = controller.GetResources()
-        for res in resources:
-            if res.type == renderdoc.ResourceType.Texture:
-                usages = controller.GetUsage(res.resourceId)
-                texture_desc = self.ctx.GetTexture(res.resourceId)
-                texture_data = TextureData(res.resourceId, texture_desc)
-                for usage in usages:
-                    eid = usage.eventId
-                    actionData = self.eventid_action_map.get(eid)
-                    if not actionData:
-                        continue
-                    # 输入纹理
-                    if usage.usage in INPUT_RESOURCE_USAGES:
-                        actionData.inputsTextures.add(texture_data)
-                    # 输出纹理
-                    if usage.usage in OUTPUT_RESOURCE_USAGES:
-                        actionData.outputsTextures.add(texture_data)
+    def _collect(self, controller):
+        capture_path = self.ctx.GetCaptureFilename()
+        with profiling.timer("stats.cache_load"):
+            snapshot = stats_cache.load_snapshot(capture_path) if self.use_cache else None
+
+        # Action 列，按 eventId 排序后存放
+        if snapshot:
+            with profiling.timer("stats.cache_actions"):
+                action_ids, event_ids, flags, num_indices = snapshot.action_columns
+        else:
+            with profiling.timer("replay.GetRootActions"):
+                roots = controller.GetRootActions()
+            with profiling.timer("stats.walk_actions"):
+                action_ids, event_ids, flags, num_indices = self._walk_actions(roots)
+        order = sorted(range(len(event_ids)), key=event_ids.__getitem__)
+        self._event_ids = array('q', (event_ids[i] for i in order))
+        self._action_ids = array('q', (action_ids[i] for i in order))
+        self._flags = array('I', (flags[i] for i in order))
+        self._num_indices = array('I', (num_indices[i] for i in order))
+        indexed_draw = int(rd.ActionFlags.Drawcall) | int(rd.ActionFlags.Indexed)
+        self._meshnums = array('d', (
+            n / 3 if f & indexed_draw == indexed_draw else 0 for f, n in zip(self._flags, self._num_indices)
+        ))
+        self._action_rows = array('i', sorted(range(len(order)), key=self._action_ids.__getitem__))
+        self._sorted_action_ids = array('q', (self._action_ids[row] for row in self._action_rows))
+
+        # 收集纹理资源的输入输出使用情况，以 行号 * stride + 纹理下标 编码后转为 CSR
+        with profiling.timer("stats.cache_textures_usages"):
+            cached_textures = snapshot.textures if snapshot else {}
+            cached_usages = snapshot.usages if snapshot else None
+        with profiling.timer("stats.usage_table"):
+            usage_table = TextureUsageTable.get(self.ctx, controller, cached_usages)
+        stride = max(1, len(usage_table.usages))
+        row_of_event = {eid: row for row, eid in enumerate(self._event_ids)}  # 仅收集期间使用
+        input_keys = array('q')
+        output_keys = array('q')
+        for resource_id, usages in usage_table.usages.items():
+            tex_index = len(self.textures)
+            referenced = False
+            for eid, usage in usages:
+                row = row_of_event.get(eid)
+                if row is None:
+                    continue
+                # 输入纹理
+                if usage in _INPUT_USAGE_IDS:
+                    input_keys.append(row * stride + tex_index)
+                    referenced = True
+                # 输出纹理
+                if usage in _OUTPUT_USAGE_IDS:
+                    output_keys.append(row * stride + tex_index)
+                    referenced = True
+            if referenced:
+                texture_desc = cached_textures.get(int(resource_id))
+                if texture_desc is None:
+                    with profiling.timer("ctx.GetTexture"):
+                        texture_desc = self.ctx.GetTexture(resource_id)
+                self.textures.append(TextureData(resource_id, texture_desc))
+        with profiling.timer("stats.build_csr"):
+            self._input_offsets, self._input_ids = _build_csr(input_keys, len(order), stride)
+            self._output_offsets, self._output_ids = _build_csr(output_keys, len(order), stride)
+
+        if self.use_cache and snapshot is None:
+            with profiling.timer("stats.cache_save"):
+                self._save_cache(capture_path, usage_table)
+
+    def _save_cache(self, capture_path, usage_table):
+        """把本次收集结果写入 .rdc 旁的统计缓存，下次打开同一 capture 时直接加载"""
+        actions = [list(row) for row in zip(self._action_ids, self._event_ids, self._flags, self._num_indices)]
+        textures = {}
+        for resource_id in usage_table.resources:
+            texture_desc = self.ctx.GetTexture(resource_id)
+            if texture_desc is not None:
+                textures[int(resource_id)] = stats_cache.texture_row(texture_desc)
+        usages = {int(rid): rows for rid, rows in usage_table.usages.items()}
+        stats_cache.save_snapshot(capture_path, actions, textures, usages)
+
+    def _build_event_index(self):
+        """
+        构建与行对齐的面数前缀和，范围面数统计变为两次二分查找加一次减法。
+        前缀和累加的是整数 numIndices，避免浮点累加误差，查询时再除以 3。
+        """
+        prefix = array('q', [0])
+        total = 0
+        for num_indices, meshnum in zip(self._num_indices, self._meshnums):
+            if meshnum:
+                total += num_indices
+            prefix.append(total)
+        self._indices_prefix = prefix
+
+    def _row_by_eventid(self, event_id) -> Optional[int]:
+        i = bisect_left(self._event_ids, event_id)
+        if i < len(self._event_ids) and self._event_ids[i] == event_id:
+            return i
+        return None
+
+    def _row_by_actionid(self, action_id) -> Optional[int]:
+        i = bisect_left(self._sorted_action_ids, action_id)
+        if i < len(self._sorted_action_ids) and self._sorted_action_ids[i] == action_id:
+            return self._action_rows[i]
+        return None
+
+    def _row_textures(self, offsets, ids, row) -> tuple:
+        textures = self.textures
+        return tuple(textures[i] for i in ids[offsets[row]:offsets[row + 1]])
+
+    def _range_textures(self, offsets, ids, lo, hi) -> list:
+        """行区间 [lo, hi) 内去重后的纹理"""
+        textures = self.textures
+        return [textures[i] for i in set(ids[offsets[lo]:offsets[hi]])]
+
+    def _event_slice(self, start_event_id, end_event_id):
+        """返回 [start_event_id, end_event_id] 在有序 eventId 数组中的下标区间 [lo, hi)"""
+        lo = bisect_left(self._event_ids, start_event_id)
+        hi = bisect_right(self._event_ids, end_event_id)
+        return lo, max(lo, hi)
+
+    def iter_actions(self):
+        """按 eventId 升序遍历所有 ActionData"""
+        for row in range(len(self._event_ids)):
+            yield ActionData(self, row)
 
     def get_action_by_actionid(self, action_id) -> Optional[ActionData]:
         """根据 actionId 获取对应的 ActionData 对象"""
-        return self.actionid_action_map.get(action_id, None)
+        row = self._row_by_actionid(action_id)
+        return ActionData(self, row) if row is not None else None
 
     def get_action_by_eventid(self, event_id) -> Optional[ActionData]:
         """根据 eventId 获取对应的 ActionData 对象"""
-        return self.eventid_action_map.get(event_id, None)
+        row = self._row_by_eventid(event_id)
+        return ActionData(self, row) if row is not None else None
 
     def get_event_id(self, action_id):
         """根据 actionId 获取对应的 eventId"""
-        action = self.actionid_action_map.get(action_id, None)
-        return action.eventId if action else None
+        row = self._row_by_actionid(action_id)
+        return self._event_ids[row] if row is not None else None
 
     def get_action_id(self, event_id):
         """根据 eventId 获取对应的 actionId"""
-        action = self.eventid_action_map.get(event_id, None)
-        return action.actionId if action else None
+        row = self._row_by_eventid(event_id)
+        return self._action_ids[row] if row is not None else None
 
     def get_inputs_by_eventid(self, event_id):
         """获取指定 event_id 的输入纹理资源ID列表"""
-        action = self.eventid_action_map.get(event_id)
-        return list(action.inputsTextures) if action else []
+        row = self._row_by_eventid(event_id)
+        return list(self._row_textures(self._input_offsets, self._input_ids, row)) if row is not None else []
 
     def get_inputs_by_actionid(self, action_id):
         """获取指定 action_id 的输入纹理资源ID列表"""
-        action = self.actionid_action_map.get(action_id)
-        return list(action.inputsTextures) if action else []
+        row = self._row_by_actionid(action_id)
+        return list(self._row_textures(self._input_offsets, self._input_ids, row)) if row is not None else []
 
     def get_outputs_by_eventid(self, event_id):
         """获取指定 event_id 的输出纹理资源ID列表"""
-        action = self.eventid_action_map.get(event_id)
-        return list(action.outputsTextures) if action else []
+        row = self._row_by_eventid(event_id)
+        return list(self._row_textures(self._output_offsets, self._output_ids, row)) if row is not None else []
 
     def get_outputs_by_actionid(self, action_id):
         """获取指定 action_id 的输出纹理资源ID列表"""
-        action = self.actionid_action_map.get(action_id)
-        return list(action.outputsTextures) if action else []
+        row = self._row_by_actionid(action_id)
+        return list(self._row_textures(self._output_offsets, self._output_ids, row)) if row is not None else []
+
+    def get_event_ids_in_range_by_actionid(self, start_action_id, end_action_id, flags=None) -> List[int]:
+        """
+        获取指定 action_id 范围内的 eventId，按升序排列
+        :param flags: rd.ActionFlags，不为 None 时只保留带有其中任一标记的 Action（例如 Drawcall）
+        """
+        start_event_id = self.get_event_id(start_action_id)
+        end_event_id = self.get_event_id(end_action_id)
+        if start_event_id is None or end_event_id is None:
+            return []
+        lo, hi = self._event_slice(start_event_id, end_event_id)
+        if flags is None:
+            return list(self._event_ids[lo:hi])
+        mask = int(flags)
+        return [eid for eid, f in zip(self._event_ids[lo:hi], self._flags[lo:hi]) if f & mask]
 
     def get_inputs_in_range(self, start_event_id, end_event_id):
         """获取指定 event_id 范围内的所有输入纹理资源ID集合"""
-        result = set()
-        for eid in range(start_event_id, end_event_id + 1):
-            action = self.eventid_action_map.get(eid)
-            if action:
-                result.update(action.inputsTextures)
-        return list(result)
-    
+        lo, hi = self._event_slice(start_event_id, end_event_id)
+        return self._range_textures(self._input_offsets, self._input_ids, lo, hi)
+
     def get_inputs_in_range_by_actionid(self, start_action_id, end_action_id):
         """获取指定 action_id 范围内的所有输入纹理资源ID集合"""
         start_event_id = self.get_event_id(start_action_id)
@@ -152,12 +648,8 @@ class ControllerDataStats:
 
     def get_outputs_in_range(self, start_event_id, end_event_id):
         """获取指定 event_id 范围内的所有输出纹理资源ID集合"""
-        result = set()
-        for eid in range(start_event_id, end_event_id + 1):
-            action = self.eventid_action_map.get(eid)
-            if action:
-                result.update(action.outputsTextures)
-        return list(result)
+        lo, hi = self._event_slice(start_event_id, end_event_id)
+        return self._range_textures(self._output_offsets, self._output_ids, lo, hi)
 
     def get_outputs_in_range_by_actionid(self, start_action_id, end_action_id):
         """获取指定 action_id 范围内的所有输出纹理资源ID集合"""
@@ -190,18 +682,46 @@ class ControllerDataStats:
         return sorted_list
     
     
+    def count_texture_memory_in_range_by_actionid(self, start_action_id, end_action_id, isOutput=False):
+        """
+        统计指定 action_id 范围内所有输入或输出纹理（去重）的 GPU 内存估算
+        :param start_action_id: 起始 action_id
+        :param end_action_id: 结束 action_id
+        :param isOutput: True 统计输出纹理，False 统计输入纹理
+        :return: (总字节数, [(格式名, 纹理数量, 字节数), ...])，按字节数从大到小排序
+        """
+        if isOutput:
+            textures = self.get_outputs_in_range_by_actionid(start_action_id, end_action_id)
+        else:
+            textures = self.get_inputs_in_range_by_actionid(start_action_id, end_action_id)
+        total = 0
+        format_counter = {}
+        for tex in set(textures):
+            total += tex.byteSize
+            count, size = format_counter.get(tex.formatName, (0, 0))
+            format_counter[tex.formatName] = (count + 1, size + tex.byteSize)
+        by_format = sorted(((name, count, size) for name, (count, size) in format_counter.items()),
+                           key=lambda x: x[2], reverse=True)
+        return total, by_format
+
+    def get_passes_in_range_by_actionid(self, start_action_id, end_action_id) -> List[RenderPass]:
+        """获取与指定 action_id 范围有交集的所有 Pass（按输出目标切分）"""
+        start_event_id = self.get_event_id(start_action_id)
+        end_event_id = self.get_event_id(end_action_id)
+        if start_event_id is None or end_event_id is None:
+            return []
+        return self.pass_index.passes_in_range(start_event_id, end_event_id)
+
     def get_meshnum_in_range_by_actionid(self, start_action_id, end_action_id):
         """获取指定 action_id 范围内所有 Action 的 meshNum 总和"""
         start_event_id = self.get_event_id(start_action_id)
         end_event_id = self.get_event_id(end_action_id)
         if start_event_id is None or end_event_id is None:
             return 0
-        total = 0
-        for eid in range(start_event_id, end_event_id + 1):
-            action = self.eventid_action_map.get(eid)
-            if action:
-                total += action.meshNum
-        return total
+        lo, hi = self._event_slice(start_event_id, end_event_id)
+        if lo == hi:
+            return 0
+        return (self._indices_prefix[hi] - self._indices_prefix[lo]) / 3
 
     def get_actions_by_meshnum_threshold(self, threshold_meshnum, start_action_id=None, end_action_id=None):
         """
@@ -211,18 +731,7 @@ class ControllerDataStats:
         :param end_action_id: 结束 action_id，可选，默认为None（不限制结束范围）
         :return: list of tuple [(meshnum, action_id), ...] 按面数从大到小排序
         """
-        result = []
-        for action_id, action_data in self.actionid_action_map.items():
-            # 检查是否在指定范围内
-            if start_action_id is not None and action_id < start_action_id:
-                continue
-            if end_action_id is not None and action_id > end_action_id:
-                continue
-            
-            if action_data.meshNum > threshold_meshnum:
-                result.append((action_data.meshNum, action_id))
-        # 按面数从大到小排序
-        return sorted(result, key=lambda x: x[0], reverse=True)
+        return self._meshnum_index.above_threshold(threshold_meshnum, start_action_id, end_action_id)
 
     def get_top_n_actions_by_meshnum(self, n, start_action_id=None, end_action_id=None):
         """
@@ -233,26 +742,23 @@ class ControllerDataStats:
         :return: list of tuple [(meshnum, action_id), ...] 按面数从大到小排序，最多返回n个
         """
         result = []
-        for action_id, action_data in self.actionid_action_map.items():
-            # 检查是否在指定范围内
-            if start_action_id is not None and action_id < start_action_id:
-                continue
-            if end_action_id is not None and action_id > end_action_id:
-                continue
-            
-            if action_data.meshNum > 0:  # 只统计有面数的action
-                result.append((action_data.meshNum, action_id))
-        # 按面数从大到小排序，并返回前N个
-        return sorted(result, key=lambda x: x[0], reverse=True)[:n]
+        if n <= 0:
+            return result
+        for meshnum, action_id in self._meshnum_index.iter_descending(start_action_id, end_action_id):
+            if meshnum <= 0:  # 只统计有面数的action
+                break
+            result.append((meshnum, action_id))
+            if len(result) >= n:
+                break
+        return result
 
     def print_stats(self):
         """打印所有事件的输入输出纹理统计"""
-        for eid in sorted(self.eventid_action_map.keys()):
-            action = self.eventid_action_map[eid]
-            input_resids = [str(rid) for rid in action.inputsTextures]
-            output_resids = [str(rid) for rid in action.outputsTextures]
+        for action in self.iter_actions():
+            input_resids = [str(tex.resourceId) for tex in action.inputsTextures]
+            output_resids = [str(tex.resourceId) for tex in action.outputsTextures]
             print(
-                f"eventId {eid} Inputs: {len(input_resids)} {input_resids} | Outputs: {len(output_resids)} {output_resids}"
+                f"eventId {action.eventId} Inputs: {len(input_resids)} {input_resids} | Outputs: {len(output_resids)} {output_resids}"
             )
 
 # 用法示例
@@ -262,13 +768,6 @@ class ControllerDataStats:
 # print(stats.get_outputs_in_range(100, 110))
 
 
-def _resolve_tex_format(texture: rd.TextureDescription):
-    """根据纹理格式返回 (FileType, 后缀) 元组"""
-    if texture.format.compType == rd.CompType.Float:
-        return rd.FileType.EXR, ".exr"
-    return rd.FileType.TGA, ".tga"
-
-
 def _safe_tex_name(name: str) -> str:
     """将 shader 变量名中的非法文件名字符替换为下划线"""
     invalid = r'\/:*?"<>|'
@@ -277,6 +776,73 @@ def _safe_tex_name(name: str) -> str:
     return name
 
 
+# 未指定格式策略时保持以往的输出：浮点纹理单精度 EXR，其余 TGA
+_DEFAULT_FORMAT_POLICY = ExportFormatPolicy.legacy()
+
+
+def export_archive_path(save_dir: str, folder_name: str) -> str:
+    """归档导出的文件路径"""
+    return os.path.join(save_dir, folder_name + ARCHIVE_SUFFIX)
+
+
+class SubresourceSelection:
+    """
+    纹理导出的子资源选择。默认与以往行为一致：只导出 mip 0、采样 0，
+    但导出全部数组切片（含 Cube 面）与 3D 纹理的全部深度切片。
+    """
+
+    def __init__(self, all_mips: bool = False, all_slices: bool = True, all_depth: bool = True,
+                 all_samples: bool = False):
+        """
+        :param all_mips:    导出完整 mip 链，文件名追加 _mip{n}
+        :param all_slices:  导出全部数组切片 / Cube 面，否则只导出切片 0
+        :param all_depth:   导出 3D 纹理每个 mip 的全部深度切片，否则只导出深度 0
+        :param all_samples: MSAA 纹理逐个导出采样，文件名追加 _s{n}；否则由 RenderDoc 默认处理
+        """
+        self.all_mips = all_mips
+        self.all_slices = all_slices
+        self.all_depth = all_depth
+        self.all_samples = all_samples
+
+    @staticmethod
+    def _slice_suffix(texture, index: int) -> str:
+        if texture.cubemap:
+            # Cube Map：每 6 面一组，支持 Cube Array
+            face_label = CUBE_FACE_NAMES[index % 6]
+            return f"_{index // 6}_{face_label}" if texture.arraysize > 6 else f"_{face_label}"
+        return f"_{index}"
+
+    def iter_subresources(self, texture):
+        """
+        按导出顺序生成 (mip, slice, sample, 文件名后缀)。
+        数组纹理按切片外层、mip 内层遍历，同一切片的 mip 链连续回读；
+        3D 纹理的深度随 mip 减半，因此按 mip 外层、深度内层遍历。
+        """
+        mips = range(texture.mips if self.all_mips else 1)
+        samples = range(texture.msSamp if self.all_samples and texture.msSamp > 1 else 1)
+        mip_suffix = self.all_mips and texture.mips > 1
+        sample_suffix = len(samples) > 1
+
+        def suffix(base, mip, sample):
+            return (base + (f"_mip{mip}" if mip_suffix else "")
+                    + (f"_s{sample}" if sample_suffix else ""))
+
+        if texture.depth > 1:
+            for mip in mips:
+                depth = max(1, texture.depth >> mip) if self.all_depth else 1
+                for z in range(depth):
+                    for sample in samples:
+                        yield mip, z, sample, suffix(f"_{z}", mip, sample)
+        else:
+            has_slices = texture.arraysize > 1
+            slices = range(texture.arraysize if self.all_slices and has_slices else 1)
+            for index in slices:
+                base = self._slice_suffix(texture, index) if has_slices else ""
+                for mip in mips:
+                    for sample in samples:
+                        yield mip, index, sample, suffix(base, mip, sample)
+
+
 class TextureSaver:
     """
     纹理导出工具类，封装了导出单个纹理的核心逻辑。
@@ -290,13 +856,41 @@ class TextureSaver:
         flags = texture.creationFlags
         return (flags & rd.TextureCategory.ColorTarget) != 0 or (flags & rd.TextureCategory.DepthTarget) != 0
 
+    @staticmethod
+    def should_export(texture: Optional[rd.TextureDescription], export_renderbuffer: bool = False) -> bool:
+        """save_texture 是否会导出该纹理"""
+        if texture is None:
+            return False
+        # 是否跳过 renderbuffer
+        if not export_renderbuffer and TextureSaver.is_renderbuffer(texture):
+            return False
+        # 小于 4x4 的纹理跳过（通常是占位空白纹理）
+        if texture.width <= 4 and texture.height <= 4:
+            return False
+        return True
+
     @staticmethod
     def texture_has_slice_face(tex) -> bool:
         return tex.arraysize > 1 or tex.depth > 1
 
+    @staticmethod
+    def _save_slice(controller, texsave, texture, out_path, pipeline: Optional[TextureWritePipeline], name,
+                    options) -> bool:
+        """返回 False 表示流水线的变化模式判定内容未变化，没有写出"""
+        if pipeline is not None:
+            return pipeline.save(controller, texsave, texture, out_path, name, options)
+        with profiling.timer("replay.SaveTexture"):
+            controller.SaveTexture(texsave, out_path)
+        return True
+
     @staticmethod
     def save_texture(capture_ctx, controller, resource_id, folder_path: str,
-                     tex_name: str = "", export_renderbuffer: bool = False) -> bool:
+                     tex_name: str = "", export_renderbuffer: bool = False,
+                     pipeline: Optional[TextureWritePipeline] = None,
+                     selection: Optional["SubresourceSelection"] = None,
+                     progress: Optional[ExportProgress] = None,
+                     format_policy: Optional[ExportFormatPolicy] = None,
+                     out_paths: Optional[List[str]] = None) -> bool:
         """
         导出单张纹理到 folder_path 目录。
         :param capture_ctx:         RenderDoc CaptureContext
@@ -305,6 +899,11 @@ class TextureSaver:
         :param folder_path:         目标目录（完整路径，已包含子目录）
         :param tex_name:            输出文件名（不含扩展名）；空字符串时自动用资源名或 ID
         :param export_renderbuffer: 是否导出 RenderBuffer（ColorTarget/DepthTarget）
+        :param pipeline:            导出流水线；提供时回读后的编码写盘在后台线程完成，否则同步 SaveTexture
+        :param selection:           导出哪些子资源，默认 mip 0 的所有切片 / 面
+        :param progress:            进度与取消令牌，每个子资源之前检查取消（抛出 ExportCancelled）
+        :param format_policy:       导出格式策略，默认 ExportFormatPolicy.legacy()（TGA / 单精度 EXR）
+        :param out_paths:           提供时追加每个写出的子资源的输出路径（变化模式下跳过的不计入）
         :return: 导出成功返回 True
         """
         texsave = rd.TextureSave()
@@ -312,18 +911,12 @@ class TextureSaver:
         if texsave.resourceId == rd.ResourceId.Null():
             return False
 
-        resource_desc: rd.ResourceDescription = capture_ctx.GetResource(resource_id)
-        texture: rd.TextureDescription = capture_ctx.GetTexture(resource_id)
-
-        if texture is None:
-            return False
-
-        # 是否跳过 renderbuffer
-        if not export_renderbuffer and TextureSaver.is_renderbuffer(texture):
-            return False
+        with profiling.timer("ctx.GetResource"):
+            resource_desc: rd.ResourceDescription = capture_ctx.GetResource(resource_id)
+        with profiling.timer("ctx.GetTexture"):
+            texture: rd.TextureDescription = capture_ctx.GetTexture(resource_id)
 
-        # 小于 4x4 的纹理跳过（通常是占位空白纹理）
-        if texture.width <= 4 and texture.height <= 4:
+        if not TextureSaver.should_export(texture, export_renderbuffer):
             return False
 
         # 文件名：优先用传入名称，否则用资源名称，最后用 ID
@@ -331,61 +924,113 @@ class TextureSaver:
             tex_name = resource_desc.name if (resource_desc and resource_desc.name) else str(int(resource_id))
         filename = _safe_tex_name(tex_name)
 
-        texsave.mip = 0
-        texsave.slice.depth = 0
+        selection = selection or SubresourceSelection()
         texsave.alpha = rd.AlphaMapping.Preserve
+        texsave.sample.mapToArray = False
+        # 不逐个导出采样时由 RenderDoc resolve 所有采样
+        texsave.sample.sampleIndex = RESOLVE_SAMPLE_INDEX
 
-        file_type, tex_ext = _resolve_tex_format(texture)
-        texsave.destType = file_type
-
-        os.makedirs(folder_path, exist_ok=True)
-
-        if TextureSaver.texture_has_slice_face(texture):
-            if texture.cubemap:
-                # Cube Map：每 6 面一组，支持 Cube Array
-                num_faces = texture.arraysize
-                for i in range(num_faces):
-                    face_label = CUBE_FACE_NAMES[i % 6]
-                    layer = i // 6
-                    suffix = f"_{layer}_{face_label}" if num_faces > 6 else f"_{face_label}"
-                    texsave.slice.sliceIndex = i
-                    out_path = os.path.join(folder_path, f"{filename}{suffix}{tex_ext}")
-                    controller.SaveTexture(texsave, out_path)
-            else:
-                for i in range(texture.depth):
-                    texsave.slice.sliceIndex = i
-                    out_path = os.path.join(folder_path, f"{filename}_{i}{tex_ext}")
-                    controller.SaveTexture(texsave, out_path)
-        else:
-            texsave.slice.sliceIndex = 0
-            out_path = os.path.join(folder_path, f"{filename}{tex_ext}")
-            controller.SaveTexture(texsave, out_path)
+        export_format = (format_policy or _DEFAULT_FORMAT_POLICY).resolve(texture)
+        texsave.destType = export_format.file_type
+        tex_ext = export_format.ext
+
+        # 归档导出时文件写入归档，不创建导出目录
+        if pipeline is None or pipeline.archive is None:
+            with profiling.timer("fs.makedirs"):
+                os.makedirs(folder_path, exist_ok=True)
 
-        print(f"  Saved: {os.path.basename(out_path)}  [{texture.width}x{texture.height} {texture.format.Name()}]")
+        # 同一个 TextureSave 复用于所有子资源，只修改 mip / slice / sample
+        count = 0
+        total = 0
+        first_path = None
+        for mip, slice_index, sample, suffix in selection.iter_subresources(texture):
+            if progress is not None:
+                progress.check_cancelled()
+            texsave.mip = mip
+            texsave.slice.sliceIndex = slice_index
+            if texture.msSamp > 1 and selection.all_samples:
+                texsave.sample.sampleIndex = sample
+            out_path = os.path.join(folder_path, f"{filename}{suffix}{tex_ext}")
+            total += 1
+            first_path = first_path or out_path
+            written = TextureSaver._save_slice(controller, texsave, texture, out_path, pipeline, tex_name,
+                                               export_format.options)
+            if written:
+                if out_paths is not None:
+                    out_paths.append(out_path)
+                count += 1
+            if progress is not None:
+                progress.advance(subresource_byte_size(texture, mip))
+
+        if not total:
+            print(f"  Skipped: {filename} (no subresources selected)")
+            return False
+        extra = f" ({count}/{total} subresources)" if total > 1 else ""
+        status = "Saved" if count else "Unchanged"
+        print(f"  {status}: {os.path.basename(first_path)}{extra}  [{texture.width}x{texture.height} {texture.format.Name()}]")
         return True
 
     @staticmethod
-    def export_all_textures(capture_ctx, controller, save_dir: str, folder_name: str) -> int:
+    def export_all_textures(capture_ctx, controller, save_dir: str, folder_name: str,
+                            dedup: bool = False, hardlink: bool = False, incremental: bool = True,
+                            selection: Optional[SubresourceSelection] = None,
+                            progress: Optional[ExportProgress] = None, archive: bool = False,
+                            format_policy: Optional[ExportFormatPolicy] = None) -> int:
         """
         导出所有被用作着色器输入的纹理。
         :param capture_ctx:  RenderDoc CaptureContext
         :param controller:   ReplayController
         :param save_dir:     导出根目录
         :param folder_name:  子文件夹名称（通常为 capture 文件名）
+        :param dedup:        按内容去重，相同内容只写一次
+        :param hardlink:     去重时为重复纹理创建硬链接
+        :param incremental:  与导出目录中的 texture_manifest.json 比对，跳过未变化的文件；
+                             Python 侧无法编码的格式只在 capture 未变化时跳过，不额外回读
+        :param selection:    导出哪些子资源（mip / 切片 / 采样）
+        :param progress:     进度与取消令牌；取消后已提交的写盘与清单照常完成，返回已导出的数量
+        :param archive:      写入单个不压缩归档 <save_dir>/<folder_name>.zip 而不是逐个文件，忽略 incremental
+        :param format_policy: 导出格式策略，默认 ExportFormatPolicy.legacy()（TGA / 单精度 EXR）
         :return: 导出成功的纹理数量
         """
         folder_path = os.path.join(save_dir, folder_name)
-        resources = controller.GetResources()
-        texture_count = 0
-        for res in resources:
-            if res.type == rd.ResourceType.Texture:
-                # 只导出被用作着色器输入资源的纹理
-                usages = controller.GetUsage(res.resourceId)
-                is_input = any(u.usage in INPUT_RESOURCE_USAGES for u in usages)
-                if not is_input:
+        # 开启性能统计时报告写到导出目录
+        with profiling.run("export", folder_path):
+            # 与统计窗口共享同一份使用表，不再逐纹理调用 GetUsage
+            with profiling.timer("stats.usage_table"):
+                usage_table = TextureUsageTable.get(capture_ctx, controller)
+            selection = selection or SubresourceSelection()
+            # 只导出被用作着色器输入资源的纹理；先列出全部待导出纹理，进度总数按子资源计
+            exports = []
+            total = 0
+            for resource_id, res in usage_table.resources.items():
+                if not usage_table.is_shader_input(resource_id):
+                    continue
+                with profiling.timer("ctx.GetTexture"):
+                    texture = capture_ctx.GetTexture(resource_id)
+                if not TextureSaver.should_export(texture):
                     continue
-                # 使用资源名称作为文件名，回退到 ID
-                tex_name = res.name if res.name else str(int(res.resourceId))
-                if TextureSaver.save_texture(capture_ctx, controller, res.resourceId, folder_path, tex_name):
-                    texture_count += 1
+                exports.append((resource_id, res))
+                total += sum(1 for _ in selection.iter_subresources(texture))
+            if progress is not None:
+                progress.start(total)
+
+            texture_count = 0
+            with profiling.timer("fs.capture_key"):
+                capture_key = stats_cache.capture_cache_key(capture_ctx.GetCaptureFilename())
+            archive_path = export_archive_path(save_dir, folder_name) if archive else None
+            with TextureWritePipeline(dedup=dedup, hardlink=hardlink, manifest_dir=folder_path,
+                                      incremental=incremental and not archive, capture_key=capture_key,
+                                      archive_path=archive_path) as pipeline:
+                try:
+                    for resource_id, res in exports:
+                        # 使用资源名称作为文件名，回退到 ID
+                        tex_name = res.name if res.name else str(int(resource_id))
+                        if TextureSaver.save_texture(capture_ctx, controller, resource_id, folder_path, tex_name,
+                                                     pipeline=pipeline, selection=selection, progress=progress,
+                                                     format_policy=format_policy):
+                            texture_count += 1
+                except ExportCancelled:
+                    print(f"[TextureExporter] 导出已取消，已完成 {progress.done}/{progress.total} 个子资源")
+            if progress is not None:
+                progress.finish()
         return texture_count
\ No newline at end of file